@@ -8,10 +8,22 @@ class Config:
     Attributes:
         project_path (str): The root project path.
         model_path (str): The path to the model.       
+        model_artefact_path (str): The path to the compact model artefact (pickle-free alternative to the model).
+        prediction_grid_path (str): The path to the precomputed prediction grid of the model.
         data_frame_path (str): The path to the data.    
+        catalogue_store_path (str): The path to the columnar catalogue store (memory-mapped alternative to the data).
+        profiles_path (str): The path to the directory of the rerun profiles of the app.
     """
     project_path: Path = Path(__file__).resolve().parents[1]
 
     model_path: Path = project_path.joinpath("app", "model", "model.pkl")
     
-    data_frame_path: Path = project_path.joinpath("app", "model", "data.pkl")
\ No newline at end of file
+    model_artefact_path: Path = project_path.joinpath("app", "model", "model.knn")
+    
+    prediction_grid_path: Path = project_path.joinpath("app", "model", "prediction_grid.npy")
+    
+    data_frame_path: Path = project_path.joinpath("app", "model", "data.pkl")
+    
+    catalogue_store_path: Path = project_path.joinpath("app", "model", "catalogue")
+    
+    profiles_path: Path = project_path.joinpath("profiles")
\ No newline at end of file
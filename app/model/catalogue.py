@@ -0,0 +1,223 @@
+import hashlib
+import numpy as np
+import pandas as pd
+
+class Catalogue:
+    """Represents the track catalogue (the data frame together with its track ID index).
+       The index (track ID -> row positions) is built once at load time, so tracks are found by a hash lookup
+       instead of comparing every ID of the frame. Subsets of the catalogue are handled as arrays of row positions
+       and combined by the positional set operations intersect() and union(). None stands for all rows in order,
+       so the unfiltered catalogue is represented without allocating an array of all row positions.
+    """
+    def __init__(self, input_frame: pd.DataFrame, id_attribute: str = "id"):
+        """Represents the constructor (builds the ID index).
+        Args:
+            input_frame (pd.DataFrame): The input data frame.
+            id_attribute (str, optional): The name of the track id attribute. Defaults to "id".
+        Raises:
+            TypeError: Is thrown if input_frame is not a pd.DataFrame.
+            TypeError: Is thrown if id_attribute is not a str.
+            e: Error message.
+        """
+        if type(input_frame) != pd.DataFrame:
+            raise TypeError("input_frame must be a pd.DataFrame!")
+        if type(id_attribute) != str:
+            raise TypeError("id_attribute must be a str!")
+
+        try:
+            self.__input_frame = input_frame
+            self.__id_attribute = id_attribute
+            codes, ids = pd.factorize(input_frame[id_attribute], use_na_sentinel=False)
+            # The rows of one ID are stored as a contiguous (ascending) slice
+            self.__id_index = pd.Index(ids)
+            self.__id_rows = np.argsort(codes, kind="stable")
+            self.__id_offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(codes, minlength=len(ids)), out=self.__id_offsets[1:])
+            self.__fingerprint = hashlib.blake2b(pd.util.hash_pandas_object(input_frame[id_attribute], index=False).to_numpy().tobytes(),
+                                                 digest_size=16).hexdigest()
+        except Exception as e:
+            raise e
+
+    def __len__(self) -> int:
+        """Returns the number of rows of the catalogue.
+        Returns:
+            int: The number of rows.
+        """
+        return len(self.__input_frame)
+
+    def get_frame(self) -> pd.DataFrame:
+        """Returns the data frame of the catalogue.
+        Returns:
+            pd.DataFrame: The data frame.
+        """
+        return self.__input_frame
+
+    def get_fingerprint(self) -> str:
+        """Returns the fingerprint of the catalogue (a hash of the track IDs in row order).
+           Row positions computed for one catalogue are valid for every catalogue with the same fingerprint.
+        Returns:
+            str: The fingerprint.
+        """
+        return self.__fingerprint
+
+    def get_all_rows(self) -> np.ndarray:
+        """Returns the positions of all rows.
+        Returns:
+            np.ndarray: The ascending row positions.
+        """
+        return np.arange(len(self.__input_frame))
+
+    def get_rows(self, track_id: str) -> np.ndarray:
+        """Returns the positions of the rows with the given track ID.
+        Args:
+            track_id (str): The track ID.
+        Raises:
+            TypeError: Is thrown if track_id is not a str.
+        Returns:
+            np.ndarray: The ascending row positions (empty if the track ID is unknown).
+        """
+        if type(track_id) != str:
+            raise TypeError("track_id must be a str!")
+
+        return self.get_rows_of_ids([track_id])
+
+    def get_row(self, track_id: str) -> int:
+        """Returns the position of the first row with the given track ID.
+        Args:
+            track_id (str): The track ID.
+        Raises:
+            TypeError: Is thrown if track_id is not a str.
+            KeyError: Is thrown if the track ID is unknown.
+        Returns:
+            int: The row position.
+        """
+        rows = self.get_rows(track_id)
+
+        if len(rows) == 0:
+            raise KeyError(f"Unknown track ID {track_id}!")
+        return int(rows[0])
+
+    def get_rows_of_ids(self, track_ids) -> np.ndarray:
+        """Returns the positions of the rows whose track ID is one of the given track IDs (the positional version of isin()).
+        Args:
+            track_ids: The track IDs (e.g. a list or a pd.Series).
+        Raises:
+            TypeError: Is thrown if track_ids is neither a list, a np.ndarray nor a pd.Series.
+        Returns:
+            np.ndarray: The row positions (in the order of the first occurrence of the track IDs, the rows of one ID ascending).
+        """
+        if type(track_ids) not in [list, np.ndarray, pd.Series]:
+            raise TypeError("track_ids must be either a list, a np.ndarray or a pd.Series!")
+
+        codes = self.__id_index.get_indexer(pd.unique(pd.Series(track_ids, dtype=object)))
+        codes = codes[codes >= 0]
+
+        if len(codes) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        starts = self.__id_offsets[codes]
+        lengths = self.__id_offsets[codes + 1] - starts
+        # Positions of the slices of all codes in the concatenated result
+        slice_offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        return self.__id_rows[np.arange(lengths.sum()) + slice_offsets]
+
+    def get_rows_of_frame(self, input_frame: pd.DataFrame) -> np.ndarray:
+        """Returns the positions of the rows whose track ID occurs in a frame (e.g. the recommendations).
+        Args:
+            input_frame (pd.DataFrame): The data frame (must contain the track id attribute).
+        Raises:
+            TypeError: Is thrown if input_frame is not a pd.DataFrame.
+        Returns:
+            np.ndarray: The row positions (see get_rows_of_ids()).
+        """
+        if type(input_frame) != pd.DataFrame:
+            raise TypeError("input_frame must be a pd.DataFrame!")
+
+        return self.get_rows_of_ids(input_frame[self.__id_attribute])
+
+    def get_row_count(self, rows: np.ndarray) -> int:
+        """Returns the number of rows at the given positions.
+        Args:
+            rows (np.ndarray): The row positions (None for all rows).
+        Returns:
+            int: The number of rows.
+        """
+        return len(self.__input_frame) if rows is None else len(rows)
+
+    def get_slice(self, rows: np.ndarray, left: int, right: int) -> np.ndarray:
+        """Returns the row positions [left:right] of the given row positions.
+        Args:
+            rows (np.ndarray): The row positions (None for all rows).
+            left (int): The first position (inclusive).
+            right (int): The last position (exclusive).
+        Returns:
+            np.ndarray: The row positions (only the slice is allocated for all rows).
+        """
+        if rows is None:
+            return np.arange(min(left, len(self.__input_frame)), min(right, len(self.__input_frame)), dtype=np.int64)
+        return rows[left:right]
+
+    def take(self, rows: np.ndarray, columns: list = None) -> pd.DataFrame:
+        """Returns the rows at the given positions.
+        Args:
+            rows (np.ndarray): The row positions (None for all rows).
+            columns (list, optional): The columns to take. Defaults to None (all columns).
+        Raises:
+            TypeError: Is thrown if rows is neither a np.ndarray nor None.
+            TypeError: Is thrown if columns is neither a list nor None.
+        Returns:
+            pd.DataFrame: The data frame (in the order of the row positions, the data frame of the catalogue itself if all rows are taken in order).
+        """
+        if rows is not None and type(rows) != np.ndarray:
+            raise TypeError("rows must be either a np.ndarray or None!")
+        if columns is not None and type(columns) != list:
+            raise TypeError("columns must be either a list or None!")
+
+        frame = self.__input_frame if columns is None else self.__input_frame[columns]
+
+        if rows is None or len(rows) == len(frame) and (len(rows) == 0 or (rows[0] == 0 and bool(np.all(np.diff(rows) == 1)))):
+            return frame
+        return frame.iloc[rows]
+
+    @staticmethod
+    def intersect(rows: np.ndarray, ascending_rows: np.ndarray) -> np.ndarray:
+        """Returns the row positions of rows that also occur in ascending_rows (the order of rows is kept).
+        Args:
+            rows (np.ndarray): The row positions.
+            ascending_rows (np.ndarray): The ascending, unique row positions (None for all rows).
+        Raises:
+            TypeError: Is thrown if rows is not a np.ndarray.
+            TypeError: Is thrown if ascending_rows is neither a np.ndarray nor None.
+        Returns:
+            np.ndarray: The row positions.
+        """
+        if type(rows) != np.ndarray:
+            raise TypeError("rows must be a np.ndarray!")
+        if ascending_rows is None:
+            return rows
+        if type(ascending_rows) != np.ndarray:
+            raise TypeError("ascending_rows must be either a np.ndarray or None!")
+        if len(rows) == 0 or len(ascending_rows) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        found = np.minimum(np.searchsorted(ascending_rows, rows), len(ascending_rows) - 1)
+        return rows[ascending_rows[found] == rows]
+
+    @staticmethod
+    def union(rows: np.ndarray, other_rows: np.ndarray) -> np.ndarray:
+        """Returns the row positions occurring in rows or other_rows.
+        Args:
+            rows (np.ndarray): The row positions.
+            other_rows (np.ndarray): The other row positions.
+        Raises:
+            TypeError: Is thrown if rows is not a np.ndarray.
+            TypeError: Is thrown if other_rows is not a np.ndarray.
+        Returns:
+            np.ndarray: The ascending, unique row positions.
+        """
+        if type(rows) != np.ndarray:
+            raise TypeError("rows must be a np.ndarray!")
+        if type(other_rows) != np.ndarray:
+            raise TypeError("other_rows must be a np.ndarray!")
+
+        return np.union1d(rows, other_rows)
@@ -0,0 +1,414 @@
+import json
+import os
+import pickle
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+class CatalogueView:
+    """Represents a read-only, DataFrame-compatible view of a memory-mapped catalogue (see CatalogueStore).
+       Numeric and categorical columns are served directly from the memory-mapped files,
+       string and string list columns are decoded only when they are requested.
+       If pyarrow is installed, whole string and string list columns (e.g. of to_frame()) are Arrow arrays pointing into the
+       memory-mapped offsets and bytes instead of Python objects, so they are shared through the OS page cache as well
+       (missing strings are NaN, missing string lists pd.NA). Without pyarrow they are decoded into per-process Python objects.
+    """
+    def __init__(self, directory: Path, meta: dict):
+        """Represents the constructor.
+        Args:
+            directory (Path): The directory of the catalogue store.
+            meta (dict): The parsed meta information of the catalogue store.
+        """
+        self.__directory = Path(directory)
+        self.__row_count = meta["row_count"]
+        self.__columns = {column["name"]: column for column in meta["columns"]}
+        self.__index_column = meta["index"]
+        self.__arrays = {}
+
+    def __len__(self) -> int:
+        """Returns the number of rows.
+        Returns:
+            int: The number of rows.
+        """
+        return self.__row_count
+
+    @property
+    def columns(self) -> pd.Index:
+        """Returns the column names.
+        Returns:
+            pd.Index: The column names.
+        """
+        return pd.Index(list(self.__columns.keys()))
+
+    @property
+    def shape(self) -> tuple:
+        """Returns the shape (rows, columns).
+        Returns:
+            tuple: The shape.
+        """
+        return (self.__row_count, len(self.__columns))
+
+    @property
+    def index(self) -> pd.Index:
+        """Returns the row index.
+        Returns:
+            pd.Index: The row index.
+        """
+        if self.__index_column is None:
+            return pd.RangeIndex(self.__row_count)
+        return pd.Index(self.__decode_column(self.__index_column, None))
+
+    def __getitem__(self, key):
+        """Returns a column (as pd.Series) or several columns (as pd.DataFrame).
+        Args:
+            key (str | list): The column name or the list of column names.
+        Raises:
+            TypeError: Is thrown if key is neither a str nor a list.
+            KeyError: Is thrown if a column does not exist.
+        Returns:
+            pd.Series | pd.DataFrame: The requested data.
+        """
+        if type(key) == str:
+            return pd.Series(self.__decode_column(self.__get_column(key), None), index=self.index, name=key, copy=False)
+        if type(key) == list:
+            return self.to_frame(key)
+        raise TypeError("key must be either a str or a list!")
+
+    def get_array(self, column_name: str) -> np.ndarray:
+        """Returns the raw memory-mapped array of a numeric column (no copy).
+        Args:
+            column_name (str): The column name.
+        Raises:
+            TypeError: Is thrown if column_name is not a str.
+            KeyError: Is thrown if the column does not exist.
+            ValueError: Is thrown if the column is not numeric.
+        Returns:
+            np.ndarray: The read-only array.
+        """
+        if type(column_name) != str:
+            raise TypeError("column_name must be a str!")
+
+        column = self.__get_column(column_name)
+
+        if column["kind"] != "numeric":
+            raise ValueError(f"{column_name} is not a numeric column!")
+        return self.__get_array(column, "values")
+
+    def take(self, positions: np.ndarray, columns: list = None) -> pd.DataFrame:
+        """Materializes only the given rows (only their strings are decoded).
+        Args:
+            positions (np.ndarray): The row positions.
+            columns (list, optional): The columns to materialize (all columns if None). Defaults to None.
+        Raises:
+            TypeError: Is thrown if positions is not a np.ndarray.
+            TypeError: Is thrown if columns is neither a list nor None.
+        Returns:
+            pd.DataFrame: The data frame consisting of the given rows.
+        """
+        if type(positions) != np.ndarray:
+            raise TypeError("positions must be a np.ndarray!")
+        if columns is not None and type(columns) != list:
+            raise TypeError("columns must be either a list or None!")
+
+        column_names = list(self.__columns.keys()) if columns is None else columns
+        data = {name: self.__decode_column(self.__get_column(name), positions) for name in column_names}
+        index = self.index[positions]
+        return pd.DataFrame(data, index=index, columns=column_names, copy=False)
+
+    def to_frame(self, columns: list = None) -> pd.DataFrame:
+        """Materializes the view as a data frame (numeric and categorical columns stay memory-mapped, string and string list columns
+           are Arrow-backed by the memory-mapped files if pyarrow is installed).
+        Args:
+            columns (list, optional): The columns to materialize (all columns if None). Defaults to None.
+        Raises:
+            TypeError: Is thrown if columns is neither a list nor None.
+        Returns:
+            pd.DataFrame: The data frame.
+        """
+        if columns is not None and type(columns) != list:
+            raise TypeError("columns must be either a list or None!")
+
+        column_names = list(self.__columns.keys()) if columns is None else columns
+        data = {name: self.__decode_column(self.__get_column(name), None) for name in column_names}
+        return pd.DataFrame(data, index=self.index, columns=column_names, copy=False)
+
+    def __get_column(self, column_name: str) -> dict:
+        """Returns the meta information of a column.
+        Args:
+            column_name (str): The column name.
+        Raises:
+            KeyError: Is thrown if the column does not exist.
+        Returns:
+            dict: The meta information of the column.
+        """
+        if column_name not in self.__columns:
+            raise KeyError(column_name)
+        return self.__columns[column_name]
+
+    def __get_array(self, column: dict, part: str) -> np.ndarray:
+        """Returns (and memorizes) a memory-mapped array of a column.
+        Args:
+            column (dict): The meta information of the column.
+            part (str): The part of the column (e.g. "values", "offsets", "bytes").
+        Returns:
+            np.ndarray: The read-only memory-mapped array.
+        """
+        file_name = f"{column['file']}.{part}.npy"
+
+        if file_name not in self.__arrays:
+            self.__arrays[file_name] = np.load(self.__directory.joinpath(file_name), mmap_mode="r")
+        return self.__arrays[file_name]
+
+    def __decode_column(self, column: dict, positions: np.ndarray):
+        """Decodes a column (or only the given rows of it).
+        Args:
+            column (dict): The meta information of the column.
+            positions (np.ndarray): The row positions (all rows if None).
+        Returns:
+            The decoded column values (np.ndarray, pd.Categorical, pd.api.extensions.ExtensionArray or list).
+        """
+        kind = column["kind"]
+
+        if positions is None and pa is not None and kind in ["string", "string_list"]:
+            return self.__get_arrow_column(column)
+
+        if kind == "numeric":
+            values = self.__get_array(column, "values")
+            return values if positions is None else values[positions]
+        if kind == "categorical":
+            codes = self.__get_array(column, "codes")
+            codes = codes if positions is None else codes[positions]
+            return pd.Categorical.from_codes(codes, categories=column["categories"])
+
+        rows = np.arange(self.__row_count) if positions is None else np.asarray(positions, dtype=np.int64)
+        missing = self.__get_array(column, "missing") if column["has_missing"] else None
+
+        if kind == "string_list":
+            list_offsets = self.__get_array(column, "list_offsets")
+            starts = list_offsets[rows]
+            ends = list_offsets[rows + 1]
+            items = self.__decode_strings(column, None if positions is None else
+                                          np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)] or [np.zeros(0, dtype=np.int64)]))
+            lengths = ends - starts
+            bounds = np.concatenate([[0], np.cumsum(lengths)]).tolist()
+            result = [items[bounds[i]:bounds[i + 1]] for i in range(len(rows))]
+        else:
+            result = self.__decode_strings(column, rows if positions is not None else None)
+
+            if kind == "json":
+                result = [json.loads(value) for value in result]
+
+        if missing is not None:
+            for i in np.flatnonzero(missing[rows]):
+                result[i] = np.nan
+
+        values = np.empty(len(result), dtype=object)
+        values[:] = result
+        return values
+
+    def __get_arrow_column(self, column: dict):
+        """Returns a whole string or string list column as Arrow array backed by the memory-mapped files (no copy of the strings).
+        Args:
+            column (dict): The meta information of the column.
+        Returns:
+            pd.api.extensions.ExtensionArray: The column (str dtype for strings, large_list<large_string> for string lists).
+        """
+        missing = self.__get_array(column, "missing") if column["has_missing"] else None
+        # Arrow marks the valid values in a bitmap (only this bitmap is allocated)
+        validity = None if missing is None else pa.py_buffer(np.packbits(~np.asarray(missing), bitorder="little"))
+        offsets = self.__get_array(column, "offsets")
+        strings = pa.LargeStringArray.from_buffers(len(offsets) - 1, pa.py_buffer(offsets), pa.py_buffer(self.__get_array(column, "bytes")),
+                                                   None if column["kind"] == "string_list" else validity)
+
+        if column["kind"] == "string":
+            return pd.array(strings, dtype=pd.StringDtype("pyarrow", na_value=np.nan))
+
+        list_offsets = pa.Array.from_buffers(pa.int64(), self.__row_count + 1, [None, pa.py_buffer(self.__get_array(column, "list_offsets"))])
+        lists = pa.LargeListArray.from_arrays(list_offsets, strings) if validity is None else \
+            pa.LargeListArray.from_buffers(pa.large_list(pa.large_string()), self.__row_count, [validity, list_offsets.buffers()[1]], children=[strings])
+        return pd.arrays.ArrowExtensionArray(lists)
+
+    def __decode_strings(self, column: dict, items: np.ndarray) -> list:
+        """Decodes strings from the offsets-plus-bytes buffer of a column.
+        Args:
+            column (dict): The meta information of the column.
+            items (np.ndarray): The positions of the strings in the buffer (all strings if None).
+        Returns:
+            list: The decoded strings.
+        """
+        offsets = self.__get_array(column, "offsets")
+        buffer = self.__get_array(column, "bytes")
+
+        if items is None:
+            data = buffer.tobytes()
+            bounds = offsets.tolist()
+            return [data[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+        starts = offsets[items].tolist()
+        ends = offsets[np.asarray(items, dtype=np.int64) + 1].tolist()
+        return [buffer[start:end].tobytes().decode("utf-8") for start, end in zip(starts, ends)]
+
+class CatalogueStore:
+    """Represents the columnar on-disk catalogue store.
+       Every column is stored as .npy file(s) inside the store directory, which are memory-mapped when loading:
+       * numeric columns as fixed-width arrays
+       * string columns as offsets plus UTF-8 bytes
+       * string list columns (e.g. artists_name) as list offsets plus string offsets plus UTF-8 bytes
+       * categorical columns (e.g. track_genre) as integer codes plus categories
+       * other object columns (e.g. dictionaries) as JSON strings
+       Several processes loading the same store share the pages through the OS page cache.
+    """
+    FORMAT_VERSION = 1
+    META_FILE_NAME = "meta.json"
+
+    @staticmethod
+    def write(frame: pd.DataFrame, directory: Path, categorical_attributes: list = ["track_genre"]):
+        """Writes the frame to the store directory.
+        Args:
+            frame (pd.DataFrame): The input data frame.
+            directory (Path): The store directory (is created if it does not exist).
+            categorical_attributes (list, optional): The attributes stored as categorical codes. Defaults to ["track_genre"].
+        Raises:
+            TypeError: Is thrown if frame is not a pd.DataFrame.
+            TypeError: Is thrown if categorical_attributes is not a list.
+            ValueError: Is thrown if the column names of frame are not unique.
+            e: Error message.
+        """
+        if type(frame) != pd.DataFrame:
+            raise TypeError("frame must be a pd.DataFrame!")
+        if type(categorical_attributes) != list:
+            raise TypeError("categorical_attributes must be a list!")
+        if not(frame.columns.is_unique):
+            raise ValueError("The column names of frame must be unique!")
+
+        try:
+            directory = Path(directory)
+            directory.mkdir(parents=True, exist_ok=True)
+            columns = []
+
+            for position, name in enumerate(frame.columns):
+                file_name = f"column_{position:03d}"
+                categorical = name in categorical_attributes or isinstance(frame[name].dtype, pd.CategoricalDtype)
+                columns.append(CatalogueStore.__write_column(frame[name], str(name), file_name, directory, categorical))
+
+            index = None
+
+            if not(frame.index.equals(pd.RangeIndex(len(frame)))):
+                index = CatalogueStore.__write_column(frame.index.to_series(), "__index__", "index", directory, False)
+
+            meta = {"version": CatalogueStore.FORMAT_VERSION, "row_count": len(frame), "columns": columns, "index": index}
+
+            with open(directory.joinpath(CatalogueStore.META_FILE_NAME), "w", encoding="utf-8") as meta_file:
+                json.dump(meta, meta_file, indent=1)
+        except Exception as e:
+            raise e
+
+    @staticmethod
+    def load(directory: Path) -> CatalogueView:
+        """Loads (memory-maps) the store directory.
+        Args:
+            directory (Path): The store directory.
+        Raises:
+            FileNotFoundError: Is thrown if the directory does not contain a catalogue store.
+            ValueError: Is thrown if the store was written in an unsupported format version.
+        Returns:
+            CatalogueView: The read-only view of the catalogue.
+        """
+        meta_path = Path(directory).joinpath(CatalogueStore.META_FILE_NAME)
+
+        if not(meta_path.exists()):
+            raise FileNotFoundError(f"No catalogue store found in {directory}!")
+
+        with open(meta_path, "r", encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+
+        if meta["version"] != CatalogueStore.FORMAT_VERSION:
+            raise ValueError(f"Unsupported catalogue store version {meta['version']}!")
+        return CatalogueView(directory, meta)
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        """Checks whether the directory contains a catalogue store.
+        Args:
+            directory (Path): The store directory.
+        Returns:
+            bool: True if the store exists.
+        """
+        return Path(directory).joinpath(CatalogueStore.META_FILE_NAME).exists()
+
+    @staticmethod
+    def __write_column(series: pd.Series, name: str, file_name: str, directory: Path, categorical: bool) -> dict:
+        """Writes one column and returns its meta information.
+        Args:
+            series (pd.Series): The column.
+            name (str): The column name.
+            file_name (str): The file name prefix of the column.
+            directory (Path): The store directory.
+            categorical (bool): True if the column is stored as categorical codes.
+        Returns:
+            dict: The meta information of the column.
+        """
+        column = {"name": name, "file": file_name}
+
+        def save(part: str, array: np.ndarray):
+            np.save(directory.joinpath(f"{file_name}.{part}.npy"), np.ascontiguousarray(array))
+
+        if categorical:
+            categorical_values = pd.Categorical(series.astype(object).where(series.notna(), None))
+            codes_dtype = np.int16 if len(categorical_values.categories) < np.iinfo(np.int16).max else np.int32
+            save("codes", categorical_values.codes.astype(codes_dtype))
+            column.update({"kind": "categorical", "categories": [str(category) for category in categorical_values.categories]})
+            return column
+
+        if series.dtype.kind in "biuf":
+            save("values", series.to_numpy())
+            column.update({"kind": "numeric", "dtype": str(series.dtype)})
+            return column
+
+        values = series.to_numpy(dtype=object)
+        missing = np.array([not(isinstance(value, (str, list, tuple, dict, np.ndarray))) and pd.isna(value) for value in values], dtype=bool)
+        present = values[~missing]
+
+        if len(present) > 0 and all(isinstance(value, (list, tuple, np.ndarray)) for value in present):
+            lists = [[] if is_missing else [str(item) for item in value] for value, is_missing in zip(values, missing)]
+            save("list_offsets", np.concatenate([[0], np.cumsum([len(value) for value in lists])]).astype(np.int64))
+            CatalogueStore.__save_strings([item for value in lists for item in value], save)
+            column["kind"] = "string_list"
+        elif all(isinstance(value, str) for value in present):
+            CatalogueStore.__save_strings(["" if is_missing else value for value, is_missing in zip(values, missing)], save)
+            column["kind"] = "string"
+        else:
+            CatalogueStore.__save_strings(["null" if is_missing else json.dumps(value, default=str) for value, is_missing in zip(values, missing)], save)
+            column["kind"] = "json"
+
+        column["has_missing"] = bool(missing.any())
+
+        if column["has_missing"]:
+            save("missing", missing)
+        return column
+
+    @staticmethod
+    def __save_strings(strings: list, save):
+        """Saves strings as offsets plus UTF-8 bytes.
+        Args:
+            strings (list): The strings.
+            save: The function saving an array part of the column.
+        """
+        encoded = [value.encode("utf-8") for value in strings]
+        save("offsets", np.concatenate([[0], np.cumsum([len(value) for value in encoded])]).astype(np.int64))
+        save("bytes", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+if __name__ == "__main__":
+    # Converts the pickled data frame into the catalogue store (python catalogue_store.py [data.pkl] [store directory])
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+    from config import Config
+    config = Config()
+    source_path = Path(sys.argv[1]) if len(sys.argv) > 1 else config.data_frame_path
+    target_path = Path(sys.argv[2]) if len(sys.argv) > 2 else config.catalogue_store_path
+    CatalogueStore.write(pickle.load(open(source_path, "rb")), target_path)
@@ -0,0 +1,212 @@
+import numpy as np
+from model.frame_filter import FrameFilter
+from model.search_index import SearchIndex
+from model.catalogue import Catalogue
+
+class FilterPipeline:
+    """Represents the incremental filter pipeline (criteria -> genre -> search bar value -> recommendations).
+       Every stage memorizes its last result (row positions of the catalogue) together with its inputs, so only the stages downstream
+       of a changed input are recomputed. Narrowing the criteria ranges refilters the previous criteria result and extending the search bar value
+       refilters the previous search result instead of starting from the whole catalogue.
+       A stage result containing every row is memorized as None (see Catalogue), so idle sessions do not hold arrays of all row positions.
+    """
+    def __init__(self, catalogue: Catalogue, search_function, genre_attribute: str = "track_genre"):
+        """Represents the constructor.
+        Args:
+            catalogue (Catalogue): The catalogue.
+            search_function: The function applying the search bar value (rows: np.ndarray, search_value: str) -> np.ndarray
+                             (returns the ascending positions of the matching rows among the given ascending row positions, None for all rows).
+            genre_attribute (str, optional): The name of the genre attribute. Defaults to "track_genre".
+        Raises:
+            TypeError: Is thrown if catalogue is not a Catalogue.
+            TypeError: Is thrown if search_function is not callable.
+            TypeError: Is thrown if genre_attribute is not a str.
+        """
+        if type(catalogue) != Catalogue:
+            raise TypeError("catalogue must be a Catalogue!")
+        if not(callable(search_function)):
+            raise TypeError("search_function must be callable!")
+        if type(genre_attribute) != str:
+            raise TypeError("genre_attribute must be a str!")
+
+        self.__catalogue = catalogue
+        self.__search_function = search_function
+        self.__genre_attribute = genre_attribute
+        self.__stages = {"criteria": None, "genre": None, "search": None, "recommendations": None}
+        self.__version = 0
+
+    def run(self, criterion_min_max_tuples: list, genre_key: str, search_value: str, recommendations: np.ndarray = None) -> np.ndarray:
+        """Runs the pipeline (reusing the memorized stage results where possible).
+        Args:
+            criterion_min_max_tuples (list): List of the range filter tuples (e.g. [("danceability", (0, 0.5)) ,...]).
+            genre_key (str): The genre value ("all" disables the genre filter).
+            search_value (str): The search bar value ("" disables the search).
+            recommendations (np.ndarray, optional): The row positions of the recommended tracks (None disables the recommendations filter). Defaults to None.
+        Raises:
+            TypeError: Is thrown if criterion_min_max_tuples is not a list.
+            TypeError: Is thrown if genre_key is not a str.
+            TypeError: Is thrown if search_value is not a str.
+            TypeError: Is thrown if recommendations is neither a np.ndarray nor None.
+        Returns:
+            np.ndarray: The row positions of the filtered tracks (see Catalogue.take(), read-only as they are shared with the memorized stages,
+                        None if no row is filtered out).
+        """
+        if type(criterion_min_max_tuples) != list:
+            raise TypeError("criterion_min_max_tuples must be a list!")
+        if type(genre_key) != str:
+            raise TypeError("genre_key must be a str!")
+        if type(search_value) != str:
+            raise TypeError("search_value must be a str!")
+        if recommendations is not None and type(recommendations) != np.ndarray:
+            raise TypeError("recommendations must be either a np.ndarray or None!")
+
+        criteria = self.__run_criteria_stage(criterion_min_max_tuples)
+        genre = self.__run_genre_stage(criteria, genre_key)
+        search = self.__run_search_stage(genre, search_value)
+        return self.__run_recommendations_stage(search, recommendations)["result"]
+
+    def __store(self, stage_name: str, inputs, upstream: dict, result: np.ndarray) -> dict:
+        """Memorizes the result of a stage.
+        Args:
+            stage_name (str): The name of the stage.
+            inputs: The inputs of the stage.
+            upstream (dict): The memorized upstream stage (None for the first stage).
+            result (np.ndarray): The row positions of the result (None for all rows).
+        Returns:
+            dict: The memorized stage.
+        """
+        self.__version += 1
+
+        # Up to the recommendations the results are ascending and unique, so a result of the catalogue's length contains every row
+        if stage_name != "recommendations" and result is not None and len(result) == len(self.__catalogue):
+            result = None
+        if result is not None:
+            result.flags.writeable = False
+        stage = {"inputs": inputs, "upstream_version": None if upstream is None else upstream["version"],
+                 "version": self.__version, "result": result}
+        self.__stages[stage_name] = stage
+        return stage
+
+    def __get_memorized(self, stage_name: str, upstream: dict) -> dict:
+        """Returns the memorized stage if it was computed from the same upstream result.
+        Args:
+            stage_name (str): The name of the stage.
+            upstream (dict): The memorized upstream stage (None for the first stage).
+        Returns:
+            dict: The memorized stage (None if it is outdated).
+        """
+        stage = self.__stages[stage_name]
+
+        if stage is None or stage["upstream_version"] != (None if upstream is None else upstream["version"]):
+            return None
+        return stage
+
+    def __filter_rows(self, rows: np.ndarray, criterion_min_max_tuples: list, criterion_value_tuples: list) -> np.ndarray:
+        """Applies the filters to the given rows (only the filtered columns are taken from the catalogue).
+        Args:
+            rows (np.ndarray): The ascending row positions (None for all rows).
+            criterion_min_max_tuples (list): List of the range filter tuples.
+            criterion_value_tuples (list): List of the equality filter tuples.
+        Returns:
+            np.ndarray: The ascending row positions of the matching rows.
+        """
+        columns = list(dict.fromkeys([name for name, _ in criterion_min_max_tuples] + [name for name, _ in criterion_value_tuples]))
+
+        if rows is None:
+            return FrameFilter.get_filtered_positions(self.__catalogue.get_frame()[columns], criterion_min_max_tuples, criterion_value_tuples)
+        return rows[FrameFilter.get_filtered_positions(self.__catalogue.take(rows, columns), criterion_min_max_tuples, criterion_value_tuples)]
+
+    def __run_criteria_stage(self, criterion_min_max_tuples: list) -> dict:
+        """Runs the criteria (range filter) stage.
+        Args:
+            criterion_min_max_tuples (list): List of the range filter tuples.
+        Returns:
+            dict: The memorized stage.
+        """
+        inputs = [(name, tuple(min_max)) for name, min_max in criterion_min_max_tuples]
+        memorized = self.__get_memorized("criteria", None)
+
+        if memorized is not None and memorized["inputs"] == inputs:
+            return memorized
+
+        source = None
+
+        if memorized is not None and self.__is_narrowed(memorized["inputs"], inputs):
+            source = memorized["result"]
+        return self.__store("criteria", inputs, None, self.__filter_rows(source, criterion_min_max_tuples, []))
+
+    def __run_genre_stage(self, upstream: dict, genre_key: str) -> dict:
+        """Runs the genre (equality filter) stage.
+        Args:
+            upstream (dict): The memorized criteria stage.
+            genre_key (str): The genre value ("all" disables the filter).
+        Returns:
+            dict: The memorized stage.
+        """
+        memorized = self.__get_memorized("genre", upstream)
+
+        if memorized is not None and memorized["inputs"] == genre_key:
+            return memorized
+
+        result = upstream["result"]
+
+        if genre_key != "all":
+            result = self.__filter_rows(result, [], [(self.__genre_attribute, genre_key)])
+        return self.__store("genre", genre_key, upstream, result)
+
+    def __run_search_stage(self, upstream: dict, search_value: str) -> dict:
+        """Runs the search bar value stage.
+        Args:
+            upstream (dict): The memorized genre stage.
+            search_value (str): The search bar value.
+        Returns:
+            dict: The memorized stage.
+        """
+        memorized = self.__get_memorized("search", upstream)
+
+        if memorized is not None and memorized["inputs"] == search_value:
+            return memorized
+        if search_value == "":
+            return self.__store("search", search_value, upstream, upstream["result"])
+
+        source = upstream["result"]
+
+        # Every name containing the extended value also contains the previous one,
+        # so only the previous hits have to be searched again
+        if memorized is not None and memorized["inputs"] != "" and SearchIndex.normalize(memorized["inputs"]) in SearchIndex.normalize(search_value):
+            source = memorized["result"]
+        return self.__store("search", search_value, upstream, self.__search_function(source, search_value))
+
+    def __run_recommendations_stage(self, upstream: dict, recommendations: np.ndarray) -> dict:
+        """Runs the recommendations stage.
+        Args:
+            upstream (dict): The memorized search stage.
+            recommendations (np.ndarray): The row positions of the recommended tracks (None disables the filter).
+        Returns:
+            dict: The memorized stage.
+        """
+        memorized = self.__get_memorized("recommendations", upstream)
+
+        if memorized is not None and memorized["inputs"] is recommendations:
+            return memorized
+
+        result = upstream["result"]
+
+        # The recommendations keep their own order (e.g. ranked by the distance to the track they are based on)
+        if recommendations is not None:
+            result = Catalogue.intersect(recommendations, result)
+        return self.__store("recommendations", recommendations, upstream, result)
+
+    def __is_narrowed(self, previous_inputs: list, inputs: list) -> bool:
+        """Checks whether every range of the inputs lies within the corresponding previous range.
+        Args:
+            previous_inputs (list): The previous range filter tuples.
+            inputs (list): The current range filter tuples.
+        Returns:
+            bool: True if the ranges were only narrowed.
+        """
+        if [name for name, _ in previous_inputs] != [name for name, _ in inputs]:
+            return False
+
+        return all(min_max[0] >= previous_min_max[0] and min_max[1] <= previous_min_max[1]
+                   for (_, previous_min_max), (_, min_max) in zip(previous_inputs, inputs))
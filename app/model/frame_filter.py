@@ -1,7 +1,9 @@
+import numpy as np
 import pandas as pd
 
 class FrameFilter:
     """Represents the frame filter.
+       All criteria are compiled into one fused boolean mask over the NumPy column arrays, so the frame is indexed exactly once.
     """
     @staticmethod
     def apply_range_filter(frame: pd.DataFrame, criterion_min_max_tuples: list) -> pd.DataFrame:
@@ -44,14 +46,7 @@ class FrameFilter:
                 raise TypeError("Max value must be either int or float!")       
         
         try:
-            result = pd.DataFrame(frame)
-            
-            for t in criterion_min_max_tuples:
-                criterion_name = t[0]
-                criterion_min_val = t[1][0]
-                criterion_max_val = t[1][1]
-                result = result[(result[criterion_name] >= criterion_min_val) & (result[criterion_name] <= criterion_max_val)]
-            return result
+            return frame[FrameFilter.__get_mask(frame, criterion_min_max_tuples, [])]
         except Exception as e:
             raise e
         
@@ -87,15 +82,125 @@ class FrameFilter:
                 raise TypeError("The first element of all tuples must be string!")   
         
         try:
-            result = pd.DataFrame(frame)
-            
-            for t in criterion_value_tuples:
-                criterion_name = t[0]
-                equal_value = t[1]
-                result = result[result[criterion_name] == equal_value]
-            return result
+            return frame[FrameFilter.__get_mask(frame, [], criterion_value_tuples)]
         except Exception as e:
             raise e
         
+    @staticmethod
+    def apply_filters(frame: pd.DataFrame, criterion_min_max_tuples: list, criterion_value_tuples: list) -> pd.DataFrame:
+        """Applies the range filter (>=, <=) and the equality filter (==) at once (the frame is indexed exactly once).
+        Args:
+            frame (pd.DataFrame): The input data frame.
+            criterion_min_max_tuples (list): List of the range filter tuples (e.g. [("danceability", (0, 0.5)) ,...]).
+            criterion_value_tuples (list): List of the equality filter tuples (e.g. [("track_genre", "pop") ,...]).
+        Raises:
+            TypeError: Is thrown if frame is not a pd.DataFrame.
+            TypeError: Is thrown if criterion_min_max_tuples is not a list.
+            TypeError: Is thrown if criterion_value_tuples is not a list.
+            e: Error message.
+        Returns:
+            pd.DataFrame: The filtered frame.
+        """
+        if type(frame) != pd.DataFrame:
+            raise TypeError("frame must be a pandas DataFrame!")
+        if type(criterion_min_max_tuples) != list:
+            raise TypeError("criterion_min_max_tuples must be a list!")
+        if type(criterion_value_tuples) != list:
+            raise TypeError("criterion_value_tuples must be a list!")
+        if len(criterion_min_max_tuples) == 0 and len(criterion_value_tuples) == 0:
+            return frame
+        
+        try:
+            return frame[FrameFilter.get_mask(frame, criterion_min_max_tuples, criterion_value_tuples)]
+        except Exception as e:
+            raise e
+        
+    @staticmethod
+    def get_filtered_positions(frame: pd.DataFrame, criterion_min_max_tuples: list, criterion_value_tuples: list) -> np.ndarray:
+        """Returns the row positions matching the range filter (>=, <=) and the equality filter (==) without copying the frame.
+        Args:
+            frame (pd.DataFrame): The input data frame.
+            criterion_min_max_tuples (list): List of the range filter tuples (e.g. [("danceability", (0, 0.5)) ,...]).
+            criterion_value_tuples (list): List of the equality filter tuples (e.g. [("track_genre", "pop") ,...]).
+        Raises:
+            TypeError: Is thrown if frame is not a pd.DataFrame.
+            TypeError: Is thrown if criterion_min_max_tuples is not a list.
+            TypeError: Is thrown if criterion_value_tuples is not a list.
+            e: Error message.
+        Returns:
+            np.ndarray: The ascending row positions.
+        """
+        try:
+            return np.flatnonzero(FrameFilter.get_mask(frame, criterion_min_max_tuples, criterion_value_tuples))
+        except Exception as e:
+            raise e
+        
+    @staticmethod
+    def get_mask(frame: pd.DataFrame, criterion_min_max_tuples: list, criterion_value_tuples: list) -> np.ndarray:
+        """Compiles the range filter (>=, <=) and the equality filter (==) into one fused boolean mask.
+        Args:
+            frame (pd.DataFrame): The input data frame.
+            criterion_min_max_tuples (list): List of the range filter tuples (e.g. [("danceability", (0, 0.5)) ,...]).
+            criterion_value_tuples (list): List of the equality filter tuples (e.g. [("track_genre", "pop") ,...]).
+        Raises:
+            TypeError: Is thrown if frame is not a pd.DataFrame.
+            TypeError: Is thrown if criterion_min_max_tuples is not a list.
+            TypeError: Is thrown if criterion_value_tuples is not a list.
+            TypeError: Is thrown if the tuples do not have the format of apply_range_filter() and apply_equality_filter().
+        Returns:
+            np.ndarray: The boolean mask (one entry per row).
+        """
+        if type(frame) != pd.DataFrame:
+            raise TypeError("frame must be a pandas DataFrame!")
+        if type(criterion_min_max_tuples) != list:
+            raise TypeError("criterion_min_max_tuples must be a list!")
+        if type(criterion_value_tuples) != list:
+            raise TypeError("criterion_value_tuples must be a list!")
+        if not(all([type(el) == tuple and len(el) == 2 and type(el[0]) == str for el in criterion_min_max_tuples])):
+            raise TypeError("criterion_min_max_tuples must consist of tuples of the format (str, (min, max))!")
+        if not(all([type(el[1]) == tuple and len(el[1]) == 2 for el in criterion_min_max_tuples])):
+            raise TypeError("The second element of all tuples must be (min,max)!")
+        if not(all([type(el) == tuple and len(el) == 2 and type(el[0]) == str for el in criterion_value_tuples])):
+            raise TypeError("criterion_value_tuples must consist of tuples of the format (str, value)!")
+        
+        return FrameFilter.__get_mask(frame, criterion_min_max_tuples, criterion_value_tuples)
+        
+    @staticmethod
+    def __get_mask(frame: pd.DataFrame, criterion_min_max_tuples: list, criterion_value_tuples: list) -> np.ndarray:
+        """Compiles the (already validated) criteria into one fused boolean mask.
+        Args:
+            frame (pd.DataFrame): The input data frame.
+            criterion_min_max_tuples (list): List of the range filter tuples.
+            criterion_value_tuples (list): List of the equality filter tuples.
+        Returns:
+            np.ndarray: The boolean mask (one entry per row).
+        """
+        mask = np.ones(len(frame), dtype=bool)
+        step = np.empty(len(frame), dtype=bool)
+        
+        for criterion_name, (criterion_min_val, criterion_max_val) in criterion_min_max_tuples:
+            values = frame[criterion_name].to_numpy()
+            np.greater_equal(values, criterion_min_val, out=step)
+            mask &= step
+            np.less_equal(values, criterion_max_val, out=step)
+            mask &= step
+            
+        for criterion_name, equal_value in criterion_value_tuples:
+            column = frame[criterion_name]
+            
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                # Compare the integer codes instead of the values
+                categories = column.cat.categories
+                
+                if equal_value not in categories:
+                    mask[:] = False
+                    continue
+                np.equal(column.cat.codes.to_numpy(), categories.get_loc(equal_value), out=step)
+            else:
+                step[:] = (column == equal_value).to_numpy(dtype=bool, na_value=False)
+            mask &= step
+            
+        return mask
+        
         
         
\ No newline at end of file
@@ -0,0 +1,191 @@
+import os
+import math
+import html
+import threading
+from collections import OrderedDict
+
+class RadarChartRenderer:
+    """Represents the process-wide, size-bounded LRU cache of the radar charts of the tracks.
+       The charts are memoized by their values rounded to the precision (e.g. the four features of a track rounded to 2 decimals),
+       their attribute names and their size, so tracks with similar features share one chart and a chart is only built once
+       per process instead of once per track and rerun. Besides the Plotly figure, a chart can be rendered as lightweight SVG
+       (see get_svg()), which does not build any Plotly object (the radial axis ranges from 0 to 1).
+    """
+    # Selects the SVG charts instead of the Plotly figures if set to "svg"
+    ENVIRONMENT_VARIABLE = "RECOMMENDER_RADAR_CHARTS"
+
+    def __init__(self, max_size: int = 512, precision: int = 2):
+        """Represents the constructor.
+        Args:
+            max_size (int, optional): The maximum number of cached charts. Defaults to 512.
+            precision (int, optional): The number of decimals the values are rounded to. Defaults to 2.
+        Raises:
+            TypeError: Is thrown if max_size or precision is not an int.
+            ValueError: Is thrown if max_size is less than 1.
+            ValueError: Is thrown if precision is negative.
+        """
+        if type(max_size) != int or type(precision) != int:
+            raise TypeError("max_size and precision must be of type int!")
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1!")
+        if precision < 0:
+            raise ValueError("precision cannot be negative!")
+
+        self.__max_size = max_size
+        self.__precision = precision
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def __len__(self) -> int:
+        """Returns the number of cached charts.
+        Returns:
+            int: The number of charts.
+        """
+        with self.__lock:
+            return len(self.__entries)
+
+    @staticmethod
+    def is_svg_requested() -> bool:
+        """Checks whether the SVG charts are selected by RECOMMENDER_RADAR_CHARTS.
+        Returns:
+            bool: True if requested.
+        """
+        return os.environ.get(RadarChartRenderer.ENVIRONMENT_VARIABLE, "").lower() == "svg"
+
+    def get_key(self, r_values: list) -> tuple:
+        """Returns the rounded values a chart is memoized by.
+        Args:
+            r_values (list): The values of the chart.
+        Returns:
+            tuple: The rounded values.
+        """
+        return tuple(round(float(value), self.__precision) for value in r_values)
+
+    def get_figure(self, r_values: list, theta_values: list, width: int, height: int):
+        """Returns the Plotly radar chart of the values (built by plotly.express.line_polar() from the rounded values on a cache miss).
+           The figure is shared by all sessions, so it must not be modified.
+        Args:
+            r_values (list): The values of the chart.
+            theta_values (list): The attribute names.
+            width (int): The chart width.
+            height (int): The chart height.
+        Returns:
+            The figure.
+        """
+        key = ("figure", self.get_key(r_values), tuple(theta_values), width, height)
+        return self.__get_or_build(key, lambda: self.__build_figure(list(key[1]), theta_values, width, height))
+
+    def get_svg(self, r_values: list, theta_values: list, width: int, height: int) -> str:
+        """Returns the radar chart of the values as SVG document (built from the rounded values on a cache miss).
+        Args:
+            r_values (list): The values of the chart (between 0 and 1, values outside are clipped).
+            theta_values (list): The attribute names.
+            width (int): The chart width.
+            height (int): The chart height.
+        Returns:
+            str: The SVG document.
+        """
+        key = ("svg", self.get_key(r_values), tuple(theta_values), width, height)
+        return self.__get_or_build(key, lambda: self.__build_svg(list(key[1]), theta_values, width, height))
+
+    def clear(self):
+        """Removes all charts (the counters are kept).
+        """
+        with self.__lock:
+            self.__entries.clear()
+
+    def get_statistics(self) -> dict:
+        """Returns the counters of the cache.
+        Returns:
+            dict: The number of charts, hits, misses and evictions and the hit rate.
+        """
+        with self.__lock:
+            requests = self.__hits + self.__misses
+            return {"entries": len(self.__entries), "max_size": self.__max_size, "hits": self.__hits, "misses": self.__misses,
+                    "evictions": self.__evictions, "hit_rate": self.__hits / requests if requests > 0 else 0.0}
+
+    def __get_or_build(self, key: tuple, build_function):
+        """Returns the cached chart of a key or builds and caches it.
+        Args:
+            key (tuple): The key.
+            build_function: The function building the chart () -> chart (called without holding the lock).
+        Returns:
+            The chart.
+        """
+        with self.__lock:
+            chart = self.__entries.get(key)
+
+            if chart is not None:
+                self.__hits += 1
+                self.__entries.move_to_end(key)
+                return chart
+
+            self.__misses += 1
+
+        chart = build_function()
+
+        with self.__lock:
+            self.__entries[key] = chart
+            self.__entries.move_to_end(key)
+
+            while len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
+                self.__evictions += 1
+        return chart
+
+    def __build_figure(self, r_values: list, theta_values: list, width: int, height: int):
+        """Builds the Plotly radar chart.
+        Args:
+            r_values (list): The values of the chart.
+            theta_values (list): The attribute names.
+            width (int): The chart width.
+            height (int): The chart height.
+        Returns:
+            The figure.
+        """
+        # Plotly is only imported when the first figure is built
+        import plotly.express as px
+
+        return px.line_polar(r=r_values, theta=theta_values, line_close=True, width=width, height=height)
+
+    def __build_svg(self, r_values: list, theta_values: list, width: int, height: int) -> str:
+        """Builds the SVG radar chart (the first axis points to the right, the others follow counterclockwise as in Plotly).
+        Args:
+            r_values (list): The values of the chart.
+            theta_values (list): The attribute names.
+            width (int): The chart width.
+            height (int): The chart height.
+        Returns:
+            str: The SVG document.
+        """
+        center_x, center_y = width / 2, height / 2
+        # The margin leaves room for the attribute names left and right of the chart
+        radius = max(min(width / 2 - 90, height / 2 - 30), 1)
+        angles = [2 * math.pi * index / len(theta_values) for index in range(len(theta_values))]
+
+        def get_points(values: list) -> str:
+            return " ".join(f"{center_x + radius * value * math.cos(angle):.1f},{center_y - radius * value * math.sin(angle):.1f}"
+                            for value, angle in zip(values, angles))
+
+        elements = [f'<polygon points="{get_points([level] * len(angles))}" fill="none" stroke="#d0d4dc" stroke-width="1"/>'
+                    for level in [0.25, 0.5, 0.75, 1.0]]
+        elements += [f'<line x1="{center_x:.1f}" y1="{center_y:.1f}" x2="{center_x + radius * math.cos(angle):.1f}" '
+                     f'y2="{center_y - radius * math.sin(angle):.1f}" stroke="#d0d4dc" stroke-width="1"/>' for angle in angles]
+        elements.append(f'<polygon points="{get_points([min(max(value, 0.0), 1.0) for value in r_values])}" '
+                        f'fill="#636efa" fill-opacity="0.25" stroke="#636efa" stroke-width="2"/>')
+
+        for name, angle in zip(theta_values, angles):
+            x, y = center_x + (radius + 8) * math.cos(angle), center_y - (radius + 8) * math.sin(angle)
+            anchor = "start" if math.cos(angle) > 0.1 else "end" if math.cos(angle) < -0.1 else "middle"
+            baseline = "auto" if math.sin(angle) > 0.1 else "hanging" if math.sin(angle) < -0.1 else "middle"
+            elements.append(f'<text x="{x:.1f}" y="{y:.1f}" text-anchor="{anchor}" dominant-baseline="{baseline}" '
+                            f'font-family="sans-serif" font-size="13" fill="#444">{html.escape(str(name))}</text>')
+
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+                + "".join(elements) + "</svg>")
+
+# The radar charts shared by all sessions of the process
+shared_radar_chart_renderer = RadarChartRenderer()
@@ -0,0 +1,282 @@
+import contextlib
+import numpy as np
+import pandas as pd
+from model.frame_filter import FrameFilter
+from model.search_index import SearchIndex
+from model.shared_resources import SharedResources
+
+class RecommendationService:
+    """Represents the UI independent recommendation service (recommendations, filters and search over the shared resources).
+       The methods do not keep any state of a caller and only read the shared resources, so they can be called
+       concurrently by the worker threads of a server. Results are returned as row positions of the catalogue (see get_tracks()).
+    """
+    FEATURE_ATTRIBUTES = ['danceability', 'valence', 'instrumentalness', 'energy']
+    TRACK_ATTRIBUTES = ['id', 'name', 'artists_name', 'track_genre', 'danceability', 'valence', 'instrumentalness', 'energy']
+    RESTRICTIONS = ["label", "genre", "none"]
+
+    def __init__(self, resources: SharedResources, label_calculator, recommendation_cache, genre_attribute: str = "track_genre", instrumentation=None):
+        """Represents the constructor.
+        Args:
+            resources (SharedResources): The shared resources.
+            label_calculator (LabelCalculator): The label calculator (packs the predicted labels).
+            recommendation_cache (RecommendationCache): The cache of the label recommendations (e.g. the shared_recommendation_cache).
+            genre_attribute (str, optional): The name of the genre attribute. Defaults to "track_genre".
+            instrumentation (Instrumentation, optional): The instrumentation timing the stages (e.g. the shared_instrumentation). Defaults to None.
+        Raises:
+            TypeError: Is thrown if resources is not SharedResources.
+            TypeError: Is thrown if genre_attribute is not a str.
+        """
+        if type(resources) != SharedResources:
+            raise TypeError("resources must be SharedResources!")
+        if type(genre_attribute) != str:
+            raise TypeError("genre_attribute must be a str!")
+
+        self.__resources = resources
+        self.__label_calculator = label_calculator
+        self.__recommendation_cache = recommendation_cache
+        self.__genre_attribute = genre_attribute
+        self.__instrumentation = instrumentation
+
+    def get_resources(self) -> SharedResources:
+        """Returns the shared resources.
+        Returns:
+            SharedResources: The resources.
+        """
+        return self.__resources
+
+    def predict_packed_labels(self, track_ids: list) -> dict:
+        """Predicts the packed labels (see LabelCalculator.pack_label()) of several tracks by one predict() call.
+        Args:
+            track_ids (list): The track IDs.
+        Raises:
+            TypeError: Is thrown if track_ids is not a list.
+        Returns:
+            dict: The mapping track ID -> packed label (unknown track IDs are left out).
+        """
+        if type(track_ids) != list:
+            raise TypeError("track_ids must be a list!")
+
+        catalogue = self.__resources.get_catalogue()
+        known_ids = []
+        rows = []
+
+        for track_id in dict.fromkeys(track_ids):
+            track_rows = catalogue.get_rows(track_id) if type(track_id) == str else []
+
+            if len(track_rows) > 0:
+                known_ids.append(track_id)
+                rows.append(int(track_rows[0]))
+
+        if len(rows) == 0:
+            return {}
+
+        features = catalogue.take(np.array(rows, dtype=np.int64), self.FEATURE_ATTRIBUTES).reset_index(drop=True)
+
+        with self.__span("knn_predict"):
+            labels = np.asarray(self.__resources.get_knn_classifier().predict(features))
+
+        packed_labels = self.__label_calculator.pack_labels(labels)
+        return {track_id: int(packed_label) for track_id, packed_label in zip(known_ids, packed_labels)}
+
+    def get_label_rows(self, packed_label: int, criterion_min_max_tuples: list = None, genre_key: str = "all") -> np.ndarray:
+        """Returns the rows of the tracks with the given label matching the criteria and the genre (cached, see RecommendationCache).
+        Args:
+            packed_label (int): The packed label.
+            criterion_min_max_tuples (list, optional): List of the range filter tuples (e.g. [("danceability", (0, 0.5)) ,...]). Defaults to None (no range filter).
+            genre_key (str, optional): The genre value ("all" disables the genre filter). Defaults to "all".
+        Raises:
+            TypeError: Is thrown if packed_label is not an int.
+            TypeError: Is thrown if criterion_min_max_tuples is neither a list nor None.
+            TypeError: Is thrown if genre_key is not a str.
+        Returns:
+            np.ndarray: The ascending (read-only) row positions.
+        """
+        if not(isinstance(packed_label, (int, np.integer))):
+            raise TypeError("packed_label must be an int!")
+        if criterion_min_max_tuples is not None and type(criterion_min_max_tuples) != list:
+            raise TypeError("criterion_min_max_tuples must be either a list or None!")
+        if type(genre_key) != str:
+            raise TypeError("genre_key must be a str!")
+
+        criterion_min_max_tuples = [] if criterion_min_max_tuples is None else criterion_min_max_tuples
+        catalogue = self.__resources.get_catalogue()
+        self.__recommendation_cache.set_source(catalogue.get_fingerprint())
+        key = (int(packed_label), genre_key, tuple((name, tuple(min_max)) for name, min_max in criterion_min_max_tuples))
+
+        def compute_rows() -> np.ndarray:
+            with self.__span("label_rows"):
+                rows = self.__resources.get_label_index().get_rows_by_packed_label(int(packed_label))
+                return self.__filter_rows(rows, criterion_min_max_tuples, genre_key)
+
+        return self.__recommendation_cache.get_or_compute(key, compute_rows)
+
+    def get_nearest_rows(self, track_id: str, k: int, restriction: str = "none", packed_label: int = None) -> np.ndarray:
+        """Returns the rows of the k tracks nearest to a track (ranked by the distance, the track itself is left out).
+        Args:
+            track_id (str): The track ID.
+            k (int): The number of tracks.
+            restriction (str, optional): "label" (tracks with the predicted label), "genre" (tracks of the same genre) or "none". Defaults to "none".
+            packed_label (int, optional): The already predicted packed label of the track (used for the "label" restriction). Defaults to None (= predicted here).
+        Raises:
+            TypeError: Is thrown if track_id is not a str.
+            TypeError: Is thrown if k is not an int.
+            ValueError: Is thrown if restriction is invalid.
+            KeyError: Is thrown if the track ID is unknown.
+        Returns:
+            np.ndarray: The row positions (ranked by the distance).
+        """
+        if type(track_id) != str:
+            raise TypeError("track_id must be a str!")
+        if type(k) != int:
+            raise TypeError("k must be an int!")
+        if restriction not in self.RESTRICTIONS:
+            raise ValueError("restriction must be either label, genre or none!")
+
+        catalogue = self.__resources.get_catalogue()
+        nearest_neighbour_recommender = self.__resources.get_nearest_neighbour_recommender()
+        track_rows = catalogue.get_rows(track_id)
+
+        if len(track_rows) == 0:
+            raise KeyError(f"Unknown track ID {track_id}!")
+
+        features = nearest_neighbour_recommender.get_features(int(track_rows[0]))
+        candidate_rows = None
+
+        if restriction == "label":
+            packed_label = self.predict_packed_labels([track_id])[track_id] if packed_label is None else packed_label
+            candidate_rows = self.__resources.get_label_index().get_rows_by_packed_label(int(packed_label))
+        elif restriction == "genre":
+            genre = catalogue.take(track_rows[:1], [self.__genre_attribute])[self.__genre_attribute].iloc[0]
+            candidate_rows = nearest_neighbour_recommender.get_genre_rows(str(genre))
+
+        rows, _ = nearest_neighbour_recommender.get_nearest_rows(features, k, candidate_rows, track_rows)
+        return rows
+
+    def get_filtered_rows(self, criterion_min_max_tuples: list = None, genre_key: str = "all", search_value: str = "", rows: np.ndarray = None) -> np.ndarray:
+        """Returns the rows matching the criteria, the genre and the search value.
+        Args:
+            criterion_min_max_tuples (list, optional): List of the range filter tuples. Defaults to None (no range filter).
+            genre_key (str, optional): The genre value ("all" disables the genre filter). Defaults to "all".
+            search_value (str, optional): The search value ("" disables the search). Defaults to "".
+            rows (np.ndarray, optional): The row positions the result is restricted to (their order is kept). Defaults to None (all rows).
+        Raises:
+            TypeError: Is thrown if criterion_min_max_tuples is neither a list nor None.
+            TypeError: Is thrown if genre_key is not a str.
+            TypeError: Is thrown if search_value is not a str.
+            TypeError: Is thrown if rows is neither a np.ndarray nor None.
+        Returns:
+            np.ndarray: The row positions.
+        """
+        if criterion_min_max_tuples is not None and type(criterion_min_max_tuples) != list:
+            raise TypeError("criterion_min_max_tuples must be either a list or None!")
+        if type(genre_key) != str:
+            raise TypeError("genre_key must be a str!")
+        if type(search_value) != str:
+            raise TypeError("search_value must be a str!")
+        if rows is not None and type(rows) != np.ndarray:
+            raise TypeError("rows must be either a np.ndarray or None!")
+
+        catalogue = self.__resources.get_catalogue()
+        result = self.__filter_rows(catalogue.get_all_rows() if rows is None else np.sort(rows),
+                                    [] if criterion_min_max_tuples is None else criterion_min_max_tuples, genre_key)
+
+        if search_value != "":
+            result = self.__search_rows(result, search_value)
+        if rows is not None:
+            result = catalogue.intersect(rows, result)
+        return result
+
+    def get_tracks(self, rows: np.ndarray, offset: int = 0, limit: int = 50) -> list:
+        """Returns the attributes (see TRACK_ATTRIBUTES) of the rows [offset:offset + limit].
+        Args:
+            rows (np.ndarray): The row positions.
+            offset (int, optional): The first row (inclusive). Defaults to 0.
+            limit (int, optional): The maximum number of tracks. Defaults to 50.
+        Raises:
+            TypeError: Is thrown if rows is not a np.ndarray.
+            TypeError: Is thrown if offset is not an int.
+            TypeError: Is thrown if limit is not an int.
+            ValueError: Is thrown if offset or limit is negative.
+        Returns:
+            list: The list of track dictionaries (only containing JSON compatible values).
+        """
+        if type(rows) != np.ndarray:
+            raise TypeError("rows must be a np.ndarray!")
+        if type(offset) != int:
+            raise TypeError("offset must be an int!")
+        if type(limit) != int:
+            raise TypeError("limit must be an int!")
+        if offset < 0 or limit < 0:
+            raise ValueError("offset and limit cannot be negative!")
+
+        catalogue = self.__resources.get_catalogue()
+        attributes = [attribute for attribute in self.TRACK_ATTRIBUTES if attribute in catalogue.get_frame().columns]
+        page = catalogue.take(rows[offset:offset + limit], attributes)
+        return [{attribute: self.__to_json_value(value) for attribute, value in zip(attributes, values)}
+                for values in page.itertuples(index=False, name=None)]
+
+    def __filter_rows(self, rows: np.ndarray, criterion_min_max_tuples: list, genre_key: str) -> np.ndarray:
+        """Applies the range filters and the genre filter to the given rows.
+        Args:
+            rows (np.ndarray): The ascending row positions.
+            criterion_min_max_tuples (list): List of the range filter tuples.
+            genre_key (str): The genre value ("all" disables the genre filter).
+        Returns:
+            np.ndarray: The ascending row positions.
+        """
+        equality_tuples = [] if genre_key == "all" else [(self.__genre_attribute, genre_key)]
+
+        if len(criterion_min_max_tuples) == 0 and len(equality_tuples) == 0:
+            return rows
+
+        columns = list(dict.fromkeys([name for name, _ in criterion_min_max_tuples] + [name for name, _ in equality_tuples]))
+        frame = self.__resources.get_catalogue().take(rows, columns)
+        return rows[FrameFilter.get_filtered_positions(frame, criterion_min_max_tuples, equality_tuples)]
+
+    def __search_rows(self, rows: np.ndarray, search_value: str) -> np.ndarray:
+        """Returns the rows whose track name or one of whose artists contains the search value.
+        Args:
+            rows (np.ndarray): The ascending row positions.
+            search_value (str): The search value.
+        Returns:
+            np.ndarray: The ascending row positions.
+        """
+        search_index = self.__resources.get_search_index()
+
+        if search_index is not None:
+            return search_index.search(search_value, rows)
+
+        normalized = SearchIndex.normalize(search_value)
+        frame = self.__resources.get_catalogue().take(rows, ["artists_name", "name"])
+        matches = [normalized in SearchIndex.normalize(name) or
+                   (isinstance(artists, (list, tuple, np.ndarray)) and any(normalized in SearchIndex.normalize(artist) for artist in artists))
+                   for artists, name in frame.itertuples(index=False, name=None)]
+        return rows[np.array(matches, dtype=bool)] if len(matches) > 0 else rows
+
+    def __to_json_value(self, value):
+        """Converts a value of the frame into a JSON compatible value.
+        Args:
+            value: The value.
+        Returns:
+            The JSON compatible value (None for missing values).
+        """
+        if isinstance(value, (list, tuple, np.ndarray)):
+            return [self.__to_json_value(element) for element in value]
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, float) and not(np.isfinite(value)):
+            return None
+        if value is None or value is pd.NA or value is pd.NaT:
+            return None
+        return value
+
+    def __span(self, name: str):
+        """Returns the context manager timing a stage.
+        Args:
+            name (str): The name of the stage.
+        Returns:
+            The context manager (a no-op context manager without instrumentation).
+        """
+        if self.__instrumentation is None:
+            return contextlib.nullcontext()
+        return self.__instrumentation.span(name)
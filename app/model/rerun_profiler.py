@@ -0,0 +1,280 @@
+import io
+import os
+import re
+import time
+import random
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from pathlib import Path
+from datetime import datetime
+
+class RerunProfiler:
+    """Represents the opt-in profiler of single Streamlit reruns (cProfile and tracemalloc).
+       A rerun is profiled from the triggering callback (or the start of the script, see start()) to the end of the script (see finish()),
+       so the CPU time and the allocations can be attributed to one user action. Every profiled rerun is written as .pstats file
+       and as text report (the slowest functions and the top allocations) into a rotating directory, tagged by the callback.
+       Only one rerun of the process is profiled at a time (tracemalloc traces the whole process). A rerun that never reaches finish()
+       (e.g. because it raised an exception) does not block the profiler: its profile is discarded as soon as another rerun is started
+       and the thread of the rerun has ended or the profile is older than max_duration.
+       Whether a rerun is sampled is decided once by its first start() call and kept until finish(), so the reruns are profiled at the
+       sample rate and tagged by the first call (e.g. the callback) regardless of how often start() is called per rerun.
+    """
+    # Enables the profiling of all sessions if set to a value other than "" or "0" (otherwise only sessions opened with ?profile=1 are profiled)
+    ENVIRONMENT_VARIABLE = "RECOMMENDER_PROFILING"
+    # The share of the requested reruns that are profiled (e.g. 0.1)
+    SAMPLE_RATE_ENVIRONMENT_VARIABLE = "RECOMMENDER_PROFILING_SAMPLE_RATE"
+    QUERY_PARAMETER = "profile"
+
+    __instance = None
+    __instance_lock = threading.Lock()
+
+    def __init__(self, output_path: Path, sample_rate: float = 1.0, max_reports: int = 50, report_size: int = 30, traceback_limit: int = 10,
+                 max_duration: float = 300.0):
+        """Represents the constructor.
+        Args:
+            output_path (Path): The directory of the reports.
+            sample_rate (float, optional): The share of the requested reruns that are profiled. Defaults to 1.0.
+            max_reports (int, optional): The number of kept reports (the oldest ones are deleted). Defaults to 50.
+            report_size (int, optional): The number of functions and allocation sites listed in a text report. Defaults to 30.
+            traceback_limit (int, optional): The number of frames stored per allocation by tracemalloc. Defaults to 10.
+            max_duration (float, optional): The number of seconds after which an unfinished profile is considered stale. Defaults to 300.0.
+        Raises:
+            TypeError: Is thrown if sample_rate or max_duration is neither an int nor a float.
+            TypeError: Is thrown if max_reports, report_size or traceback_limit is not an int.
+            ValueError: Is thrown if sample_rate is not between 0 and 1.
+            ValueError: Is thrown if max_reports, report_size or traceback_limit is less than 1.
+            ValueError: Is thrown if max_duration is not positive.
+        """
+        if not(type(sample_rate) == int or type(sample_rate) == float):
+            raise TypeError("sample_rate must be either int or float!")
+        if not(type(max_duration) == int or type(max_duration) == float):
+            raise TypeError("max_duration must be either int or float!")
+        if type(max_reports) != int or type(report_size) != int or type(traceback_limit) != int:
+            raise TypeError("max_reports, report_size and traceback_limit must be of type int!")
+        if not(0 <= sample_rate <= 1):
+            raise ValueError("sample_rate must be between 0 and 1!")
+        if max_reports < 1 or report_size < 1 or traceback_limit < 1:
+            raise ValueError("max_reports, report_size and traceback_limit must be at least 1!")
+        if max_duration <= 0:
+            raise ValueError("max_duration must be positive!")
+
+        self.__output_path = Path(output_path)
+        self.__sample_rate = sample_rate
+        self.__max_reports = max_reports
+        self.__report_size = report_size
+        self.__traceback_limit = traceback_limit
+        self.__max_duration = max_duration
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        # The profiled rerun of the process (owner thread, start time, whether tracemalloc was started for it, profile), None if there is none
+        self.__owner = None
+
+    @classmethod
+    def get_instance(cls, factory) -> "RerunProfiler":
+        """Returns the profiler of the process (created by the factory on the first call, it outlives the reruns of the script).
+        Args:
+            factory: The function creating the profiler () -> RerunProfiler.
+        Raises:
+            TypeError: Is thrown if factory is not callable.
+            TypeError: Is thrown if the factory does not return a RerunProfiler.
+        Returns:
+            RerunProfiler: The profiler.
+        """
+        if not(callable(factory)):
+            raise TypeError("factory must be callable!")
+
+        if cls.__instance is None:
+            with cls.__instance_lock:
+                if cls.__instance is None:
+                    instance = factory()
+
+                    if type(instance) != RerunProfiler:
+                        raise TypeError("factory must return a RerunProfiler!")
+                    cls.__instance = instance
+        return cls.__instance
+
+    @staticmethod
+    def is_requested(query_parameter_value: str = None) -> bool:
+        """Checks whether the reruns of a session should be profiled (environment variable or query parameter).
+        Args:
+            query_parameter_value (str, optional): The value of the query parameter "profile" of the session. Defaults to None.
+        Returns:
+            bool: True if requested.
+        """
+        return os.environ.get(RerunProfiler.ENVIRONMENT_VARIABLE, "") not in ("", "0") or query_parameter_value not in (None, "", "0")
+
+    def is_active(self) -> bool:
+        """Checks whether the rerun of the current thread is profiled.
+        Returns:
+            bool: True if active.
+        """
+        return getattr(self.__local, "owner", None) is not None and self.__local.owner is self.__owner
+
+    def start(self, tag: str) -> bool:
+        """Starts profiling the rerun of the current thread (nothing happens if it is already profiled, if it is not sampled
+           or if a rerun of another session is profiled). A stale profile (see the class description) is discarded first.
+           The sampling decision and the tag of the first call of a rerun are reused by the further calls until finish().
+        Args:
+            tag (str): The tag of the rerun (e.g. the name of the triggering callback).
+        Raises:
+            TypeError: Is thrown if tag is not a str.
+        Returns:
+            bool: True if the profiling was started.
+        """
+        if type(tag) != str:
+            raise TypeError("tag must be a str!")
+        if self.is_active():
+            if not(self.__is_stale(self.__owner)):
+                return False
+            # The stale profile belongs to an earlier rerun of this thread, so the current rerun is sampled anew
+            self.__local.sampling = None
+
+        # The profile of an earlier rerun of this thread that was discarded or never finished
+        self.__discard_local_profile()
+
+        if getattr(self.__local, "sampling", None) is None:
+            self.__local.sampling = (random.random() < self.__sample_rate, tag)
+
+        sampled, tag = self.__local.sampling
+
+        if not(sampled):
+            return False
+
+        with self.__lock:
+            if self.__owner is not None:
+                if not(self.__is_stale(self.__owner)):
+                    return False
+                self.__release_owner()
+
+            profile = cProfile.Profile()
+
+            try:
+                # Fails if another profiler (e.g. a debugger) is active
+                profile.enable()
+            except ValueError:
+                return False
+
+            started_tracemalloc = not(tracemalloc.is_tracing())
+
+            if started_tracemalloc:
+                tracemalloc.start(self.__traceback_limit)
+
+            tracemalloc.reset_peak()
+            start_time = time.perf_counter()
+            self.__owner = (threading.current_thread(), start_time, started_tracemalloc, profile)
+
+        self.__local.owner = self.__owner
+        self.__local.profile = profile
+        self.__local.tag = tag
+        self.__local.start_time = start_time
+        self.__local.start_snapshot = None if started_tracemalloc else tracemalloc.take_snapshot()
+        return True
+
+    def finish(self) -> Path:
+        """Stops profiling the rerun of the current thread and writes its reports (an interrupted rerun is reported together with the following one).
+        Returns:
+            Path: The path of the text report (None if the rerun was not profiled or its profile was discarded as stale).
+        """
+        self.__local.sampling = None
+
+        if not(self.is_active()):
+            self.__discard_local_profile()
+            return None
+
+        local = self.__local
+        profile = local.profile
+        profile.disable()
+        duration = time.perf_counter() - local.start_time
+
+        with self.__lock:
+            # The profile may have been discarded by another thread in the meantime
+            if local.owner is not self.__owner:
+                local.owner, local.profile, local.start_snapshot = None, None, None
+                return None
+
+            try:
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                self.__release_owner()
+                local.owner, local.profile = None, None
+
+        try:
+            return self.__write_reports(profile, local.tag, duration, peak, snapshot, local.start_snapshot)
+        finally:
+            local.start_snapshot = None
+
+    def __is_stale(self, owner: tuple) -> bool:
+        """Checks whether the profiled rerun will not be finished (its thread has ended or it is older than max_duration).
+        Args:
+            owner (tuple): The owner thread, start time, tracemalloc flag and profile of the profiled rerun.
+        Returns:
+            bool: True if stale.
+        """
+        thread, start_time, _, _ = owner
+        return not(thread.is_alive()) or time.perf_counter() - start_time > self.__max_duration
+
+    def __release_owner(self):
+        """Releases the profiled rerun of the process (stops its profile and tracemalloc if it was started for it), the lock must be held."""
+        if self.__owner is None:
+            return
+
+        # The profile of a stale rerun is still enabled (the profilers of Python 3.12+ are process-wide and would block a new profile)
+        self.__owner[3].disable()
+
+        if self.__owner[2] and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+        self.__owner = None
+
+    def __discard_local_profile(self):
+        """Stops the profile of the current thread that is no longer (or not yet) reported, e.g. the discarded profile of an interrupted rerun."""
+        local = self.__local
+
+        if getattr(local, "profile", None) is not None:
+            local.profile.disable()
+
+            with self.__lock:
+                if local.owner is self.__owner:
+                    self.__release_owner()
+
+        local.owner, local.profile, local.start_snapshot = None, None, None
+
+    def __write_reports(self, profile: cProfile.Profile, tag: str, duration: float, peak: int, snapshot, start_snapshot) -> Path:
+        """Writes the .pstats file and the text report of a rerun and deletes the oldest reports.
+        Args:
+            profile (cProfile.Profile): The stopped profile.
+            tag (str): The tag of the rerun.
+            duration (float): The duration in seconds.
+            peak (int): The peak of the traced memory in bytes.
+            snapshot (tracemalloc.Snapshot): The snapshot at the end of the rerun.
+            start_snapshot (tracemalloc.Snapshot): The snapshot at the start of the rerun (None if tracemalloc was started for the rerun).
+        Returns:
+            Path: The path of the text report.
+        """
+        self.__output_path.mkdir(parents=True, exist_ok=True)
+        # The names start with the time stamp, so they are sorted chronologically (see __rotate())
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{re.sub(r'[^a-zA-Z0-9_-]', '_', tag)}"
+        profile.dump_stats(self.__output_path.joinpath(f"{name}.pstats"))
+
+        stream = io.StringIO()
+        stream.write(f"Rerun: {tag}\nDuration: {duration * 1000:.1f} ms\nPeak of the traced memory: {peak / 2**20:.2f} MiB\n\n")
+        pstats.Stats(profile, stream=stream).strip_dirs().sort_stats("cumulative").print_stats(self.__report_size)
+        stream.write("Top allocations (size of the memory still allocated at the end of the rerun):\n")
+        statistics = snapshot.compare_to(start_snapshot, "lineno") if start_snapshot is not None else snapshot.statistics("lineno")
+
+        for statistic in statistics[:self.__report_size]:
+            stream.write(f"{statistic}\n")
+
+        report_path = self.__output_path.joinpath(f"{name}.txt")
+        report_path.write_text(stream.getvalue())
+        self.__rotate()
+        return report_path
+
+    def __rotate(self):
+        """Deletes the oldest reports (all but the last max_reports ones)."""
+        for path in sorted(self.__output_path.glob("*.pstats"))[:-self.__max_reports]:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".txt").unlink(missing_ok=True)
@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+
+class SearchIndex:
+    """Represents the substring search index for the artist and track names.
+       The names are normalized once (lower case, spaces removed) and concatenated into one UTF-8 buffer per attribute
+       (every name is terminated by a separator byte, so a match cannot span two names).
+       A query is answered by the bigram postings of the buffer, verified byte by byte on the candidates
+       and mapped back to row positions by the row offsets.
+    """
+    SEPARATOR = "\x00"
+    # Below this number of candidate rows, the candidates are checked one by one instead of querying the whole buffer
+    CANDIDATES_SCAN_LIMIT = 2048
+
+    def __init__(self, input_frame: pd.DataFrame, artists_name_attribute: str = "artists_name", track_name_attribute: str = "name"):
+        """Represents the constructor (builds the index).
+        Args:
+            input_frame (pd.DataFrame): The input data frame.
+            artists_name_attribute (str, optional): The name of the artists name attribute (lists of names). Defaults to "artists_name".
+            track_name_attribute (str, optional): The name of the track name attribute. Defaults to "name".
+        Raises:
+            TypeError: Is thrown if input_frame is not a pd.DataFrame.
+            TypeError: Is thrown if artists_name_attribute is not a str.
+            TypeError: Is thrown if track_name_attribute is not a str.
+            ValueError: Is thrown if the index of input_frame is not unique.
+        """
+        if type(input_frame) != pd.DataFrame:
+            raise TypeError("input_frame must be a pd.DataFrame!")
+        if type(artists_name_attribute) != str:
+            raise TypeError("artists_name_attribute must be a str!")
+        if type(track_name_attribute) != str:
+            raise TypeError("track_name_attribute must be a str!")
+        if not(input_frame.index.is_unique):
+            raise ValueError("The index of input_frame must be unique!")
+
+        self.__row_count = len(input_frame)
+        self.__index_labels = input_frame.index
+        self.__track_names = self.__build_buffer([[track_name] for track_name in input_frame[track_name_attribute]])
+        self.__artists = self.__build_buffer([artists_list if isinstance(artists_list, (list, tuple, np.ndarray)) else []
+                                              for artists_list in input_frame[artists_name_attribute]])
+
+    def __len__(self) -> int:
+        """Returns the number of rows of the indexed frame.
+        Returns:
+            int: The number of rows.
+        """
+        return self.__row_count
+
+    @staticmethod
+    def normalize(value: str) -> str:
+        """Normalizes a name or a search string (lower case, spaces removed).
+        Args:
+            value (str): The name or the search string.
+        Returns:
+            str: The normalized value.
+        """
+        return str(value).lower().replace(" ", "").replace(SearchIndex.SEPARATOR, "")
+
+    def search_artists(self, search_str: str, candidates: np.ndarray = None) -> np.ndarray:
+        """Returns the row positions of the tracks having an artist containing the search string.
+        Args:
+            search_str (str): The search string.
+            candidates (np.ndarray, optional): Ascending row positions the search is restricted to (e.g. the result of a shorter search string). Defaults to None.
+        Raises:
+            TypeError: Is thrown if search_str is not a str.
+            TypeError: Is thrown if candidates is neither a np.ndarray nor None.
+        Returns:
+            np.ndarray: The ascending row positions.
+        """
+        return self.__search(self.__artists, search_str, candidates)
+
+    def search_track_names(self, search_str: str, candidates: np.ndarray = None) -> np.ndarray:
+        """Returns the row positions of the tracks whose name contains the search string.
+        Args:
+            search_str (str): The search string.
+            candidates (np.ndarray, optional): Ascending row positions the search is restricted to (e.g. the result of a shorter search string). Defaults to None.
+        Raises:
+            TypeError: Is thrown if search_str is not a str.
+            TypeError: Is thrown if candidates is neither a np.ndarray nor None.
+        Returns:
+            np.ndarray: The ascending row positions.
+        """
+        return self.__search(self.__track_names, search_str, candidates)
+
+    def search(self, search_str: str, candidates: np.ndarray = None) -> np.ndarray:
+        """Returns the row positions of the tracks whose name or one of whose artists contains the search string.
+        Args:
+            search_str (str): The search string.
+            candidates (np.ndarray, optional): Ascending row positions the search is restricted to. Defaults to None.
+        Raises:
+            TypeError: Is thrown if search_str is not a str.
+            TypeError: Is thrown if candidates is neither a np.ndarray nor None.
+        Returns:
+            np.ndarray: The ascending row positions.
+        """
+        return np.union1d(self.search_artists(search_str, candidates), self.search_track_names(search_str, candidates))
+
+    def filter_frame(self, input_frame: pd.DataFrame, positions: np.ndarray) -> pd.DataFrame:
+        """Filters a frame (the indexed frame or a subframe of it) to the rows at the given positions of the indexed frame.
+        Args:
+            input_frame (pd.DataFrame): The input data frame.
+            positions (np.ndarray): The row positions in the indexed frame.
+        Raises:
+            TypeError: Is thrown if input_frame is not a pd.DataFrame.
+            TypeError: Is thrown if positions is not a np.ndarray.
+        Returns:
+            pd.DataFrame: The filtered data frame (in the order of input_frame).
+        """
+        if type(input_frame) != pd.DataFrame:
+            raise TypeError("input_frame must be a pd.DataFrame!")
+        if type(positions) != np.ndarray:
+            raise TypeError("positions must be a np.ndarray!")
+
+        return input_frame[input_frame.index.isin(self.__index_labels[positions])]
+
+    def __build_buffer(self, rows: list) -> dict:
+        """Builds the normalized buffer of one attribute.
+        Args:
+            rows (list): The list of names per row.
+        Returns:
+            dict: The buffer (bytes, uint8 view, row offsets, entry counts and bigram postings).
+        """
+        entries = []
+        row_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        entry_counts = np.zeros(len(rows), dtype=np.int64)
+        length = 0
+
+        for row, names in enumerate(rows):
+            row_entries = [self.normalize(name).encode("utf-8") + b"\x00" for name in names]
+            entries.extend(row_entries)
+            entry_counts[row] = len(row_entries)
+            length += sum(len(entry) for entry in row_entries)
+            row_offsets[row + 1] = length
+
+        data = b"".join(entries)
+        array = np.frombuffer(data, dtype=np.uint8)
+        bigrams = (array[:-1].astype(np.uint16) << 8) | array[1:] if len(array) > 1 else np.zeros(0, dtype=np.uint16)
+        bigram_postings = np.argsort(bigrams, kind="stable").astype(np.int64 if len(array) > np.iinfo(np.int32).max else np.int32)
+        bigram_offsets = np.zeros(65536 + 1, dtype=np.int64)
+        np.cumsum(np.bincount(bigrams, minlength=65536), out=bigram_offsets[1:])
+        return {"data": data, "array": array, "row_offsets": row_offsets, "entry_counts": entry_counts,
+                "bigram_postings": bigram_postings, "bigram_offsets": bigram_offsets}
+
+    def __search(self, buffer: dict, search_str: str, candidates: np.ndarray) -> np.ndarray:
+        """Searches one buffer.
+        Args:
+            buffer (dict): The buffer built by __build_buffer().
+            search_str (str): The search string.
+            candidates (np.ndarray): Ascending row positions the search is restricted to (or None).
+        Raises:
+            TypeError: Is thrown if search_str is not a str.
+            TypeError: Is thrown if candidates is neither a np.ndarray nor None.
+        Returns:
+            np.ndarray: The ascending row positions.
+        """
+        if type(search_str) != str:
+            raise TypeError("search_str must be a str!")
+        if candidates is not None and type(candidates) != np.ndarray:
+            raise TypeError("candidates must be either a np.ndarray or None!")
+
+        query = self.normalize(search_str).encode("utf-8")
+
+        if len(query) == 0:
+            rows = np.flatnonzero(buffer["entry_counts"] > 0)
+            return rows if candidates is None else np.intersect1d(rows, candidates, assume_unique=True)
+
+        if candidates is not None and len(candidates) <= self.CANDIDATES_SCAN_LIMIT:
+            data = buffer["data"]
+            row_offsets = buffer["row_offsets"]
+            return np.array([row for row in candidates.tolist() if query in data[row_offsets[row]:row_offsets[row + 1]]], dtype=np.int64)
+
+        array = buffer["array"]
+        query_array = np.frombuffer(query, dtype=np.uint8)
+
+        if len(query) == 1:
+            positions = np.flatnonzero(array == query_array[0])
+        else:
+            # Start with the rarest bigram of the query and verify the remaining bytes on the candidates only
+            query_bigrams = (query_array[:-1].astype(np.int64) << 8) | query_array[1:]
+            bigram_offsets = buffer["bigram_offsets"]
+            counts = bigram_offsets[query_bigrams + 1] - bigram_offsets[query_bigrams]
+            rarest = int(np.argmin(counts))
+            bigram = query_bigrams[rarest]
+            positions = buffer["bigram_postings"][bigram_offsets[bigram]:bigram_offsets[bigram + 1]].astype(np.int64) - rarest
+            positions = positions[(positions >= 0) & (positions + len(query) <= len(array))]
+
+            for offset in range(len(query)):
+                if offset == rarest or offset == rarest + 1:
+                    continue
+                positions = positions[array[positions + offset] == query_array[offset]]
+
+        # The positions are ascending, so the rows are ascending as well and duplicates are adjacent
+        rows = np.searchsorted(buffer["row_offsets"], positions, side="right") - 1
+        rows = rows[np.concatenate([[True], rows[1:] != rows[:-1]])] if len(rows) > 0 else rows
+        return rows if candidates is None else np.intersect1d(rows, candidates, assume_unique=True)
@@ -0,0 +1,107 @@
+import threading
+import pandas as pd
+from model.catalogue import Catalogue
+from model.search_index import SearchIndex
+
+class SharedResources:
+    """Represents the read-only resources shared by all sessions of a process (the catalogue, the model and the indexes built for them).
+       The resources are built once per process (see get_instance()), a session only keeps its filter state and row positions,
+       so an additional session does not copy the catalogue or the model. Callers must not modify the resources.
+    """
+    __instance = None
+    __instance_lock = threading.Lock()
+
+    def __init__(self, catalogue: Catalogue, knn_classifier, label_index, nearest_neighbour_recommender, search_index: SearchIndex = None):
+        """Represents the constructor.
+        Args:
+            catalogue (Catalogue): The catalogue.
+            knn_classifier: The KNN classifier predicting the labels (e.g. a KNeighborsClassifier).
+            label_index (LabelIndex): The label index of the catalogue (see Recommender.build_label_index()).
+            nearest_neighbour_recommender (NearestNeighbourRecommender): The nearest neighbour recommender of the catalogue.
+            search_index (SearchIndex, optional): The search index of the catalogue. Defaults to None (the rows are scanned).
+        Raises:
+            TypeError: Is thrown if catalogue is not a Catalogue.
+            TypeError: Is thrown if knn_classifier does not provide predict().
+            TypeError: Is thrown if search_index is neither a SearchIndex nor None.
+            ValueError: Is thrown if label_index or nearest_neighbour_recommender was not built for the catalogue.
+        """
+        if type(catalogue) != Catalogue:
+            raise TypeError("catalogue must be a Catalogue!")
+        if not(callable(getattr(knn_classifier, "predict", None))):
+            raise TypeError("knn_classifier must provide predict()!")
+        if search_index is not None and type(search_index) != SearchIndex:
+            raise TypeError("search_index must be either a SearchIndex or None!")
+        if len(label_index) != len(catalogue) or len(nearest_neighbour_recommender) != len(catalogue):
+            raise ValueError("label_index and nearest_neighbour_recommender must be built for the catalogue!")
+
+        self.__catalogue = catalogue
+        self.__knn_classifier = knn_classifier
+        self.__label_index = label_index
+        self.__nearest_neighbour_recommender = nearest_neighbour_recommender
+        self.__search_index = search_index
+
+    @classmethod
+    def get_instance(cls, factory) -> "SharedResources":
+        """Returns the resources of the process (created by the factory on the first call, concurrent first calls wait for it).
+        Args:
+            factory: The function creating the resources () -> SharedResources.
+        Raises:
+            TypeError: Is thrown if factory is not callable.
+            TypeError: Is thrown if the factory does not return SharedResources.
+        Returns:
+            SharedResources: The resources.
+        """
+        if not(callable(factory)):
+            raise TypeError("factory must be callable!")
+
+        if cls.__instance is None:
+            with cls.__instance_lock:
+                if cls.__instance is None:
+                    instance = factory()
+
+                    if type(instance) != SharedResources:
+                        raise TypeError("factory must return SharedResources!")
+                    cls.__instance = instance
+        return cls.__instance
+
+    def get_catalogue(self) -> Catalogue:
+        """Returns the catalogue.
+        Returns:
+            Catalogue: The catalogue.
+        """
+        return self.__catalogue
+
+    def get_frame(self) -> pd.DataFrame:
+        """Returns the data frame of the catalogue.
+        Returns:
+            pd.DataFrame: The data frame.
+        """
+        return self.__catalogue.get_frame()
+
+    def get_knn_classifier(self):
+        """Returns the KNN classifier.
+        Returns:
+            The KNN classifier.
+        """
+        return self.__knn_classifier
+
+    def get_label_index(self):
+        """Returns the label index of the catalogue.
+        Returns:
+            LabelIndex: The label index.
+        """
+        return self.__label_index
+
+    def get_nearest_neighbour_recommender(self):
+        """Returns the nearest neighbour recommender of the catalogue.
+        Returns:
+            NearestNeighbourRecommender: The nearest neighbour recommender.
+        """
+        return self.__nearest_neighbour_recommender
+
+    def get_search_index(self) -> SearchIndex:
+        """Returns the search index of the catalogue.
+        Returns:
+            SearchIndex: The search index (None if the rows have to be scanned).
+        """
+        return self.__search_index
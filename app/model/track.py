@@ -1,6 +1,8 @@
 class Track:
     """Represents a track.
     """
+    __slots__ = ("id", "name", "danceability", "instrumentalness", "energy", "valence", "artists")
+    
     def __init__(self, id: str, name: str, danceability: float, instrumentalness: float, energy: float, valence: float, artists: str):
         """Represents the constructor.
         Args:
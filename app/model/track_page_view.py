@@ -0,0 +1,87 @@
+from collections import OrderedDict
+import numpy as np
+from model.catalogue import Catalogue
+
+class TrackPageView:
+    """Represents the lazily materialized, paged view of catalogue rows.
+       Only the rows of the requested page are taken from the catalogue and converted into Track objects,
+       the most recently viewed pages are kept in a small LRU cache.
+    """
+    def __init__(self, catalogue: Catalogue, rows: np.ndarray, track_factory, page_cache_size: int = 8):
+        """Represents the constructor.
+        Args:
+            catalogue (Catalogue): The catalogue.
+            rows (np.ndarray): The positions of the displayed rows (None for all rows, see Catalogue).
+            track_factory: The function converting a frame (the page) into a list of Track objects.
+            page_cache_size (int, optional): The number of pages kept in the cache. Defaults to 8.
+        Raises:
+            TypeError: Is thrown if catalogue is not a Catalogue.
+            TypeError: Is thrown if rows is neither a np.ndarray nor None.
+            TypeError: Is thrown if track_factory is not callable.
+            TypeError: Is thrown if page_cache_size is not an int.
+            ValueError: Is thrown if page_cache_size is less than 1.
+        """
+        if type(catalogue) != Catalogue:
+            raise TypeError("catalogue must be a Catalogue!")
+        if rows is not None and type(rows) != np.ndarray:
+            raise TypeError("rows must be either a np.ndarray or None!")
+        if not(callable(track_factory)):
+            raise TypeError("track_factory must be callable!")
+        if type(page_cache_size) != int:
+            raise TypeError("page_cache_size must be an int!")
+        if page_cache_size < 1:
+            raise ValueError("page_cache_size must be at least 1!")
+        
+        self.__catalogue = catalogue
+        self.__rows = rows
+        self.__track_factory = track_factory
+        self.__page_cache_size = page_cache_size
+        self.__pages = OrderedDict()
+        
+    def __len__(self) -> int:
+        """Returns the number of displayed rows.
+        Returns:
+            int: The number of rows.
+        """
+        return self.__catalogue.get_row_count(self.__rows)
+    
+    def is_view_of(self, rows: np.ndarray) -> bool:
+        """Checks whether this view was created for the given rows.
+        Args:
+            rows (np.ndarray): The row positions (None for all rows).
+        Returns:
+            bool: True if the view belongs to rows.
+        """
+        return self.__rows is rows
+        
+    def get_tracks(self, left: int, right: int) -> list:
+        """Returns the tracks of the rows [left:right].
+        Args:
+            left (int): The first row (inclusive).
+            right (int): The last row (exclusive).
+        Raises:
+            TypeError: Is thrown if left is not an int.
+            TypeError: Is thrown if right is not an int.
+            ValueError: Is thrown if left is negative.
+        Returns:
+            list: The list of Track objects.
+        """
+        if type(left) != int:
+            raise TypeError("left must be an int!")
+        if type(right) != int:
+            raise TypeError("right must be an int!")
+        if left < 0:
+            raise ValueError("left cannot be negative!")
+        
+        key = (left, right)
+        
+        if key in self.__pages:
+            self.__pages.move_to_end(key)
+            return self.__pages[key]
+        
+        tracks = self.__track_factory(self.__catalogue.take(self.__catalogue.get_slice(self.__rows, left, right)))
+        self.__pages[key] = tracks
+        
+        if len(self.__pages) > self.__page_cache_size:
+            self.__pages.popitem(last=False)
+        return tracks
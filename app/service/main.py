@@ -0,0 +1,60 @@
+import sys
+import os
+import pickle
+import asyncio
+import argparse
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'machine_learning_algorithm'))
+from machine_learning_algorithm.recommender import Recommender
+from machine_learning_algorithm.label_calculator import LabelCalculator
+from machine_learning_algorithm.recommendation_cache import shared_recommendation_cache
+from machine_learning_algorithm.model_artefact import ModelArtefact
+from machine_learning_algorithm.prediction_grid import PredictionGrid
+from config import Config
+from instrumentation import shared_instrumentation
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from model.catalogue import Catalogue
+from model.catalogue_store import CatalogueStore
+from model.search_index import SearchIndex
+from model.shared_resources import SharedResources
+from model.recommendation_service import RecommendationService
+from service.recommendation_server import RecommendationServer
+
+def create_shared_resources() -> SharedResources:
+    """Creates the resources shared by all requests (the catalogue, the model and their indexes).
+    Returns:
+        SharedResources: The resources.
+    """
+    config = Config()
+    recommender = Recommender()
+    data_frame = CatalogueStore.load(config.catalogue_store_path).to_frame() if CatalogueStore.exists(config.catalogue_store_path) \
+        else pickle.load(open(config.data_frame_path, "rb"))
+    search_index = SearchIndex(data_frame, "artists_name", "name") if data_frame.index.is_unique else None
+    # The model artefact is loaded without executing a pickle
+    model = ModelArtefact.load(config.model_artefact_path) if ModelArtefact.exists(config.model_artefact_path) else pickle.load(open(config.model_path, "rb"))
+    # The (approximate) prediction grid answers the predictions by a lookup and falls back to the model near the decision boundaries, if requested
+    model = PredictionGrid.load(config.prediction_grid_path, model) if PredictionGrid.is_requested() and PredictionGrid.exists(config.prediction_grid_path) else model
+    return SharedResources(Catalogue(data_frame, "id"), model, recommender.build_label_index(data_frame),
+                           recommender.build_nearest_neighbour_recommender(data_frame), search_index)
+
+def create_server(host: str, port: int, max_workers: int = None) -> RecommendationServer:
+    """Creates the recommendation server.
+    Args:
+        host (str): The host.
+        port (int): The port.
+        max_workers (int, optional): The number of worker threads. Defaults to None.
+    Returns:
+        RecommendationServer: The server.
+    """
+    resources = SharedResources.get_instance(create_shared_resources)
+    service = RecommendationService(resources, LabelCalculator(), shared_recommendation_cache, instrumentation=shared_instrumentation)
+    return RecommendationServer(service, shared_recommendation_cache, host, port, max_workers, instrumentation=shared_instrumentation)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless recommendation service (HTTP/JSON).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--workers", type=int, default=None)
+    arguments = parser.parse_args()
+    print(f"Serving on http://{arguments.host}:{arguments.port}")
+    asyncio.run(create_server(arguments.host, arguments.port, arguments.workers).serve_forever())
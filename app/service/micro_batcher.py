@@ -0,0 +1,107 @@
+import asyncio
+
+class MicroBatcher:
+    """Represents the micro batcher collecting concurrent requests into one call of a batch function.
+       A batch is dispatched to the executor as soon as it contains max_batch_size items or max_delay seconds after its first item,
+       so under load many requests share one call (e.g. one predict() call of the KNN classifier) while a single request waits at most max_delay.
+    """
+    def __init__(self, batch_function, executor, max_batch_size: int = 256, max_delay: float = 0.002):
+        """Represents the constructor.
+        Args:
+            batch_function: The function processing a batch (items: list) -> dict (item -> result, items without a result are resolved with None).
+            executor: The executor running the batch function (e.g. a ThreadPoolExecutor).
+            max_batch_size (int, optional): The maximum number of items of a batch. Defaults to 256.
+            max_delay (float, optional): The maximum number of seconds an item waits for further items. Defaults to 0.002.
+        Raises:
+            TypeError: Is thrown if batch_function is not callable.
+            TypeError: Is thrown if max_batch_size is not an int.
+            TypeError: Is thrown if max_delay is not a float.
+            ValueError: Is thrown if max_batch_size is less than 1.
+            ValueError: Is thrown if max_delay is negative.
+        """
+        if not(callable(batch_function)):
+            raise TypeError("batch_function must be callable!")
+        if type(max_batch_size) != int:
+            raise TypeError("max_batch_size must be an int!")
+        if type(max_delay) != float:
+            raise TypeError("max_delay must be a float!")
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1!")
+        if max_delay < 0:
+            raise ValueError("max_delay cannot be negative!")
+
+        self.__batch_function = batch_function
+        self.__executor = executor
+        self.__max_batch_size = max_batch_size
+        self.__max_delay = max_delay
+        self.__pending = []
+        self.__timer = None
+        # The running batches (the event loop only keeps weak references to its tasks)
+        self.__tasks = set()
+        self.__batch_count = 0
+        self.__item_count = 0
+        self.__largest_batch = 0
+
+    async def submit(self, item):
+        """Adds an item to the current batch and waits for its result.
+        Args:
+            item: The (hashable) item.
+        Returns:
+            The result of the item (None if the batch function did not return one).
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.__pending.append((item, future))
+
+        if len(self.__pending) >= self.__max_batch_size:
+            self.__flush()
+        elif self.__timer is None:
+            self.__timer = loop.call_later(self.__max_delay, self.__flush)
+        return await future
+
+    def get_statistics(self) -> dict:
+        """Returns the counters of the batcher.
+        Returns:
+            dict: The number of batches and items, the largest batch and the average batch size.
+        """
+        return {"batches": self.__batch_count, "items": self.__item_count, "largest_batch": self.__largest_batch,
+                "average_batch_size": self.__item_count / self.__batch_count if self.__batch_count > 0 else 0.0}
+
+    def __flush(self):
+        """Dispatches the pending items as one batch.
+        """
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+
+        batch = self.__pending
+        self.__pending = []
+
+        if len(batch) == 0:
+            return
+
+        self.__batch_count += 1
+        self.__item_count += len(batch)
+        self.__largest_batch = max(self.__largest_batch, len(batch))
+        task = asyncio.get_running_loop().create_task(self.__run(batch))
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+
+    async def __run(self, batch: list):
+        """Runs the batch function in the executor and resolves the futures of the batch.
+        Args:
+            batch (list): The list of (item, future) tuples.
+        """
+        items = list(dict.fromkeys(item for item, _ in batch))
+
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self.__executor, self.__batch_function, items)
+        except Exception as e:
+            for _, future in batch:
+                if not(future.done()):
+                    future.set_exception(e)
+            return
+
+        for item, future in batch:
+            if not(future.done()):
+                future.set_result(results.get(item))
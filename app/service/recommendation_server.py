@@ -0,0 +1,387 @@
+import time
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit
+import numpy as np
+from model.recommendation_service import RecommendationService
+from service.micro_batcher import MicroBatcher
+
+class RecommendationServer:
+    """Represents the headless HTTP/1.1 JSON server of the recommendation service (based on asyncio streams).
+       The event loop only parses the requests, the CPU bound work runs in a thread pool. Concurrent single track requests
+       are micro batched, so their labels are predicted by one predict() call (see MicroBatcher).
+
+       Endpoints:
+           GET  /health                   -> {"status", "tracks"}
+           GET  /statistics               -> the counters of the label batcher and the recommendation cache (and the instrumentation snapshot)
+           GET  /metrics                  -> the instrumentation metrics in the Prometheus text format
+           POST /recommendations          {"track_id", "k" (null = all tracks with the same label), "restriction", "criteria", "genre", "search", "offset", "limit"}
+           POST /recommendations/batch    {"track_ids", "criteria", "genre", "limit"} (all tracks with the same label)
+           POST /tracks                   {"criteria", "genre", "search", "offset", "limit"}
+       The criteria are passed as {"danceability": [0.2, 0.8], ...}.
+    """
+    MAX_BODY_SIZE = 1 << 20
+    MAX_LIMIT = 1000
+
+    def __init__(self, service: RecommendationService, recommendation_cache, host: str = "127.0.0.1", port: int = 8502, max_workers: int = None,
+                 max_batch_size: int = 256, max_batch_delay: float = 0.002, instrumentation=None):
+        """Represents the constructor.
+        Args:
+            service (RecommendationService): The recommendation service.
+            recommendation_cache (RecommendationCache): The recommendation cache of the service (only used for the statistics).
+            host (str, optional): The host. Defaults to "127.0.0.1".
+            port (int, optional): The port. Defaults to 8502.
+            max_workers (int, optional): The number of worker threads. Defaults to None (see ThreadPoolExecutor).
+            max_batch_size (int, optional): The maximum number of tracks whose labels are predicted together. Defaults to 256.
+            max_batch_delay (float, optional): The maximum number of seconds a request waits for further requests of its batch. Defaults to 0.002.
+            instrumentation (Instrumentation, optional): The instrumentation exported by GET /metrics (e.g. the shared_instrumentation). Defaults to None.
+        Raises:
+            TypeError: Is thrown if service is not a RecommendationService.
+            TypeError: Is thrown if host is not a str.
+            TypeError: Is thrown if port is not an int.
+        """
+        if type(service) != RecommendationService:
+            raise TypeError("service must be a RecommendationService!")
+        if type(host) != str:
+            raise TypeError("host must be a str!")
+        if type(port) != int:
+            raise TypeError("port must be an int!")
+
+        self.__service = service
+        self.__recommendation_cache = recommendation_cache
+        self.__instrumentation = instrumentation
+        self.__host = host
+        self.__port = port
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="recommendation-worker")
+        self.__label_batcher = MicroBatcher(service.predict_packed_labels, self.__executor, max_batch_size, max_batch_delay)
+        self.__routes = {
+            ("GET", "/health"): self.__get_health,
+            ("GET", "/statistics"): self.__get_statistics,
+            ("GET", "/metrics"): self.__get_metrics,
+            ("POST", "/recommendations"): self.__post_recommendations,
+            ("POST", "/recommendations/batch"): self.__post_batch_recommendations,
+            ("POST", "/tracks"): self.__post_tracks
+        }
+
+    async def start(self) -> asyncio.AbstractServer:
+        """Starts listening.
+        Returns:
+            asyncio.AbstractServer: The started server.
+        """
+        return await asyncio.start_server(self.__handle_connection, self.__host, self.__port)
+
+    async def serve_forever(self):
+        """Starts listening and serves until the task is cancelled.
+        """
+        server = await self.start()
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.__executor.shutdown(wait=False)
+
+    async def handle_request(self, method: str, path: str, body: bytes) -> tuple:
+        """Handles a request.
+        Args:
+            method (str): The HTTP method.
+            path (str): The path.
+            body (bytes): The body (a JSON object for POST requests).
+        Returns:
+            tuple: The HTTP status and the JSON compatible response (the text of GET /metrics).
+        """
+        if self.__instrumentation is None:
+            return await self.__handle_request(method, path, body)
+
+        start_time = time.perf_counter()
+        status, response = await self.__handle_request(method, path, body)
+        self.__instrumentation.increment(f"http_responses_{status.value}")
+        self.__instrumentation.observe("http_request_duration_seconds", time.perf_counter() - start_time)
+        return status, response
+
+    async def __handle_request(self, method: str, path: str, body: bytes) -> tuple:
+        """Dispatches a request to the handler of its route.
+        Args:
+            method (str): The HTTP method.
+            path (str): The path.
+            body (bytes): The body.
+        Returns:
+            tuple: The HTTP status and the response.
+        """
+        handler = self.__routes.get((method, path))
+
+        if handler is None:
+            if any(route_path == path for _, route_path in self.__routes.keys()):
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"{method} is not allowed for {path}!"}
+            return HTTPStatus.NOT_FOUND, {"error": f"Unknown path {path}!"}
+
+        try:
+            request = json.loads(body) if len(body) > 0 else {}
+
+            if type(request) != dict:
+                raise ValueError("The body must be a JSON object!")
+            return HTTPStatus.OK, await handler(request)
+        except KeyError as e:
+            return HTTPStatus.NOT_FOUND, {"error": str(e.args[0]) if len(e.args) > 0 else str(e)}
+        except (TypeError, ValueError) as e:
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+
+    async def __run(self, function, *args):
+        """Runs a CPU bound function in the thread pool.
+        Args:
+            function: The function.
+        Returns:
+            The result of the function.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.__executor, function, *args)
+
+    async def __get_health(self, request: dict) -> dict:
+        """Handles GET /health.
+        Args:
+            request (dict): The request.
+        Returns:
+            dict: The response.
+        """
+        return {"status": "ok", "tracks": len(self.__service.get_resources().get_catalogue())}
+
+    async def __get_statistics(self, request: dict) -> dict:
+        """Handles GET /statistics.
+        Args:
+            request (dict): The request.
+        Returns:
+            dict: The response.
+        """
+        statistics = {"label_batcher": self.__label_batcher.get_statistics(), "recommendation_cache": self.__recommendation_cache.get_statistics()}
+
+        if self.__instrumentation is not None:
+            statistics["instrumentation"] = self.__instrumentation.get_snapshot()
+        return statistics
+
+    async def __get_metrics(self, request: dict) -> str:
+        """Handles GET /metrics.
+        Args:
+            request (dict): The request.
+        Returns:
+            str: The metrics in the Prometheus text format.
+        """
+        lines = [f"# TYPE recommender_cache_{name}_total counter\nrecommender_cache_{name}_total {value}"
+                 for name, value in self.__recommendation_cache.get_statistics().items() if name in ["hits", "misses", "evictions"]]
+        return "\n".join(lines) + "\n" + (self.__instrumentation.to_prometheus() if self.__instrumentation is not None else "")
+
+    async def __post_recommendations(self, request: dict) -> dict:
+        """Handles POST /recommendations.
+        Args:
+            request (dict): The request.
+        Returns:
+            dict: The response.
+        """
+        track_id = self.__get_value(request, "track_id", str, None)
+        k = self.__get_value(request, "k", int, None)
+        restriction = self.__get_value(request, "restriction", str, "label" if k is None else "none")
+        criteria = self.__get_criteria(request)
+        genre = self.__get_value(request, "genre", str, "all")
+        search = self.__get_value(request, "search", str, "")
+
+        if track_id is None:
+            raise ValueError("track_id is missing!")
+
+        packed_label = None
+
+        if k is None or restriction == "label":
+            packed_label = await self.__label_batcher.submit(track_id)
+
+            if packed_label is None:
+                raise KeyError(f"Unknown track ID {track_id}!")
+
+        if k is None:
+            rows = await self.__run(self.__service.get_label_rows, packed_label, criteria, genre)
+
+            if search != "":
+                rows = await self.__run(self.__service.get_filtered_rows, None, "all", search, rows)
+        else:
+            rows = await self.__run(self.__service.get_nearest_rows, track_id, k, restriction, packed_label)
+            rows = await self.__run(self.__service.get_filtered_rows, criteria, genre, search, rows)
+        return await self.__get_page(request, rows, {"track_id": track_id})
+
+    async def __post_batch_recommendations(self, request: dict) -> dict:
+        """Handles POST /recommendations/batch.
+        Args:
+            request (dict): The request.
+        Returns:
+            dict: The response.
+        """
+        track_ids = self.__get_value(request, "track_ids", list, None)
+        criteria = self.__get_criteria(request)
+        genre = self.__get_value(request, "genre", str, "all")
+        limit = self.__get_limit(request)
+
+        if track_ids is None:
+            raise ValueError("track_ids is missing!")
+
+        packed_labels = await self.__run(self.__service.predict_packed_labels, track_ids)
+
+        def get_recommendations() -> dict:
+            rows_by_label = {packed_label: self.__service.get_label_rows(packed_label, criteria, genre) for packed_label in set(packed_labels.values())}
+            tracks_by_label = {packed_label: self.__service.get_tracks(rows, 0, limit) for packed_label, rows in rows_by_label.items()}
+            return {track_id: {"total": len(rows_by_label[packed_label]), "tracks": tracks_by_label[packed_label]}
+                    for track_id, packed_label in packed_labels.items()}
+
+        return {"recommendations": await self.__run(get_recommendations),
+                "unknown": [track_id for track_id in dict.fromkeys(track_ids) if track_id not in packed_labels]}
+
+    async def __post_tracks(self, request: dict) -> dict:
+        """Handles POST /tracks.
+        Args:
+            request (dict): The request.
+        Returns:
+            dict: The response.
+        """
+        criteria = self.__get_criteria(request)
+        genre = self.__get_value(request, "genre", str, "all")
+        search = self.__get_value(request, "search", str, "")
+        rows = await self.__run(self.__service.get_filtered_rows, criteria, genre, search)
+        return await self.__get_page(request, rows, {})
+
+    async def __get_page(self, request: dict, rows: np.ndarray, response: dict) -> dict:
+        """Adds the requested page of the rows to the response.
+        Args:
+            request (dict): The request (containing the optional offset and limit).
+            rows (np.ndarray): The row positions.
+            response (dict): The response.
+        Returns:
+            dict: The response.
+        """
+        offset = self.__get_value(request, "offset", int, 0)
+        limit = self.__get_limit(request)
+        response.update({"total": len(rows), "offset": offset, "tracks": await self.__run(self.__service.get_tracks, rows, offset, limit)})
+        return response
+
+    def __get_limit(self, request: dict) -> int:
+        """Returns the page size of a request.
+        Args:
+            request (dict): The request.
+        Raises:
+            ValueError: Is thrown if the limit exceeds MAX_LIMIT.
+        Returns:
+            int: The limit.
+        """
+        limit = self.__get_value(request, "limit", int, 50)
+
+        if limit > self.MAX_LIMIT:
+            raise ValueError(f"limit cannot exceed {self.MAX_LIMIT}!")
+        return limit
+
+    def __get_criteria(self, request: dict) -> list:
+        """Returns the range filter tuples of a request.
+        Args:
+            request (dict): The request.
+        Raises:
+            ValueError: Is thrown if a criterion is not a [min, max] pair of numbers.
+        Returns:
+            list: List of the range filter tuples (e.g. [("danceability", (0, 0.5)) ,...]).
+        """
+        criteria = self.__get_value(request, "criteria", dict, {})
+        result = []
+
+        for name, min_max in criteria.items():
+            if type(min_max) != list or len(min_max) != 2 or not(all(type(value) in [int, float] for value in min_max)):
+                raise ValueError(f"The criterion {name} must be a [min, max] pair of numbers!")
+            result.append((name, (min_max[0], min_max[1])))
+        return result
+
+    def __get_value(self, request: dict, key: str, value_type: type, default):
+        """Returns a value of a request.
+        Args:
+            request (dict): The request.
+            key (str): The key.
+            value_type (type): The expected type.
+            default: The value if the key is missing (or null).
+        Raises:
+            ValueError: Is thrown if the value is not of value_type.
+        Returns:
+            The value.
+        """
+        value = request.get(key)
+
+        if value is None:
+            return default
+        if type(value) != value_type:
+            raise ValueError(f"{key} must be of type {value_type.__name__}!")
+        return value
+
+    async def __handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves the requests of a connection (keep-alive is supported).
+        Args:
+            reader (asyncio.StreamReader): The reader of the connection.
+            writer (asyncio.StreamWriter): The writer of the connection.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+
+                if len(request_line) == 0:
+                    break
+
+                parts = request_line.decode("latin-1").split()
+                headers = {}
+
+                while True:
+                    line = await reader.readline()
+
+                    if line in [b"\r\n", b"\n", b""]:
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                if len(parts) != 3 or not(headers.get("content-length", "0").isdigit()):
+                    await self.__write_response(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request!"}, False)
+                    break
+
+                method, target, version = parts
+                content_length = int(headers.get("content-length", "0"))
+
+                if content_length > self.MAX_BODY_SIZE:
+                    await self.__write_response(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "The body is too large!"}, False)
+                    break
+
+                body = await reader.readexactly(content_length) if content_length > 0 else b""
+                status, response = await self.handle_request(method, urlsplit(target).path, body)
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+                await self.__write_response(writer, status, response, keep_alive)
+
+                if not(keep_alive):
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def __write_response(self, writer: asyncio.StreamWriter, status: HTTPStatus, response: dict, keep_alive: bool):
+        """Writes a JSON response (or a text response).
+        Args:
+            writer (asyncio.StreamWriter): The writer of the connection.
+            status (HTTPStatus): The HTTP status.
+            response (dict): The JSON compatible response (a str is sent as plain text).
+            keep_alive (bool): If True, the connection is kept open.
+        """
+        if type(response) == str:
+            body = response.encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = json.dumps(response).encode("utf-8")
+            content_type = "application/json"
+
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
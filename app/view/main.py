@@ -4,19 +4,33 @@ import streamlit as st
 import streamlit.components.v1 as components
 import pandas as pd
 import numpy as np
-import plotly.express as px
 import pickle
 import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'machine_learning_algorithm'))
+import uuid
+# The project root, the machine learning folder and the app folder (only added once, as the script is rerun on every interaction)
+for path in [os.path.join(os.path.dirname(os.path.abspath(__file__)), *parts) for parts in [('..', '..'), ('..', '..', 'machine_learning_algorithm'), ('..',)]]:
+    if path not in sys.path:
+        sys.path.append(path)
 from machine_learning_algorithm.danceability_categorizer import DanceabilityCategorizer
 from machine_learning_algorithm.recommender import Recommender
 from machine_learning_algorithm.label_calculator import LabelCalculator
+from machine_learning_algorithm.recommendation_cache import shared_recommendation_cache
+from machine_learning_algorithm.model_artefact import ModelArtefact
+from machine_learning_algorithm.prediction_grid import PredictionGrid
+from machine_learning_algorithm.lazy_model import LazyModel
 from config import Config
-sys.path.append("..")
+from instrumentation import shared_instrumentation
 from model.frame_filter import FrameFilter
 from model.track import Track
-from sklearn.neighbors import KNeighborsClassifier
+from model.catalogue_store import CatalogueStore
+from model.catalogue import Catalogue
+from model.search_index import SearchIndex
+from model.filter_pipeline import FilterPipeline
+from model.track_page_view import TrackPageView
+from model.shared_resources import SharedResources
+from model.rerun_profiler import RerunProfiler
+from model.radar_chart_renderer import RadarChartRenderer, shared_radar_chart_renderer
+from model.recommendation_service import RecommendationService
 config = Config()
 
 def create_state_key_if_not_exists(state_key, init_value):
@@ -28,103 +42,73 @@ def create_state_key_if_not_exists(state_key, init_value):
     if state_key not in st.session_state:
         st.session_state[state_key] = init_value
         
+@shared_instrumentation.timed("on_get_recommendations_click")
 def on_get_recommendations_click(*args):
     """Is executed when the "Get recommendations" button is clicked.
     """
+    start_profiling("on_get_recommendations_click")
     track_id = args[0]
+    shared_instrumentation.increment("recommendation_requests")
     st.session_state["search_bar_value"] = ""
     st.session_state["recommendations_search_enabled"] = True
     st.session_state["searching_mode_value"] = "Recommendations"
-    recommendations = get_recommendations(track_id, 'id', st.session_state["data_frame"],
-                                          st.session_state["model"], recommender, label_calculator)
-    st.session_state["recommendations_frame"] = recommendations
+    k, restriction = get_recommendation_mode(st.session_state["recommendation_mode"])
+    service = get_recommendation_service()
+    
+    # The recommendations of the whole label bucket are only represented by the label (see RecommendationService.get_label_rows())
+    if k is None:
+        st.session_state["recommendations_label"] = service.predict_packed_labels([track_id])[track_id]
+        st.session_state["recommendations_rows"] = None
+    else:
+        st.session_state["recommendations_label"] = None
+        st.session_state["recommendations_rows"] = service.get_nearest_rows(track_id, k, restriction)
     reload_data()
 
+@shared_instrumentation.timed("on_turn_off_recommendations_request")
 def on_turn_off_recommendations_request():
     """Is executed when the "Turn off recommendations" button is clicked.
     """
+    start_profiling("on_turn_off_recommendations_request")
     st.session_state["recommendations_search_enabled"] = False
     st.session_state["searching_mode_value"] = "Main (recommendations deactivated)"
     reload_data()
     
+@shared_instrumentation.timed("reload_data")
 def reload_data():
     """Reloads data.
     """
+    start_profiling("reload_data")
     st.session_state["page_count"] = 0
     st.session_state["paginator_left_value"] = 0
     st.session_state["paginator_right_value"] = 10
     refilter_data()
     
+@shared_instrumentation.timed("refilter_data")
 def refilter_data():
-    """Refilters data.
+    """Refilters data (only the filter stages whose inputs changed are recomputed, see FilterPipeline).
     """
-    df = st.session_state["data_frame"]
-    result = apply_criteria(df, st.session_state["criteria_values"])
+    filter_list = [(key, st.session_state[key]) for key in st.session_state["criteria_values"].keys()]
     genrey_key = get_genre(st.session_state["selected_genre"])
-    result = apply_genre(result, "track_genre", genrey_key)
-    result = apply_search_bar_value(result, st.session_state["search_bar_value"],
-                                               "artists_name", "name")
+    recommendations = None
     
     if st.session_state["recommendations_search_enabled"]:
-        recommended_values = st.session_state["recommendations_frame"]
-        result = result[result["id"].isin(recommended_values["id"])]
+        recommendations = st.session_state["recommendations_rows"]
         
-    st.session_state["currently_displayed_frame"] = result
-    
-def apply_criteria(input_frame: pd.DataFrame, criteria_values_dict: dict) -> pd.DataFrame:
-    """Applies criteria to the input frame.
-    Args:
-        input_frame (pd.DataFrame): The input frame.
-        criteria_values_dict (dict): The dictionary containing criteria value ranges (the format can be seen in get_range_selection_criterion_values_dictionary()).
-    Raises:
-        TypeError: Is thrown if input_frame is not a pd.DataFrame.
-        TypeError: Is thrown if criteria_values_dict is not a dict.
-    Returns:
-        pd.DataFrame: The filtered data frame.
-    """
-    if type(input_frame) != pd.DataFrame:
-        raise TypeError("input_frame must be a pd.DataFrame!")
-    if type(criteria_values_dict) != dict:
-        raise TypeError("criteria_values_dict must be a dict!") 
-    
-    df = pd.DataFrame(input_frame)
-    filter_list = [(key, st.session_state[key]) for key in criteria_values_dict.keys()]
-    result = FrameFilter.apply_range_filter(df, filter_list)
-    return result
-
-def apply_genre(input_frame: pd.DataFrame, frame_genre_attribute: str, genre_key: str) -> pd.DataFrame:
-    """Applies the genre filter.
-    Args:
-        input_frame (pd.DataFrame): The input data frame.
-        frame_genre_attribute (str): The name of the genre attribute.
-        genre_key (str): The genre value.
-    Raises:
-        TypeError: Is thrown if input_frame is not a pd.DataFrame.
-        TypeError: Is thrown if frame_genre_attribute is not a str.
-        TypeError: Is thrown if genre_key is not a str.
-    Returns:
-        pd.DataFrame: The filtered data frame.
-    """
-    if type(input_frame) != pd.DataFrame:
-        raise TypeError("input_frame must be a pd.DataFrame!")
-    if type(frame_genre_attribute) != str:
-        raise TypeError("frame_genre_attribute must be a str!")
-    if type(genre_key) != str:
-        raise TypeError("genre_key must be a str!")
+        if st.session_state["recommendations_label"] is not None:
+            recommendations = get_recommendation_service().get_label_rows(st.session_state["recommendations_label"], filter_list, genrey_key)
+        
+    result = st.session_state["filter_pipeline"].run(filter_list, genrey_key, st.session_state["search_bar_value"], recommendations)
+    st.session_state["currently_displayed_rows"] = result
     
-    if genre_key == "all":
-        return input_frame
-
-    result = FrameFilter.apply_equality_filter(input_frame, [(frame_genre_attribute, genre_key)])
-    return result
-
-def apply_search_bar_value(input_frame: pd.DataFrame, search_value: str, artists_name_attribute: str, track_name_attribute: str) -> pd.DataFrame:
+def apply_search_bar_value(input_frame: pd.DataFrame, search_value: str, artists_name_attribute: str, track_name_attribute: str,
+                           search_index: SearchIndex = None) -> pd.DataFrame:
     """Applies the search bar value filter to the input frame.
     Args:
         input_frame (pd.DataFrame): The input frame.
         search_value (str): The search bar value.
         artists_name_attribute (str): The name of the artists name attribute.
         track_name_attribute (str): The name of the track name attribute.
+        search_index (SearchIndex, optional): The search index of the frame input_frame was filtered from. Defaults to None.
     Raises:
         TypeError: Is thrown if input_frame is not a pd.DataFrame.
         TypeError: Is thrown if search_value is not a str.
@@ -143,28 +127,32 @@ def apply_search_bar_value(input_frame: pd.DataFrame, search_value: str, artists
         raise TypeError("track_name_attribute must be a str!")
     if search_value == "" or search_value == None:
         return input_frame
+    if search_index is not None:
+        return search_index.filter_frame(input_frame, search_index.search(search_value))
     
-    df_artists = get_data_frame_by_artist(input_frame, search_value, artists_name_attribute)
-    df_tracks = get_data_frame_by_track_name(input_frame, search_value, track_name_attribute)
+    df_artists = get_data_frame_by_artist(input_frame, search_value, artists_name_attribute, search_index)
+    df_tracks = get_data_frame_by_track_name(input_frame, search_value, track_name_attribute, search_index)
     result = pd.concat([df_artists, df_tracks])
     return result.drop_duplicates(subset=["id"])
 
-def get_recommendations(track_id: str, id_attribute: str, input_frame: pd.DataFrame, knn_classifier: KNeighborsClassifier,
-                        recommender: Recommender, label_calculator: LabelCalculator) -> pd.DataFrame:
+def get_recommendations(track_id: str, id_attribute: str, input_frame: pd.DataFrame, knn_classifier,
+                        recommender: Recommender, label_calculator: LabelCalculator, label_index=None, catalogue: Catalogue = None) -> pd.DataFrame:
     """Retrieves recommendations based on the input parameters.
     Args:
         track_id (str): The input track ID.
         id_attribute (str): The name of the track id attribute.
         input_frame (pd.DataFrame): The input frame.
-        knn_classifier (KNeighborsClassifier): The KNN classifier.
+        knn_classifier: The KNN classifier (e.g. a KNeighborsClassifier, a ModelArtefact or a PredictionGrid).
         recommender (Recommender): The recommender.
         label_calculator (LabelCalculator): The label calculator.
+        label_index (LabelIndex, optional): The label index of input_frame (see Recommender.build_label_index()). Defaults to None.
+        catalogue (Catalogue, optional): The catalogue of input_frame (the track is found by its ID index instead of scanning the frame). Defaults to None.
 
     Raises:
         TypeError: Is thrown if track_id is not a str.
         TypeError: Is thrown if id_attribute is not a str.
         TypeError: Is thrown if input_frame is not a pd.DataFrame.
-        TypeError: Is thrown if knn_classifier is not a KNeighborsClassifier.
+        TypeError: Is thrown if knn_classifier does not provide predict() (e.g. a KNeighborsClassifier or a ModelArtefact).
         TypeError: Is thrown if recommender is not a Recommender.
         TypeError: Is thrown if label_calculator is not a LabelCalculator.
     Returns:
@@ -176,31 +164,36 @@ def get_recommendations(track_id: str, id_attribute: str, input_frame: pd.DataFr
         raise TypeError("id_attribute must be a str!")
     if type(input_frame) != pd.DataFrame:
         raise TypeError("input_frame must be a pd.DataFrame!")
-    if type(knn_classifier) != KNeighborsClassifier:
-        raise TypeError("knn_classifier must be a KNeighborsClassifier!")
+    if not(callable(getattr(knn_classifier, "predict", None))):
+        raise TypeError("knn_classifier must provide predict()!")
     if type(recommender) != Recommender:
         raise TypeError("recommender must be of type Recommender!")
     if type(label_calculator) != LabelCalculator:
         raise TypeError("label_calculator must be of type LabelCalculator!")
     
-    frame = pd.DataFrame(input_frame)
-    correct_row = frame[frame[id_attribute] == track_id].iloc[0][['danceability', 'valence', 'instrumentalness', 'energy']]
+    if catalogue is not None:
+        correct_row = input_frame.iloc[catalogue.get_row(track_id)][['danceability', 'valence', 'instrumentalness', 'energy']]
+    else:
+        frame = pd.DataFrame(input_frame)
+        correct_row = frame[frame[id_attribute] == track_id].iloc[0][['danceability', 'valence', 'instrumentalness', 'energy']]
     input_array = np.array(correct_row)
-    label = knn_classifier.predict([input_array])
+    
+    with shared_instrumentation.span("knn_predict"):
+        label = knn_classifier.predict([input_array])
     label_decomposed = label_calculator.decompose_label(label[0])
     recommended = recommender.recommend(label_decomposed["danceability"], label_decomposed["mood"],
                                         label_decomposed["energy"], 
                                         label_decomposed["instrumentalness"],
-                                        input_frame)
+                                        input_frame, label_index)
     return recommended
-    
-    
-def get_data_frame_by_artist(input_frame: pd.DataFrame, search_str: str, artists_name_attribute: str) -> pd.DataFrame:
+
+def get_data_frame_by_artist(input_frame: pd.DataFrame, search_str: str, artists_name_attribute: str, search_index: SearchIndex = None) -> pd.DataFrame:
     """Filters data frame by looking for artists containing the search_str.
     Args:
         input_frame (pd.DataFrame): The input data frame.
         search_str (str): The search string.
         artists_name_attribute (str): The name of the artists attribute.
+        search_index (SearchIndex, optional): The search index of the frame input_frame was filtered from (the frame is scanned if None). Defaults to None.
     Raises:
         TypeError: Is thrown if input_frame is not a pd.DataFrame:
         TypeError: Is thrown if search_str is not a str.
@@ -215,16 +208,20 @@ def get_data_frame_by_artist(input_frame: pd.DataFrame, search_str: str, artists
     if type(artists_name_attribute) != str:
         raise TypeError("artists_name_attribute must be a str!")
     
+    if search_index is not None:
+        return search_index.filter_frame(input_frame, search_index.search_artists(search_str))
+    
     frame = pd.DataFrame(input_frame)
     subframe = frame[frame[artists_name_attribute].apply(lambda artists_list: any([search_str.lower().replace(" ", "") in str(el).lower().replace(" ", "") for el in artists_list]))]
     return subframe
 
-def get_data_frame_by_track_name(input_frame: pd.DataFrame, search_str: str, track_name_attribute: str) -> pd.DataFrame:
+def get_data_frame_by_track_name(input_frame: pd.DataFrame, search_str: str, track_name_attribute: str, search_index: SearchIndex = None) -> pd.DataFrame:
     """Filters data frame by looking for tracks containing the search_str.
     Args:
         input_frame (pd.DataFrame): The input data frame.
         search_str (str): The search string.
         track_name_attribute (str): The name of the track name attribute.
+        search_index (SearchIndex, optional): The search index of the frame input_frame was filtered from (the frame is scanned if None). Defaults to None.
     Raises:
         TypeError: Is thrown if input_frame is not a pd.DataFrame:
         TypeError: Is thrown if search_str is not a str.
@@ -239,28 +236,34 @@ def get_data_frame_by_track_name(input_frame: pd.DataFrame, search_str: str, tra
     if type(track_name_attribute) != str:
         raise TypeError("track_name_attribute must be a str!")
     
+    if search_index is not None:
+        return search_index.filter_frame(input_frame, search_index.search_track_names(search_str))
+    
     frame = pd.DataFrame(input_frame)
     subframe = frame[frame[track_name_attribute].apply(lambda track: search_str.lower().replace(" ", "") in str(track).lower().replace(" ", ""))]
     return subframe
     
 
+@shared_instrumentation.timed("on_paginator_right")
 def on_paginator_right():
     """Is executed when the right paginator is clicked.
     """
-    data_frame = pd.DataFrame(st.session_state["currently_displayed_frame"])
+    start_profiling("on_paginator_right")
+    displayed_rows = st.session_state["currently_displayed_rows"]
     current_right = st.session_state["paginator_right_value"]
     
-    if current_right > len(data_frame):
+    if current_right > get_shared_resources().get_catalogue().get_row_count(displayed_rows):
         return
     
     st.session_state["paginator_left_value"] = current_right
     st.session_state["paginator_right_value"] = current_right + st.session_state["paginator_step"]
     st.session_state["page_count"] += 1
-    refilter_data()
 
+@shared_instrumentation.timed("on_paginator_left")
 def on_paginator_left():
     """Is executed when the left paginator is clicked.
     """
+    start_profiling("on_paginator_left")
     current_left = st.session_state["paginator_left_value"]
     
     if current_left == 0:
@@ -269,7 +272,6 @@ def on_paginator_left():
     st.session_state["paginator_right_value"] = current_left
     st.session_state["paginator_left_value"] = current_left - st.session_state["paginator_step"]
     st.session_state["page_count"] -= 1
-    refilter_data()
     
 def get_genre_to_key_mapping_dictionary() -> dict:
     """Gets genre-to-key mapping dictionary.
@@ -298,6 +300,35 @@ def get_genre_to_key_mapping_dictionary() -> dict:
     
     return result_dict
 
+def get_recommendation_mode_to_key_mapping_dictionary() -> dict:
+    """Gets the recommendation-mode-to-key mapping dictionary.
+    Returns:
+        dict: The mapping dictionary (display string -> (number of nearest tracks or None for the whole label bucket, restriction)).
+    """
+    result_dict = {
+        "All tracks with the same label": (None, "label"),
+        "50 nearest tracks": (50, "none"),
+        "50 nearest tracks with the same label": (50, "label"),
+        "50 nearest tracks of the same genre": (50, "genre")
+    }
+    
+    return result_dict
+
+def get_recommendation_mode(display_str: str) -> tuple:
+    """Gets the recommendation mode associated with the display string.
+    Args:
+        display_str (str): The display string.
+    Raises:
+        TypeError: Is thrown if display_str is not a str.
+    Returns:
+        tuple: The number of nearest tracks (None for the whole label bucket) and the restriction.
+    """
+    if type(display_str) != str:
+        raise TypeError("display_str must be a str!")
+    
+    dictionary = get_recommendation_mode_to_key_mapping_dictionary()
+    return dictionary[display_str]
+
 def get_range_selection_criterion_limits_dictionary() -> dict:
     """Gets the dictionary that expresses possible value ranges for criteria.
     Returns:
@@ -388,13 +419,15 @@ def get_string_textual_representation(input_str: str, empty_text: str) -> str:
     
     return input_str
 
-def get_radar_chart(r_values: list, theta_values: list, width: int, height: int):
-    """Returns a radar chart.
+@shared_instrumentation.timed("get_radar_chart")
+def get_radar_chart(r_values: list, theta_values: list, width: int, height: int, as_svg: bool = False):
+    """Returns a radar chart (memoized by the rounded values in the chart cache shared by all sessions, see RadarChartRenderer).
     Args:
         r_values (list): Attributes to display.
         theta_values (list): Attribute names.
         width (int): Chart width.
         height (int): Chart height.
+        as_svg (bool, optional): Whether the lightweight SVG chart is returned instead of the Plotly figure. Defaults to False.
     Raises:
         TypeError: Is thrown if r_values is not a list.
         TypeError: Is thrown if theta_values is not a list.
@@ -403,7 +436,7 @@ def get_radar_chart(r_values: list, theta_values: list, width: int, height: int)
         ValueError: Is thrown if height is negative.
         ValueError: Is thrown if widh is negative.
     Returns:
-        _type_: The result plot.
+        _type_: The result plot (the SVG document if as_svg is True).
     """
     if type(r_values) != list:
         raise TypeError("r_values must be a list!")
@@ -418,13 +451,9 @@ def get_radar_chart(r_values: list, theta_values: list, width: int, height: int)
     if width < 0:
         raise ValueError("width cannot be negative!")
     
-    df = pd.DataFrame(dict(
-        r=r_values,
-        theta=theta_values
-    ))
-    
-    fig = px.line_polar(df, r='r', theta='theta', line_close=True, width=width, height=height)
-    return fig
+    if as_svg:
+        return shared_radar_chart_renderer.get_svg(r_values, theta_values, width, height)
+    return shared_radar_chart_renderer.get_figure(r_values, theta_values, width, height)
     
 # Helper variables/objects
 genres_to_select_to_keys = get_genre_to_key_mapping_dictionary()
@@ -440,9 +469,10 @@ def create_session():
     create_state_key_if_not_exists("genres_to_select", genres_to_select_to_keys.keys())
     create_state_key_if_not_exists("criteria_limits", criteria_limits)
     create_state_key_if_not_exists("criteria_values", criteria_values)
-    create_state_key_if_not_exists("data_frame", pd.DataFrame())
-    create_state_key_if_not_exists("currently_displayed_frame", pd.DataFrame())
-    create_state_key_if_not_exists("model", None)
+    create_state_key_if_not_exists("currently_displayed_rows", np.zeros(0, dtype=np.int64))
+    create_state_key_if_not_exists("recommendation_mode", "All tracks with the same label")
+    create_state_key_if_not_exists("filter_pipeline", None)
+    create_state_key_if_not_exists("track_page_view", None)
     create_state_key_if_not_exists("paginator_left_value", 0)
     create_state_key_if_not_exists("paginator_right_value", 10)
     create_state_key_if_not_exists("paginator_step", 10)
@@ -451,26 +481,122 @@ def create_session():
     create_state_key_if_not_exists("search_bar_value", "")
     create_state_key_if_not_exists("init_load", True)
     create_state_key_if_not_exists("recommendations_search_enabled", False)
-    create_state_key_if_not_exists("recommendations_frame", pd.DataFrame())
+    create_state_key_if_not_exists("recommendations_label", None)
+    create_state_key_if_not_exists("recommendations_rows", None)
     
-@st.cache_data  
 def get_data():
     """Gets the data frame used in the application.
     Returns:
         _type_: The data frame.
     """
-    st.session_state["data_frame"] = pickle.load(open(config.data_frame_path, "rb"))
-    return st.session_state["data_frame"]
+    return pickle.load(open(config.data_frame_path, "rb"))
+
+def get_catalogue_frame() -> pd.DataFrame:
+    """Gets the data frame backed by the memory-mapped catalogue store.
+    Returns:
+        pd.DataFrame: The read-only data frame.
+    """
+    return CatalogueStore.load(config.catalogue_store_path).to_frame()
 
-@st.cache_data  
 def get_model():
-    """Gets the model used to create the predictions.
+    """Gets the model used to create the predictions (the memory-mapped model artefact is preferred over the pickled model if it exists).
+       The pickled model is only unpickled (and scikit-learn imported) when the first prediction is requested.
+       If the (approximate) prediction grid exists and is requested by RECOMMENDER_PREDICTION_GRID, it answers the predictions
+       and falls back to the model near the decision boundaries.
     Returns:
         _type_: The model.
     """
-    st.session_state["model"] = pickle.load(open(config.model_path, "rb"))
-    return st.session_state["model"] 
+    if ModelArtefact.exists(config.model_artefact_path):
+        model = ModelArtefact.load(config.model_artefact_path)
+    else:
+        model = LazyModel(lambda: pickle.load(open(config.model_path, "rb")))
+
+    if PredictionGrid.is_requested() and PredictionGrid.exists(config.prediction_grid_path):
+        return PredictionGrid.load(config.prediction_grid_path, model)
+    return model
+
+@shared_instrumentation.timed("create_shared_resources")
+def create_shared_resources() -> SharedResources:
+    """Creates the resources shared by all sessions (the catalogue, the model and their indexes).
+    Returns:
+        SharedResources: The resources.
+    """
+    data_frame = get_catalogue_frame() if CatalogueStore.exists(config.catalogue_store_path) else get_data()
+    return SharedResources(Catalogue(data_frame, "id"), get_model(), recommender.build_label_index(data_frame),
+                           recommender.build_nearest_neighbour_recommender(data_frame), get_search_index(data_frame))
+
+def get_shared_resources() -> SharedResources:
+    """Gets the resources shared by all sessions of the process (created on the first call, the sessions only keep their filter state and row positions).
+    Returns:
+        SharedResources: The resources.
+    """
+    return SharedResources.get_instance(create_shared_resources)
+
+def get_recommendation_service() -> RecommendationService:
+    """Gets the recommendation service working on the shared resources (the same service logic is exposed over HTTP by app/service/main.py).
+    Returns:
+        RecommendationService: The recommendation service.
+    """
+    return RecommendationService(get_shared_resources(), label_calculator, shared_recommendation_cache, instrumentation=shared_instrumentation)
+
+def create_rerun_profiler() -> RerunProfiler:
+    """Creates the profiler of the reruns (the share of the profiled reruns is read from RECOMMENDER_PROFILING_SAMPLE_RATE).
+    Returns:
+        RerunProfiler: The profiler.
+    """
+    return RerunProfiler(config.profiles_path, float(os.environ.get(RerunProfiler.SAMPLE_RATE_ENVIRONMENT_VARIABLE, "1")))
+
+def start_profiling(tag: str):
+    """Starts profiling the current rerun if requested by RECOMMENDER_PROFILING or the query parameter ?profile=1 (see RerunProfiler).
+       The first call of a rerun wins, so the rerun is tagged by the callback triggering it.
+    Args:
+        tag (str): The tag of the rerun (the name of the callback or "rerun").
+    """
+    if RerunProfiler.is_requested(st.query_params.get(RerunProfiler.QUERY_PARAMETER)):
+        RerunProfiler.get_instance(create_rerun_profiler).start(tag)
+
+def get_search_index(input_frame: pd.DataFrame) -> SearchIndex:
+    """Gets the search index of the data frame.
+    Args:
+        input_frame (pd.DataFrame): The data frame.
+    Returns:
+        SearchIndex: The search index (None if the index of the data frame is not unique and the frame has to be scanned).
+    """
+    if not(input_frame.index.is_unique):
+        return None
+    return SearchIndex(input_frame, "artists_name", "name")
+
+@shared_instrumentation.timed("search")
+def get_search_rows(catalogue: Catalogue, rows: np.ndarray, search_value: str, search_index: SearchIndex) -> np.ndarray:
+    """Gets the positions of the rows matching the search bar value.
+    Args:
+        catalogue (Catalogue): The catalogue.
+        rows (np.ndarray): The ascending row positions to search in (None for all rows).
+        search_value (str): The search bar value.
+        search_index (SearchIndex): The search index of the catalogue (the rows are scanned if None).
+    Returns:
+        np.ndarray: The ascending row positions.
+    """
+    if search_index is not None:
+        return search_index.search(search_value, rows)
+    
+    frame = catalogue.take(rows)
+    frame = frame.set_axis(pd.RangeIndex(len(frame)))
+    positions = np.unique(apply_search_bar_value(frame, search_value, "artists_name", "name").index.to_numpy())
+    return positions if rows is None else rows[positions]
 
+def get_filter_pipeline(catalogue: Catalogue, search_index: SearchIndex) -> FilterPipeline:
+    """Gets the filter pipeline of the catalogue.
+    Args:
+        catalogue (Catalogue): The catalogue.
+        search_index (SearchIndex): The search index of the catalogue (or None).
+    Returns:
+        FilterPipeline: The filter pipeline.
+    """
+    search_function = lambda rows, search_value: get_search_rows(catalogue, rows, search_value, search_index)
+    return FilterPipeline(catalogue, search_function, "track_genre")
+
+@shared_instrumentation.timed("get_display_information")
 def get_display_information(input_frame: pd.DataFrame) -> list:
     """Gets a list of track information used to display the data.
     Args:
@@ -485,13 +611,46 @@ def get_display_information(input_frame: pd.DataFrame) -> list:
                        get_list_textual_representation(el[6], "unknown", ",")) for el in data_excerpt_list] 
     return data_list
 
+def get_track_page_view(rows: np.ndarray) -> TrackPageView:
+    """Gets the paged track view of the rows (the view of the session is reused as long as the rows do not change).
+    Args:
+        rows (np.ndarray): The positions of the currently displayed rows (None for all rows).
+    Returns:
+        TrackPageView: The paged track view.
+    """
+    track_page_view = st.session_state["track_page_view"]
+    
+    if track_page_view is None or not(track_page_view.is_view_of(rows)):
+        track_page_view = TrackPageView(get_shared_resources().get_catalogue(), rows, get_display_information)
+        st.session_state["track_page_view"] = track_page_view
+    return track_page_view
+
+def show_instrumentation_panel(interaction_count: int):
+    """Shows the debug panel with the stage breakdowns of the last interactions of the session (only if the instrumentation is enabled).
+    Args:
+        interaction_count (int): The number of shown interactions.
+    """
+    session_id = st.session_state["instrumentation_session_id"]
+    interactions = [interaction for interaction in shared_instrumentation.get_interactions() if interaction.get("session") == session_id]
+    
+    with st.expander("Performance (last interactions)", expanded=False):
+        for interaction in reversed(interactions[-interaction_count:]):
+            st.write(f"**{interaction['name']}**: {interaction['total_ms']:.1f} ms")
+            st.dataframe(pd.DataFrame({"stage": ["\u00a0\u00a0" * stage["depth"] + stage["name"] for stage in interaction["stages"]],
+                                       "ms": [round(stage["ms"], 2) for stage in interaction["stages"]]}), hide_index=True)
+            
+        st.download_button("Metrics (Prometheus)", shared_instrumentation.to_prometheus(), file_name="metrics.txt")
+        st.download_button("Metrics (JSON)", shared_instrumentation.to_json(), file_name="metrics.json")
+
 create_session() 
+start_profiling("rerun")
 
 if st.session_state["init_load"]:
     st.session_state["init_load"] = False    
-    st.session_state["data_frame"] = get_data()
-    st.session_state["model"] = get_model()
-    st.session_state["currently_displayed_frame"] = st.session_state["data_frame"]
+    shared_resources = get_shared_resources()
+    st.session_state["filter_pipeline"] = get_filter_pipeline(shared_resources.get_catalogue(), shared_resources.get_search_index())
+    # None displays all rows without allocating their positions per session
+    st.session_state["currently_displayed_rows"] = None
 #--------------------------------------------Code--------------------------------------------  
 
 #--------------------------------------------UI--------------------------------------------
@@ -516,13 +675,16 @@ with st.sidebar:
         min_val, max_val = criteria_limits_dict[criterion]
         current_val = criteria_values_dict[criterion]
         st.slider(criterion, min_val, max_val, current_val, key=criterion, step=0.1, on_change=reload_data)
+        
+    st.radio("Recommendations", list(get_recommendation_mode_to_key_mapping_dictionary().keys()), key="recommendation_mode")
 
 with main_songs_selection_layout.container():
-    currently_displayed_frame = st.session_state["currently_displayed_frame"]
+    currently_displayed_rows = st.session_state["currently_displayed_rows"]
     left = st.session_state["paginator_left_value"]
     right = st.session_state["paginator_right_value"]
-    to_display_to_list: list[Track] = get_display_information(currently_displayed_frame)
-    tracks_to_display = to_display_to_list[left:right]
+    
+    with shared_instrumentation.span("get_track_page"):
+        tracks_to_display: list[Track] = get_track_page_view(currently_displayed_rows).get_tracks(left, right)
     rows = [st.columns(1, gap="large") for _ in enumerate(tracks_to_display)]
     
     if len(tracks_to_display) == 0:
@@ -537,13 +699,21 @@ with main_songs_selection_layout.container():
                     st.markdown(thick_line, unsafe_allow_html=True)
                     track_to_display = tracks_to_display[i]
                     components.iframe(f"https://open.spotify.com/embed/track/{track_to_display.id}",  width=270, height=380)
-                    with st.expander("More details", expanded=False):
+                    # The expander state is tracked, so the chart is only rendered while the details are opened
+                    details = st.expander("More details", expanded=False, key=f"details_{track_to_display.id}", on_change="rerun")
+                    with details:
                         st.write(f"**Track name:** {track_to_display.name}")
                         st.write(f"**Artists:** {track_to_display.artists}")
-                        f = get_radar_chart([track_to_display.danceability, track_to_display.valence, track_to_display.energy, track_to_display.instrumentalness], 
-                                        ["danceability", "valence", "energy", "instrumentalness"],
-                                        width=450, height=390)
-                        st.write(f)
+                        if details.open:
+                            with shared_instrumentation.span("radar_chart"):
+                                as_svg = RadarChartRenderer.is_svg_requested()
+                                f = get_radar_chart([track_to_display.danceability, track_to_display.valence, track_to_display.energy, track_to_display.instrumentalness], 
+                                                ["danceability", "valence", "energy", "instrumentalness"],
+                                                width=450, height=390, as_svg=as_svg)
+                                if as_svg:
+                                    st.image(f, width=450)
+                                else:
+                                    st.write(f)
                         
                     st.button("Get recommendations", key=track_to_display.id, on_click=on_get_recommendations_click, args=[track_to_display.id])    
                     
@@ -564,4 +734,14 @@ with genre_selection.container():
         st.session_state["genres_to_select"],
         key='selected_genre',
         on_change=reload_data)
+
+# The stages of this rerun (including the triggering callback) form one interaction of the session
+if shared_instrumentation.is_enabled():
+    create_state_key_if_not_exists("instrumentation_session_id", uuid.uuid4().hex)
+    shared_instrumentation.finish_interaction(st.session_state["instrumentation_session_id"])
+    
+    with st.sidebar:
+        show_instrumentation_panel(5)
+
+RerunProfiler.get_instance(create_rerun_profiler).finish()
 #--------------------------------------------UI--------------------------------------------
\ No newline at end of file
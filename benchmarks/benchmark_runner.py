@@ -0,0 +1,148 @@
+import gc
+import json
+import time
+import tracemalloc
+from pathlib import Path
+import numpy as np
+
+class BenchmarkRunner:
+    """Represents the timing harness of the benchmarks.
+       Every benchmark is warmed up, timed repeatedly (latency percentiles in milliseconds) and executed once more under tracemalloc
+       (peak of the memory allocated by the call), so the tracing does not distort the timings.
+    """
+    PERCENTILES = [50, 90, 99]
+
+    def __init__(self, repeat: int = 20, warmup: int = 2, max_seconds: float = 10.0):
+        """Represents the constructor.
+        Args:
+            repeat (int, optional): The number of timed calls of a benchmark. Defaults to 20.
+            warmup (int, optional): The number of untimed calls before the timed calls. Defaults to 2.
+            max_seconds (float, optional): The time budget of a benchmark (slow benchmarks stop after at least 3 timed calls). Defaults to 10.0.
+        Raises:
+            TypeError: Is thrown if repeat or warmup is not an int.
+            TypeError: Is thrown if max_seconds is neither an int nor a float.
+            ValueError: Is thrown if repeat is less than 1 or warmup is negative.
+        """
+        if type(repeat) != int or type(warmup) != int:
+            raise TypeError("repeat and warmup must be of type int!")
+        if not(type(max_seconds) == int or type(max_seconds) == float):
+            raise TypeError("max_seconds must be either int or float!")
+        if repeat < 1 or warmup < 0:
+            raise ValueError("repeat must be at least 1 and warmup must not be negative!")
+
+        self.__repeat = repeat
+        self.__warmup = warmup
+        self.__max_seconds = max_seconds
+
+    def run(self, function, *args) -> dict:
+        """Runs a benchmark.
+        Args:
+            function: The benchmarked callable.
+            args: The arguments of the callable.
+        Raises:
+            TypeError: Is thrown if function is not callable.
+        Returns:
+            dict: The results (number of samples, min, mean, percentiles and max in milliseconds, peak memory in bytes).
+        """
+        if not(callable(function)):
+            raise TypeError("function must be callable!")
+
+        for _ in range(self.__warmup):
+            function(*args)
+
+        samples = []
+        deadline = time.perf_counter() + self.__max_seconds
+        gc_enabled = gc.isenabled()
+        gc.disable()
+
+        try:
+            while len(samples) < self.__repeat and (len(samples) < 3 or time.perf_counter() < deadline):
+                start_time = time.perf_counter()
+                function(*args)
+                samples.append((time.perf_counter() - start_time) * 1000)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        samples = np.array(samples)
+        result = {"samples": len(samples), "min_ms": float(samples.min()), "mean_ms": float(samples.mean())}
+
+        for percentile in self.PERCENTILES:
+            result[f"p{percentile}_ms"] = float(np.percentile(samples, percentile))
+
+        result["max_ms"] = float(samples.max())
+        result["peak_memory_bytes"] = self.get_peak_memory(function, *args)
+        return result
+
+    @staticmethod
+    def get_peak_memory(function, *args) -> int:
+        """Returns the peak of the memory allocated by one call (Python and NumPy allocations traced by tracemalloc).
+        Args:
+            function: The callable.
+            args: The arguments of the callable.
+        Returns:
+            int: The peak in bytes.
+        """
+        was_tracing = tracemalloc.is_tracing()
+
+        if not(was_tracing):
+            tracemalloc.start()
+
+        try:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            result = function(*args)
+            _, peak = tracemalloc.get_traced_memory()
+            del result
+            return max(peak - baseline, 0)
+        finally:
+            if not(was_tracing):
+                tracemalloc.stop()
+
+    @staticmethod
+    def save(results: dict, path: Path):
+        """Writes results (JSON).
+        Args:
+            results (dict): The results.
+            path (Path): The path of the JSON file.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, indent=2))
+
+    @staticmethod
+    def load(path: Path) -> dict:
+        """Reads results (JSON).
+        Args:
+            path (Path): The path of the JSON file.
+        Raises:
+            FileNotFoundError: Is thrown if the file does not exist.
+        Returns:
+            dict: The results.
+        """
+        return json.loads(Path(path).read_text())
+
+    @staticmethod
+    def compare(benchmarks: dict, baseline_benchmarks: dict, threshold: float, metric: str = "p50_ms") -> list:
+        """Compares benchmarks with the benchmarks of a baseline (e.g. of an earlier revision).
+        Args:
+            benchmarks (dict): The benchmarks (benchmark name -> results of run()).
+            baseline_benchmarks (dict): The baseline benchmarks (benchmark name -> results of run()).
+            threshold (float): The tolerated relative slowdown (e.g. 0.2 => at most 20 % slower than the baseline).
+            metric (str, optional): The compared metric. Defaults to "p50_ms".
+        Returns:
+            list: The regressions (tuples of benchmark name, baseline value, value and relative change), benchmarks missing in the baseline
+                  and failed benchmarks (see run_benchmarks.py) are skipped.
+        """
+        regressions = []
+
+        for name, result in benchmarks.items():
+            if metric not in result or name not in baseline_benchmarks or metric not in baseline_benchmarks[name]:
+                continue
+
+            baseline_value = baseline_benchmarks[name][metric]
+            value = result[metric]
+
+            if value > baseline_value * (1 + threshold):
+                regressions.append((name, baseline_value, value, value / baseline_value - 1 if baseline_value > 0 else float("inf")))
+        return regressions
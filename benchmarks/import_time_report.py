@@ -0,0 +1,95 @@
+import sys
+import os
+import json
+import argparse
+import subprocess
+import statistics
+from pathlib import Path
+
+VIEW_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'view')
+
+def measure_startup_imports() -> list:
+    """Runs the first paint of the app (app/view/main.py in Streamlit's bare mode) in a new interpreter with -X importtime.
+    Returns:
+        list: The imports (module name, depth, self time in ms, cumulative time in ms) in the order of the report of -X importtime.
+    """
+    code = "import runpy; runpy.run_path('main.py', run_name='__main__')"
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=VIEW_PATH, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.PIPE, text=True)
+
+    if process.returncode != 0:
+        raise RuntimeError(f"The app could not be started:\n{process.stderr[-2000:]}")
+    return parse_import_times(process.stderr)
+
+def parse_import_times(report: str) -> list:
+    """Parses the report of -X importtime (lines like "import time:       123 |        456 |   numpy.core").
+    Args:
+        report (str): The report (other lines are ignored).
+    Returns:
+        list: The imports (module name, depth, self time in ms, cumulative time in ms).
+    """
+    imports = []
+
+    for line in report.splitlines():
+        if not(line.startswith("import time:")):
+            continue
+
+        parts = line[len("import time:"):].split("|")
+
+        if len(parts) != 3 or not(parts[0].strip().isdigit()):
+            continue
+
+        name = parts[2].rstrip()
+        module = name.lstrip()
+        imports.append((module, (len(name) - len(module) - 1) // 2, int(parts[0]) / 1000, int(parts[1]) / 1000))
+    return imports
+
+def get_summary(imports: list, forbidden_modules: list, top_count: int = 15) -> dict:
+    """Summarizes the imports of one run.
+    Args:
+        imports (list): The imports (see parse_import_times()).
+        forbidden_modules (list): The packages that must not be imported (e.g. ["sklearn"]).
+        top_count (int, optional): The number of listed top level imports. Defaults to 15.
+    Returns:
+        dict: The total import time (ms), the number of modules, the slowest top level imports and the imported forbidden packages.
+    """
+    top_level = sorted([entry for entry in imports if entry[1] == 0], key=lambda entry: entry[3], reverse=True)
+    imported = {module for module, _, _, _ in imports}
+    return {"total_ms": sum(self_time for _, _, self_time, _ in imports),
+            "modules": len(imports),
+            "top_level": [{"module": module, "cumulative_ms": cumulative_time} for module, _, _, cumulative_time in top_level[:top_count]],
+            "forbidden": sorted(package for package in forbidden_modules
+                                if any(module == package or module.startswith(package + ".") for module in imported))}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import time report of the app startup (python -X importtime) with a budget check.")
+    parser.add_argument("--runs", type=int, default=3, help="the median total of several runs is checked")
+    parser.add_argument("--budget-ms", type=float, default=2000.0, help="the maximum total import time of the startup")
+    parser.add_argument("--forbid", nargs="*", default=["sklearn", "plotly.express"], help="packages that must not be imported at startup")
+    parser.add_argument("--output", default=None, help="writes the summaries as JSON")
+    arguments = parser.parse_args()
+    summaries = [get_summary(measure_startup_imports(), arguments.forbid) for _ in range(max(arguments.runs, 1))]
+    total = statistics.median(summary["total_ms"] for summary in summaries)
+    summary = summaries[-1]
+
+    print(f"Startup imports: {summary['modules']} modules, total import time {total:.0f} ms (median of {len(summaries)} runs, budget {arguments.budget_ms:.0f} ms)")
+    print("Slowest top level imports:")
+
+    for entry in summary["top_level"]:
+        print(f"  {entry['cumulative_ms']:9.1f} ms  {entry['module']}")
+
+    if arguments.output is not None:
+        Path(arguments.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(arguments.output).write_text(json.dumps({"median_total_ms": total, "budget_ms": arguments.budget_ms, "runs": summaries}, indent=2))
+
+    failures = []
+
+    if total > arguments.budget_ms:
+        failures.append(f"the total import time {total:.0f} ms exceeds the budget of {arguments.budget_ms:.0f} ms")
+    if len(summary["forbidden"]) > 0:
+        failures.append(f"forbidden packages are imported at startup: {', '.join(summary['forbidden'])}")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,155 @@
+import sys
+import os
+import time
+import logging
+import platform
+import argparse
+import itertools
+import subprocess
+from pathlib import Path
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'machine_learning_algorithm'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app', 'view'))
+from synthetic_catalogue import SyntheticCatalogue
+from benchmark_runner import BenchmarkRunner
+
+def load_view():
+    """Imports the view (app/view/main.py) outside of Streamlit (bare mode), so the benchmarks time the functions of the app itself.
+       The view loads the data and the model of the app while being imported.
+    Returns:
+        module: The view module.
+    """
+    # Silences the warnings about the missing script run context (expected in bare mode)
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+
+    import main as view
+    return view
+
+def get_revision() -> str:
+    """Returns the git revision of the working tree.
+    Returns:
+        str: The short revision (or "unknown" outside of a git repository).
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def get_benchmarks(view, input_frame, knn_classifier) -> dict:
+    """Creates the benchmarks of one catalogue.
+    Args:
+        view (module): The view module (see load_view()).
+        input_frame (pd.DataFrame): The catalogue.
+        knn_classifier: The KNN classifier of the app.
+    Returns:
+        dict: The benchmarks (benchmark name -> callable).
+    """
+    recommender = view.Recommender()
+    label_calculator = view.LabelCalculator()
+    label_index = recommender.build_label_index(input_frame)
+    catalogue = view.Catalogue(input_frame, "id")
+    search_index = view.SearchIndex(input_frame, "artists_name", "name")
+    labels = label_calculator.unpack_labels(label_calculator.calculate_labels(input_frame)).tolist()
+    # The seed tracks of the recommendations cycle through a fixed sample, so every call looks up another track
+    seed_ids = itertools.cycle(input_frame["id"].sample(n=min(len(input_frame), 100), random_state=0).tolist())
+    decomposed_label = label_calculator.decompose_label(labels[0])
+    range_criteria = [("danceability", (0.2, 0.8)), ("valence", (0.1, 0.9)), ("energy", (0.3, 1.0)), ("instrumentalness", (0.0, 0.5))]
+    # The radar charts of one page of tracks (the uncached benchmark uses a new chart cache per page)
+    chart_features = ["danceability", "valence", "energy", "instrumentalness"]
+    chart_values = input_frame[chart_features].head(10).values.tolist()
+    return {
+        "FrameFilter.apply_range_filter": lambda: view.FrameFilter.apply_range_filter(input_frame, range_criteria),
+        "FrameFilter.apply_equality_filter": lambda: view.FrameFilter.apply_equality_filter(input_frame, [("track_genre", "rock")]),
+        "get_data_frame_by_artist (scan)": lambda: view.get_data_frame_by_artist(input_frame, "artist 12", "artists_name"),
+        "get_data_frame_by_artist (search index)": lambda: view.get_data_frame_by_artist(input_frame, "artist 12", "artists_name", search_index),
+        "get_data_frame_by_track_name (scan)": lambda: view.get_data_frame_by_track_name(input_frame, "fire", "name"),
+        "get_data_frame_by_track_name (search index)": lambda: view.get_data_frame_by_track_name(input_frame, "fire", "name", search_index),
+        "Recommender.recommend (scan)": lambda: recommender.recommend(decomposed_label["danceability"], decomposed_label["mood"],
+                                                                     decomposed_label["energy"], decomposed_label["instrumentalness"], input_frame),
+        "Recommender.recommend (label index)": lambda: recommender.recommend(decomposed_label["danceability"], decomposed_label["mood"],
+                                                                            decomposed_label["energy"], decomposed_label["instrumentalness"],
+                                                                            input_frame, label_index),
+        "LabelCalculator.calculate_labels": lambda: label_calculator.calculate_labels(input_frame),
+        "LabelCalculator unpack/pack round-trip": lambda: label_calculator.pack_labels(label_calculator.unpack_labels(label_calculator.calculate_labels(input_frame))),
+        "LabelCalculator decompose/calculate round-trip (1000 labels)": lambda: [label_calculator.calculate_label(
+                                                                                    parts["danceability"], parts["instrumentalness"], parts["mood"], parts["energy"])
+                                                                                for parts in map(label_calculator.decompose_label, labels[:1000])],
+        "get_recommendations (scan)": lambda: view.get_recommendations(next(seed_ids), "id", input_frame, knn_classifier, recommender, label_calculator),
+        "get_recommendations (indexed)": lambda: view.get_recommendations(next(seed_ids), "id", input_frame, knn_classifier, recommender,
+                                                                         label_calculator, label_index, catalogue),
+        "radar charts of a page (uncached)": lambda: [view.RadarChartRenderer().get_figure(values, chart_features, 450, 390) for values in chart_values],
+        "radar charts of a page (cached)": lambda: [view.get_radar_chart(values, chart_features, 450, 390) for values in chart_values],
+        "radar charts of a page (cached SVG)": lambda: [view.get_radar_chart(values, chart_features, 450, 390, as_svg=True) for values in chart_values],
+    }
+
+def run(sizes: list, runner: BenchmarkRunner, name_filter: str = "", seed: int = 0) -> dict:
+    """Runs the benchmarks on synthetic catalogues.
+    Args:
+        sizes (list): The numbers of tracks of the catalogues.
+        runner (BenchmarkRunner): The runner.
+        name_filter (str, optional): Only the benchmarks containing this string are run. Defaults to "".
+        seed (int, optional): The seed of the catalogues. Defaults to 0.
+    Returns:
+        dict: The results (metadata and benchmarks, benchmark name "<name> [<size>]" -> results of BenchmarkRunner.run()
+              or {"error": <message>} if the benchmark raised an exception).
+    """
+    view = load_view()
+    knn_classifier = view.get_model()
+    benchmarks = {}
+
+    for size in sizes:
+        start_time = time.perf_counter()
+        input_frame = SyntheticCatalogue(seed).generate(size)
+        print(f"Catalogue of {size} tracks generated in {time.perf_counter() - start_time:.1f} s")
+
+        for name, function in get_benchmarks(view, input_frame, knn_classifier).items():
+            if name_filter.lower() not in name.lower():
+                continue
+
+            # A failing benchmark is recorded, so the results of the other benchmarks are still written
+            try:
+                result = runner.run(function)
+            except Exception as e:
+                benchmarks[f"{name} [{size}]"] = {"error": f"{type(e).__name__}: {e}"}
+                print(f"  {name:<62} FAILED ({type(e).__name__}: {e})")
+                continue
+
+            benchmarks[f"{name} [{size}]"] = result
+            print(f"  {name:<62} p50 {result['p50_ms']:10.3f} ms  p90 {result['p90_ms']:10.3f} ms  p99 {result['p99_ms']:10.3f} ms  "
+                  f"peak {result['peak_memory_bytes'] / 2**20:8.1f} MiB  ({result['samples']} samples)")
+
+    return {"revision": get_revision(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "numpy": np.__version__, "machine": platform.machine(), "benchmarks": benchmarks}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks of the filter, search and recommendation hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max-seconds", type=float, default=10.0)
+    parser.add_argument("--filter", default="")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "results", "latest.json"))
+    parser.add_argument("--baseline", default=None, help="results of an earlier revision to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="tolerated relative slowdown of the median (default 20 %%)")
+    arguments = parser.parse_args()
+    results = run(arguments.sizes, BenchmarkRunner(arguments.repeat, max_seconds=arguments.max_seconds), arguments.filter)
+    BenchmarkRunner.save(results, Path(arguments.output))
+    print(f"Results written to {arguments.output}")
+    failures = [name for name, result in results["benchmarks"].items() if "error" in result]
+
+    if len(failures) > 0:
+        print(f"{len(failures)} benchmark(s) failed: {', '.join(failures)}")
+
+    if arguments.baseline is not None:
+        baseline = BenchmarkRunner.load(Path(arguments.baseline))
+        regressions = BenchmarkRunner.compare(results["benchmarks"], baseline["benchmarks"], arguments.threshold)
+
+        for name, baseline_value, value, change in regressions:
+            print(f"REGRESSION {name}: p50 {baseline_value:.3f} ms -> {value:.3f} ms (+{change:.0%})")
+
+        print(f"{len(regressions)} regression(s) compared with revision {baseline.get('revision', 'unknown')} (threshold {arguments.threshold:.0%})")
+        sys.exit(1 if regressions or failures else 0)
+
+    sys.exit(1 if failures else 0)
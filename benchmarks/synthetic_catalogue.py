@@ -0,0 +1,63 @@
+import string
+import numpy as np
+import pandas as pd
+
+class SyntheticCatalogue:
+    """Represents the generator of synthetic catalogues with the schema of the data frame of the app (app/model/data.pkl).
+       The catalogues are reproducible (seeded) and generated column-wise, so catalogues of millions of tracks are built in seconds.
+    """
+    GENRES = ["avant-garde", "blues", "country", "easy listening", "electronic", "experimental", "folk", "hip hop",
+              "jazz", "metal", "pop", "punk", "r&b", "rap", "rock", "soul", "other"]
+    WORDS = ["love", "night", "blue", "fire", "dream", "rain", "song", "heart", "road", "summer",
+             "city", "light", "dance", "gold", "river", "home", "wild", "time", "star", "ocean"]
+    ID_LENGTH = 22
+
+    def __init__(self, seed: int = 0):
+        """Represents the constructor.
+        Args:
+            seed (int, optional): The seed of the random generator. Defaults to 0.
+        Raises:
+            TypeError: Is thrown if seed is not an int.
+        """
+        if type(seed) != int:
+            raise TypeError("seed must be an int!")
+
+        self.__seed = seed
+
+    def generate(self, track_count: int) -> pd.DataFrame:
+        """Generates a catalogue.
+        Args:
+            track_count (int): The number of tracks.
+        Raises:
+            TypeError: Is thrown if track_count is not an int.
+            ValueError: Is thrown if track_count is less than 1.
+        Returns:
+            pd.DataFrame: The catalogue (id, name, artists_name, track_genre, danceability, valence, instrumentalness, energy, popularity).
+        """
+        if type(track_count) != int:
+            raise TypeError("track_count must be an int!")
+        if track_count < 1:
+            raise ValueError("track_count must be at least 1!")
+
+        rng = np.random.default_rng(self.__seed)
+        alphabet = np.array(list(string.ascii_letters + string.digits))
+        ids = alphabet[rng.integers(0, len(alphabet), (track_count, self.ID_LENGTH))].view(f"<U{self.ID_LENGTH}")[:, 0]
+        words = np.array(self.WORDS, dtype=object)
+        word_counts = rng.integers(1, 4, track_count)
+        word_indexes = rng.integers(0, len(words), (track_count, 3))
+        names = [" ".join(words[indexes[:count]]) for indexes, count in zip(word_indexes, word_counts)]
+        # Roughly ten tracks per artist, a fifth of the tracks has two artists
+        artist_names = np.array([f"Artist {number}" for number in range(max(track_count // 10, 1))], dtype=object)
+        artist_indexes = rng.integers(0, len(artist_names), (track_count, 2))
+        artist_counts = np.where(rng.random(track_count) < 0.2, 2, 1)
+        artists = [list(artist_names[indexes[:count]]) for indexes, count in zip(artist_indexes, artist_counts)]
+        return pd.DataFrame({"id": ids.astype(object),
+                             "name": names,
+                             "artists_name": artists,
+                             "track_genre": rng.choice(np.array(self.GENRES, dtype=object), track_count),
+                             "danceability": rng.beta(5, 3, track_count),
+                             "valence": rng.random(track_count),
+                             # Most tracks are hardly instrumental (as in the real data)
+                             "instrumentalness": rng.random(track_count) ** 4,
+                             "energy": rng.beta(3, 2, track_count),
+                             "popularity": rng.integers(0, 100, track_count)})
@@ -0,0 +1,307 @@
+import os
+import csv
+import heapq
+import tempfile
+import contextlib
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from config import Config
+from list_literal_parser import ListLiteralParser
+from preprocessor import Preprocessor
+
+class CsvIngestor:
+    """Represents the streaming ingestion of the Spotify CSV files (the bounded-memory version of Preprocessor.run()).
+       The artists and albums are read once (only the needed columns) and serve as lookups, the tracks are streamed in chunks
+       of chunk_size rows and preprocessed against them. The lyrics features (one row per track) are not held as lookup:
+       the preprocessed tracks and the lyrics features are hash-partitioned by the track ID into temporary files of about chunk_size rows,
+       joined partition by partition and merged back into the order of the tracks file. So only one chunk of tracks
+       or one partition is kept in memory at a time.
+    """
+    TRACKS_DTYPES = {"id": "str", "album_id": "str", "artists_id": "str", "name": "str",
+                     "available_markets": "str", "country": "str", "lyrics": "str", "playlist": "str",
+                     "preview_url": "str", "uri": "str",
+                     "acousticness": "float64", "danceability": "float64", "energy": "float64",
+                     "instrumentalness": "float64", "liveness": "float64", "loudness": "float64",
+                     "speechiness": "float64", "tempo": "float64", "valence": "float64",
+                     "duration_ms": "Int64", "mode": "Int64", "popularity": "Int64", "time_signature": "Int64"}
+    ARTISTS_DTYPES = {"id": "str", "name": "str", "genres": "str"}
+    ALBUMS_DTYPES = {"id": "str", "name": "str", "images": "str", "release_date": "str", "release_date_precision": "str"}
+    LYRICS_FEATURES_DTYPES = {"track_id": "str"}
+    # The column of the temporary files holding the position of a row in the output
+    POSITION_COLUMN = "__position"
+
+    def __init__(self, config: Config = None, chunk_size: int = 10000, main_genres: list = None):
+        """Represents the constructor.
+        Args:
+            config (Config, optional): The configuration containing the paths. Defaults to None (= Config()).
+            chunk_size (int, optional): The number of rows read at once. Defaults to 10000.
+            main_genres (list, optional): The main genres in the order of their priority. Defaults to None (= Preprocessor.MAIN_GENRES).
+        Raises:
+            TypeError: Is thrown if config is neither a Config nor None.
+            TypeError: Is thrown if chunk_size is not an int.
+            TypeError: Is thrown if main_genres is neither a list nor None.
+            ValueError: Is thrown if chunk_size is not positive.
+        """
+        if config is not None and type(config) != Config:
+            raise TypeError("config must be either a Config or None!")
+        if type(chunk_size) != int:
+            raise TypeError("chunk_size must be an int!")
+        if main_genres is not None and type(main_genres) != list:
+            raise TypeError("main_genres must be either a list or None!")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive!")
+
+        self.__config = Config() if config is None else config
+        self.__chunk_size = chunk_size
+        self.__main_genres = Preprocessor.MAIN_GENRES if main_genres is None else main_genres
+        self.__preprocessor = Preprocessor()
+
+    def ingest(self, output_path: Path = None) -> int:
+        """Preprocesses the CSV files of the config chunk by chunk and writes the result incrementally.
+           An existing output file is not overwritten (see Preprocessor.save_to_csv()).
+        Args:
+            output_path (Path, optional): The path to the output file. Defaults to None (= preprocessed_data_path of the config).
+        Raises:
+            e: Error message.
+        Returns:
+            int: The number of written rows.
+        """
+        output_path = Path(self.__config.preprocessed_data_path if output_path is None else output_path)
+
+        if os.path.exists(output_path):
+            return 0
+
+        partial_path = output_path.with_name(output_path.name + ".part")
+
+        try:
+            artists_frame = self.read_artists()
+            albums_frame = self.read_albums()
+            partition_count = max(self.__count_lines(self.__config.tracks_path), self.__count_lines(self.__config.lyrics_features_path)) \
+                // self.__chunk_size + 1
+
+            with tempfile.TemporaryDirectory(prefix="ingestion-", dir=output_path.parent) as directory:
+                directory = Path(directory)
+                lyrics_dtypes = self.__partition_lyrics_features(directory, partition_count)
+                tracks_columns = self.__partition_tracks(directory, partition_count, albums_frame, artists_frame)
+                self.__join_partitions(directory, partition_count, tracks_columns, lyrics_dtypes)
+                row_count = self.__merge_partitions(directory, partition_count, tracks_columns + [column for column in lyrics_dtypes
+                                                                                                  if column != "track_id"], partial_path)
+
+            os.replace(partial_path, output_path)
+            return row_count
+        except Exception as e:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise e
+
+    def read_tracks_chunks(self):
+        """Reads the tracks CSV file chunk by chunk (without the columns dropped by the preprocessing).
+        Returns:
+            Iterator of pd.DataFrame: The chunks.
+        """
+        usecols = self.__get_usecols(self.__config.tracks_path, Preprocessor.DROPPED_TRACKS_ATTRIBUTES)
+        return pd.read_csv(self.__config.tracks_path, sep=",", usecols=usecols, chunksize=self.__chunk_size,
+                           dtype=self.__get_dtypes(usecols, self.TRACKS_DTYPES))
+
+    def read_artists(self) -> pd.DataFrame:
+        """Reads the columns of the artists CSV file needed by the preprocessing (the genres are parsed while reading).
+        Returns:
+            pd.DataFrame: The artists data frame.
+        """
+        usecols = ["id", "name", "followers", "artist_popularity", "genres"]
+        chunks = []
+
+        for chunk in pd.read_csv(self.__config.artists_path, sep=",", usecols=usecols, chunksize=self.__chunk_size,
+                                 dtype=self.__get_dtypes(usecols, self.ARTISTS_DTYPES)):
+            chunk["genres"] = [ListLiteralParser.parse(genres) for genres in chunk["genres"]]
+            chunks.append(chunk)
+        return self.__concat(chunks, usecols)
+
+    def read_albums(self) -> pd.DataFrame:
+        """Reads the columns of the albums CSV file needed by the preprocessing.
+        Returns:
+            pd.DataFrame: The albums data frame.
+        """
+        usecols = self.__get_usecols(self.__config.albums_path, Preprocessor.DROPPED_ALBUMS_ATTRIBUTES)
+        return self.__read_lookup(self.__config.albums_path, usecols, self.ALBUMS_DTYPES)
+
+    def __partition_lyrics_features(self, directory: Path, partition_count: int) -> dict:
+        """Streams the lyrics features CSV file (without the unnamed row number column) into the partition files lyrics-<partition>.csv.
+        Args:
+            directory (Path): The directory of the partition files.
+            partition_count (int): The number of partitions.
+        Returns:
+            dict: The dtypes of the columns for reading the partitions (the dtypes of the concatenated chunks, integer columns as nullable integers).
+        """
+        path = self.__config.lyrics_features_path
+        usecols = self.__get_usecols(path, [])
+        dtypes = {column: None for column in usecols}
+
+        for chunk in pd.read_csv(path, sep=",", usecols=usecols, chunksize=self.__chunk_size, dtype=self.__get_dtypes(usecols, self.LYRICS_FEATURES_DTYPES)):
+            for column in chunk.columns:
+                # The dtype pd.concat() would produce for all chunks (see __read_lookup())
+                if pd.api.types.is_integer_dtype(chunk[column].dtype) and dtypes[column] in [None, "Int64"]:
+                    dtypes[column] = "Int64"
+                elif pd.api.types.is_numeric_dtype(chunk[column].dtype) and not(pd.api.types.is_bool_dtype(chunk[column].dtype)) \
+                        and dtypes[column] in [None, "Int64", "float64"]:
+                    dtypes[column] = "float64"
+                else:
+                    dtypes[column] = "str"
+
+            self.__write_partitions(chunk, chunk["track_id"], directory, "lyrics", partition_count)
+        return {column: "str" if dtype is None else dtype for column, dtype in dtypes.items()}
+
+    def __partition_tracks(self, directory: Path, partition_count: int, albums_frame: pd.DataFrame, artists_frame: pd.DataFrame) -> list:
+        """Preprocesses the tracks chunk by chunk (without the lyrics features) and writes them into the partition files tracks-<partition>.csv
+           (together with their position in the output).
+        Args:
+            directory (Path): The directory of the partition files.
+            partition_count (int): The number of partitions.
+            albums_frame (pd.DataFrame): The albums data frame.
+            artists_frame (pd.DataFrame): The artists data frame.
+        Returns:
+            list: The columns of the preprocessed tracks.
+        """
+        no_lyrics_features = pd.DataFrame({"track_id": pd.Series(dtype=str)})
+        position = 0
+        columns = []
+
+        for tracks_chunk in self.read_tracks_chunks():
+            result = self.__preprocessor.get_preprocessing_result(tracks_chunk, albums_frame, artists_frame, no_lyrics_features, self.__main_genres)
+            columns = list(result.columns)
+            result.insert(0, self.POSITION_COLUMN, np.arange(position, position + len(result)))
+            position += len(result)
+            self.__write_partitions(result, result["id"], directory, "tracks", partition_count)
+        return columns
+
+    def __join_partitions(self, directory: Path, partition_count: int, tracks_columns: list, lyrics_dtypes: dict):
+        """Joins every tracks partition with the lyrics features partition of the same track IDs (as Preprocessor.get_preprocessing_result())
+           and writes the result ordered by the output position into joined-<partition>.csv (without header).
+           The values of the preprocessed tracks are passed through as written.
+        Args:
+            directory (Path): The directory of the partition files.
+            partition_count (int): The number of partitions.
+            tracks_columns (list): The columns of the preprocessed tracks.
+            lyrics_dtypes (dict): The dtypes of the lyrics features columns.
+        """
+        for partition in range(partition_count):
+            tracks_path = directory.joinpath(f"tracks-{partition}.csv")
+
+            if not(tracks_path.exists()):
+                continue
+
+            tracks_frame = pd.read_csv(tracks_path, sep=",", dtype=str, keep_default_na=False)
+            tracks_frame[self.POSITION_COLUMN] = tracks_frame[self.POSITION_COLUMN].astype(np.int64)
+            lyrics_path = directory.joinpath(f"lyrics-{partition}.csv")
+            lyrics_features_frame = pd.read_csv(lyrics_path, sep=",", dtype=lyrics_dtypes, float_precision="round_trip") if lyrics_path.exists() \
+                else pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in lyrics_dtypes.items()})
+            joined = tracks_frame.set_index("id").join(lyrics_features_frame.set_index("track_id")).reset_index()
+            joined = joined[[self.POSITION_COLUMN] + tracks_columns + [column for column in lyrics_dtypes if column != "track_id"]]
+            joined.sort_values(self.POSITION_COLUMN, kind="stable").to_csv(directory.joinpath(f"joined-{partition}.csv"), index=False, header=False)
+
+    def __merge_partitions(self, directory: Path, partition_count: int, columns: list, path: Path) -> int:
+        """Merges the joined partitions into the output file (in the order of the output positions).
+        Args:
+            directory (Path): The directory of the partition files.
+            partition_count (int): The number of partitions.
+            columns (list): The columns of the output.
+            path (Path): The path to the output file.
+        Returns:
+            int: The number of written rows.
+        """
+        row_count = 0
+
+        with contextlib.ExitStack() as stack:
+            readers = [csv.reader(stack.enter_context(open(partition_path, newline="")))
+                       for partition_path in [directory.joinpath(f"joined-{partition}.csv") for partition in range(partition_count)]
+                       if partition_path.exists()]
+            # The same dialect as DataFrame.to_csv()
+            writer = csv.writer(stack.enter_context(open(path, "w", newline="")), lineterminator="\n")
+            writer.writerow(columns)
+
+            for row in heapq.merge(*readers, key=lambda row: int(row[0])):
+                writer.writerow(row[1:])
+                row_count += 1
+        return row_count
+
+    def __write_partitions(self, frame: pd.DataFrame, keys: pd.Series, directory: Path, name: str, partition_count: int):
+        """Appends the rows of a frame to the partition files <name>-<partition>.csv (the partition is the hash of the key modulo partition_count).
+        Args:
+            frame (pd.DataFrame): The frame.
+            keys (pd.Series): The keys of the rows (e.g. the track IDs).
+            directory (Path): The directory of the partition files.
+            name (str): The name of the partitioned file.
+            partition_count (int): The number of partitions.
+        """
+        partitions = pd.util.hash_pandas_object(keys.astype(object), index=False).to_numpy() % partition_count
+
+        for partition, part in frame.groupby(partitions, sort=False):
+            partition_path = directory.joinpath(f"{name}-{partition}.csv")
+            part.to_csv(partition_path, index=False, mode="a", header=not(partition_path.exists()))
+
+    def __count_lines(self, path: Path) -> int:
+        """Counts the lines of a file (an upper bound of its rows, used to size the partitions).
+        Args:
+            path (Path): The path to the file.
+        Returns:
+            int: The number of lines.
+        """
+        with open(path, "rb") as file:
+            return sum(block.count(b"\n") for block in iter(lambda: file.read(1 << 20), b""))
+
+    def __read_lookup(self, path: Path, usecols: list, dtypes: dict) -> pd.DataFrame:
+        """Reads a lookup CSV file chunk by chunk.
+           Integer columns are converted to nullable integers, so tracks without a match do not turn them into floats
+           in some chunks only.
+        Args:
+            path (Path): The path to the CSV file.
+            usecols (list): The columns to read.
+            dtypes (dict): The known dtypes.
+        Returns:
+            pd.DataFrame: The lookup data frame.
+        """
+        chunks = list(pd.read_csv(path, sep=",", usecols=usecols, chunksize=self.__chunk_size,
+                                  dtype=self.__get_dtypes(usecols, dtypes)))
+        frame = self.__concat(chunks, usecols)
+
+        for column in frame.columns:
+            if pd.api.types.is_integer_dtype(frame[column].dtype):
+                frame[column] = frame[column].astype("Int64")
+        return frame
+
+    def __concat(self, chunks: list, usecols: list) -> pd.DataFrame:
+        """Concatenates the chunks of a CSV file.
+        Args:
+            chunks (list): The chunks.
+            usecols (list): The read columns (used for an empty file).
+        Returns:
+            pd.DataFrame: The data frame.
+        """
+        if len(chunks) == 0:
+            return pd.DataFrame(columns=usecols)
+        return pd.concat(chunks, ignore_index=True)
+
+    def __get_usecols(self, path: Path, dropped_attributes: list) -> list:
+        """Returns the columns of a CSV file except the unnamed row number column and the dropped attributes.
+        Args:
+            path (Path): The path to the CSV file.
+            dropped_attributes (list): The attributes dropped by the preprocessing.
+        Returns:
+            list: The columns to read.
+        """
+        header = list(pd.read_csv(path, sep=",", nrows=0).columns)
+        return [column for column in header[1:] if column not in dropped_attributes]
+
+    def __get_dtypes(self, usecols: list, dtypes: dict) -> dict:
+        """Returns the known dtypes of the read columns.
+        Args:
+            usecols (list): The columns to read.
+            dtypes (dict): The known dtypes.
+        Returns:
+            dict: The dtypes of the read columns.
+        """
+        return {column: dtype for column, dtype in dtypes.items() if column in usecols}
+
+if __name__ == "__main__":
+    print(f"{CsvIngestor().ingest()} rows written.")
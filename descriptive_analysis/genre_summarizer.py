@@ -0,0 +1,118 @@
+import re
+import numpy as np
+import pandas as pd
+
+class GenreSummarizer:
+    """Represents the genre summarizer mapping the granular genres of a track to one main genre.
+       E.g.: ["brazilian pop", "korean pop"] (main_genres = ["pop", "rock"]) -> "pop"
+       All main genres are matched by one compiled regex and every distinct granular genre is matched only once (cached).
+       If the genres of a track contain several main genres, the main genre listed first in main_genres wins.
+    """
+    def __init__(self, main_genres: list, other_genre: str = "other"):
+        """Represents the constructor.
+        Args:
+            main_genres (list): The list of main genres in the order of their priority (e.g. ["pop", "rock", ...]).
+            other_genre (str, optional): The genre of the tracks without a main genre. Defaults to "other".
+        Raises:
+            TypeError: Is thrown if main_genres is not a list.
+            TypeError: Is thrown if main_genres contains a value that is not a str.
+            TypeError: Is thrown if other_genre is not a str.
+            ValueError: Is thrown if main_genres contains an empty str.
+        """
+        if type(main_genres) != list:
+            raise TypeError("main_genres must be a list!")
+        if any(type(main_genre) != str for main_genre in main_genres):
+            raise TypeError("main_genres must only contain str values!")
+        if type(other_genre) != str:
+            raise TypeError("other_genre must be a str!")
+        if any(main_genre == "" for main_genre in main_genres):
+            raise ValueError("main_genres must not contain empty genres!")
+
+        self.__main_genres = list(dict.fromkeys(main_genres))
+        self.__other_genre = other_genre
+        self.__other_priority = len(self.__main_genres)
+        self.__summarized_genres = np.array(self.__main_genres + [other_genre], dtype=object)
+        # The lookahead finds the matches at every position (also overlapping ones), the alternation follows the priority order
+        self.__pattern = re.compile("(?=(" + "|".join(re.escape(main_genre) for main_genre in self.__main_genres) + "))") if len(self.__main_genres) > 0 else None
+        self.__priorities = {main_genre: priority for priority, main_genre in enumerate(self.__main_genres)}
+        self.__cache = {}
+
+    def get_main_genres(self) -> list:
+        """Returns the main genres in the order of their priority.
+        Returns:
+            list: The main genres.
+        """
+        return list(self.__main_genres)
+
+    def get_main_genre(self, genre: str) -> str:
+        """Returns the main genre contained in a granular genre (e.g. "korean pop" -> "pop").
+        Args:
+            genre (str): The granular genre.
+        Raises:
+            TypeError: Is thrown if genre is not a str.
+        Returns:
+            str: The main genre (other_genre if the genre does not contain a main genre).
+        """
+        if type(genre) != str:
+            raise TypeError("genre must be a str!")
+
+        return self.__summarized_genres[self.__get_priority(genre)]
+
+    def summarize(self, genres_lists) -> np.ndarray:
+        """Summarizes the genres of every track.
+        Args:
+            genres_lists: The lists of granular genres (one list per track, e.g. a pd.Series or a list).
+        Raises:
+            TypeError: Is thrown if genres_lists is neither a pd.Series nor a list.
+        Returns:
+            np.ndarray: The main genre of every track.
+        """
+        if type(genres_lists) not in [pd.Series, list]:
+            raise TypeError("genres_lists must be either a pd.Series or a list!")
+
+        genres_lists = [genres if isinstance(genres, (list, tuple, np.ndarray)) else [] for genres in genres_lists]
+        lengths = np.array([len(genres) for genres in genres_lists], dtype=np.int64)
+        result = np.full(len(genres_lists), self.__other_priority, dtype=np.int64)
+
+        if lengths.sum() > 0:
+            codes, genres = pd.factorize(pd.Series([genre for genres in genres_lists for genre in genres], dtype=object))
+            priorities = np.array([self.__get_priority(str(genre)) for genre in genres], dtype=np.int64)[codes]
+            starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+            # Empty lists do not take part in the reduction (their segments have a length of 0)
+            result[lengths > 0] = np.minimum.reduceat(priorities, starts[lengths > 0])
+
+        return self.__summarized_genres[result]
+
+    def summarize_frame(self, data_frame: pd.DataFrame, genre_key: str) -> pd.DataFrame:
+        """Replaces the genre lists of the data frame by the main genres.
+        Args:
+            data_frame (pd.DataFrame): The input data frame.
+            genre_key (str): The name of the genre attribute (e.g. "track_genre").
+        Raises:
+            TypeError: Is thrown if data_frame is not a pd.DataFrame.
+            TypeError: Is thrown if genre_key is not a str.
+        Returns:
+            pd.DataFrame: The data frame with summarized genres.
+        """
+        if type(data_frame) != pd.DataFrame:
+            raise TypeError("data_frame must be a pd.DataFrame!")
+        if type(genre_key) != str:
+            raise TypeError("genre_key must be a str!")
+
+        data_frame[genre_key] = self.summarize(data_frame[genre_key]).astype(str)
+        return data_frame
+
+    def __get_priority(self, genre: str) -> int:
+        """Returns the priority of the main genre contained in a granular genre (cached).
+        Args:
+            genre (str): The granular genre.
+        Returns:
+            int: The priority (the position in main_genres, len(main_genres) if there is no main genre).
+        """
+        priority = self.__cache.get(genre)
+
+        if priority is None:
+            matches = [] if self.__pattern is None else self.__pattern.findall(genre)
+            priority = min([self.__priorities[match] for match in matches], default=self.__other_priority)
+            self.__cache[genre] = priority
+        return priority
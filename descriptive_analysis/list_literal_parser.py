@@ -0,0 +1,43 @@
+import re
+from ast import literal_eval
+
+class ListLiteralParser:
+    """Represents the parser of the list literals stored in the Spotify CSV files (e.g. "['rock', 'pop']").
+       Lists of plain quoted strings are split directly or parsed by a compiled regex, everything else (e.g. escaped quotes or numbers)
+       falls back to ast.literal_eval.
+    """
+    __ITEM = r"""(?:'[^'\\]*'|"[^"\\]*")"""
+    __LIST_PATTERN = re.compile(r"\[\s*(?:" + __ITEM + r"\s*(?:,\s*" + __ITEM + r"\s*)*,?\s*)?\]")
+    __ITEM_PATTERN = re.compile(r"""'([^'\\]*)'|"([^"\\]*)\"""")
+
+    @staticmethod
+    def parse(value) -> list:
+        """Parses a list literal.
+        Args:
+            value: The list literal (lists are returned as they are, values that are not a str as an empty list).
+        Raises:
+            ValueError: Is thrown if value is not a valid literal.
+            SyntaxError: Is thrown if value is not a valid literal.
+        Returns:
+            list: The parsed list.
+        """
+        if isinstance(value, list):
+            return value
+        if not(isinstance(value, str)):
+            return []
+
+        value = value.strip()
+
+        # Fast path for the canonical form written by Python (e.g. "['a', 'b']"): without escapes and double quotes,
+        # every single quote delimits an item, so the items can be split directly
+        if value.startswith("['") and value.endswith("']") and len(value) >= 4 and "\\" not in value and '"' not in value:
+            items = value[2:-2].split("', '")
+
+            if value.count("'") == 2 * len(items):
+                return items
+
+        if ListLiteralParser.__LIST_PATTERN.fullmatch(value) is None:
+            return literal_eval(value)
+
+        return [match.group(1) if match.group(1) is not None else match.group(2)
+                for match in ListLiteralParser.__ITEM_PATTERN.finditer(value)]
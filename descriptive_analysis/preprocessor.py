@@ -0,0 +1,214 @@
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from config import Config
+from genre_summarizer import GenreSummarizer
+from list_literal_parser import ListLiteralParser
+
+class Preprocessor:
+    """Represents the preprocessor (the importable, vectorized version of the preprocessing notebook).
+       Instead of scanning the artists frame for every artist of every track, the artist ID lists are exploded,
+       joined once against the artists frame and grouped back per track.
+    """
+    MAIN_GENRES = ['avant-garde', 'easy listening', 'experimental', 'blues', 'country', 'rap',
+                   'r&b',
+                   'electronic', 'folk', 'hip hop',
+                   'jazz', 'soul', 'rock', 'metal', 'punk', 'pop']
+    DROPPED_TRACKS_ATTRIBUTES = ["analysis_url", "disc_number", "href", "key",
+                                 "track_href", "track_name_prev", "track_number", "type"]
+    DROPPED_ALBUMS_ATTRIBUTES = ["album_type", "artist_id", "external_urls", "href", "track_id",
+                                 "track_name_prev", "available_markets", "total_tracks", "uri", "type"]
+
+    def __init__(self):
+        """Represents the constructor.
+        """
+        # The genre summarizers by their main genres (reused for every chunk of a streamed ingestion, see CsvIngestor)
+        self.__genre_summarizers = {}
+
+    def get_preprocessing_result(self, tracks_frame: pd.DataFrame, albums_frame: pd.DataFrame, artists_frame: pd.DataFrame, lyrics_features_frame: pd.DataFrame, genres_to_summarize: list) -> pd.DataFrame:
+        """Preprocesses the data frame by joining the frames, leaving out insignificant features and doing some basic data transformation.
+        Args:
+            tracks_frame (pd.DataFrame): The tracks data frame.
+            albums_frame (pd.DataFrame): The albums data frame.
+            artists_frame (pd.DataFrame): The artists data frame.
+            lyrics_features_frame (pd.DataFrame): The lyrics features data frame.
+            genres_to_summarize (list): List of main genres (in the order of their priority).
+        Raises:
+            TypeError: Is thrown if tracks_frame is not a pd.DataFrame.
+            TypeError: Is thrown if albums_frame is not a pd.DataFrame.
+            TypeError: Is thrown if artists_frame is not a pd.DataFrame.
+            TypeError: Is thrown if lyrics_features_frame is not a pd.DataFrame.
+            TypeError: Is thrown if genres_to_summarize is not a list.
+            e: Error message.
+        Returns:
+            pd.DataFrame: The preprocessed data frame.
+        """
+        if type(tracks_frame) != pd.DataFrame:
+            raise TypeError("tracks_frame must be a data frame!")
+        if type(albums_frame) != pd.DataFrame:
+            raise TypeError("albums_frame must be a data frame!")
+        if type(artists_frame) != pd.DataFrame:
+            raise TypeError("artists_frame must be a data frame!")
+        if type(lyrics_features_frame) != pd.DataFrame:
+            raise TypeError("lyrics_features_frame must be a data frame!")
+        if type(genres_to_summarize) != list:
+            raise TypeError("genres_to_summarize must be a list!")
+
+        try:
+            # Drop unnecessary columns
+            # (frames read with a reduced set of columns, see CsvIngestor, do not contain them anymore)
+            tracks_frame_reduced = tracks_frame.drop(columns=self.DROPPED_TRACKS_ATTRIBUTES, errors="ignore")
+            tracks_frame_reduced["artists_id"] = tracks_frame_reduced["artists_id"].apply(self.parse_list)
+            artist_values = self.get_artist_values(tracks_frame_reduced["artists_id"], artists_frame)
+
+            for column in ["track_genre", "artists_name", "artists_followers", "artists_popularity"]:
+                tracks_frame_reduced[column] = artist_values[column].to_numpy()
+
+            albums_frame_reduced = albums_frame.drop(columns=self.DROPPED_ALBUMS_ATTRIBUTES, errors="ignore")
+            albums_frame_reduced = albums_frame_reduced.rename(columns={"name": "album_name"})
+            tracks_albums_join = tracks_frame_reduced.set_index('album_id').join(albums_frame_reduced.set_index('id'))
+            tracks_albums_join = tracks_albums_join.reset_index()
+            tracks_albums_lyrics_join = tracks_albums_join.set_index("id").join(lyrics_features_frame.set_index("track_id"))
+            tracks_albums_lyrics_join = tracks_albums_lyrics_join.reset_index()
+
+            # Remaining drops
+            result = tracks_albums_lyrics_join.drop(columns=["artists_id", "album_id"])
+
+            # Summarize the granular genres
+            return self.summarize_genre(result, 'track_genre', genres_to_summarize)
+        except Exception as e:
+            raise e
+
+    def get_artist_values(self, artists_ids: pd.Series, artists_frame: pd.DataFrame) -> pd.DataFrame:
+        """Returns the artist information of every track by joining the exploded artist IDs once against the artists frame.
+           The artists of a track keep the order of the artists frame (as with artists_frame[artists_frame["id"].isin(ids)]),
+           the genres of an artist are taken from its first row in the artists frame. Unknown artist IDs are skipped.
+        Args:
+            artists_ids (pd.Series): The lists of artist IDs (one list per track).
+            artists_frame (pd.DataFrame): The artists data frame (id, name, followers, artist_popularity, genres).
+        Raises:
+            TypeError: Is thrown if artists_ids is not a pd.Series.
+            TypeError: Is thrown if artists_frame is not a pd.DataFrame.
+        Returns:
+            pd.DataFrame: The frame (one row per track, in the order of artists_ids) containing track_genre (list), artists_name (list),
+                          artists_followers (dict) and artists_popularity (dict).
+        """
+        if type(artists_ids) != pd.Series:
+            raise TypeError("artists_ids must be a pd.Series!")
+        if type(artists_frame) != pd.DataFrame:
+            raise TypeError("artists_frame must be a data frame!")
+
+        track_count = len(artists_ids)
+        exploded = pd.DataFrame({"track_position": np.arange(track_count), "artist_id": artists_ids.to_numpy()}).explode("artist_id")
+        exploded = exploded.dropna(subset=["artist_id"]).drop_duplicates()
+        artists = artists_frame[["id", "name", "followers", "artist_popularity"]].assign(artist_position=np.arange(len(artists_frame)))
+
+        # Names, followers and popularity (every matching artist row, in the order of the artists frame)
+        pairs = exploded.merge(artists, left_on="artist_id", right_on="id", how="inner")
+        pairs = pairs.sort_values(["track_position", "artist_position"], kind="stable")
+        track_positions = pairs["track_position"].to_numpy()
+        names = self.__to_lists(track_positions, pairs["name"], track_count)
+        followers = self.__to_lists(track_positions, pairs["followers"], track_count)
+        popularity = self.__to_lists(track_positions, pairs["artist_popularity"], track_count)
+
+        # Genres (parsed once per artist, first row of every artist, in the order of the artist IDs of the track)
+        first_artists = artists_frame.drop_duplicates(subset=["id"], keep="first")
+        artist_genres = pd.DataFrame({"artist_id": first_artists["id"].to_numpy(),
+                                      "genre": [self.parse_list(genres) for genres in first_artists["genres"]]})
+        genre_pairs = exploded.merge(artist_genres, on="artist_id", how="inner").explode("genre").dropna(subset=["genre"])
+        genre_pairs = genre_pairs.drop_duplicates(subset=["track_position", "genre"]).sort_values("track_position", kind="stable")
+        genres = self.__to_lists(genre_pairs["track_position"].to_numpy(), genre_pairs["genre"], track_count)
+
+        return pd.DataFrame({"track_genre": genres,
+                             "artists_name": names,
+                             "artists_followers": [dict(zip(n, f)) for n, f in zip(names, followers)],
+                             "artists_popularity": [dict(zip(n, p)) for n, p in zip(names, popularity)]})
+
+    def summarize_genre(self, data_frame: pd.DataFrame, genre_key: str, main_genres: list) -> pd.DataFrame:
+        """Summarizes the genres for the data frame by selecting the suitable genre from the main_genres list (see GenreSummarizer).
+           E.g.: ["brazilian pop", "korean pop"] (main_genres = ["pop", "rock"]) -> "pop"
+           Tracks without a main genre are marked as "other".
+        Args:
+            data_frame (pd.DataFrame): The input data frame.
+            genre_key (str): The name of the genre attribute (e.g. "genre").
+            main_genres (list): The list of main genres in the order of their priority (e.g. ["pop", "rock", ...]).
+        Raises:
+            TypeError: Is thrown if data_frame is not a pd.DataFrame.
+            TypeError: Is thrown if genre_key is not a str.
+            TypeError: Is thrown if main_genres is not a list.
+        Returns:
+            pd.DataFrame: The data frame with summarized/aggregated genres.
+        """
+        if type(data_frame) != pd.DataFrame:
+            raise TypeError("data_frame must be pd.DataFrame!")
+        if type(genre_key) != str:
+            raise TypeError("genre_key must be str!")
+        if type(main_genres) != list:
+            raise TypeError("main_genres must be list!")
+
+        key = tuple(main_genres)
+
+        if key not in self.__genre_summarizers:
+            self.__genre_summarizers[key] = GenreSummarizer(main_genres)
+        return self.__genre_summarizers[key].summarize_frame(data_frame, genre_key)
+
+    def parse_list(self, value) -> list:
+        """Parses a list literal (e.g. "['rock', 'pop']", see ListLiteralParser).
+        Args:
+            value: The list literal (lists are returned as they are, missing values as an empty list).
+        Returns:
+            list: The parsed list.
+        """
+        return ListLiteralParser.parse(value)
+
+    def read_frame(self, path: Path) -> pd.DataFrame:
+        """Reads a CSV file of the Spotify dump (the first column is the unnamed row number and is dropped).
+        Args:
+            path (Path): The path to the CSV file.
+        Returns:
+            pd.DataFrame: The data frame.
+        """
+        frame = pd.read_csv(path, sep=",")
+        return frame.drop(frame.columns[0], axis='columns')
+
+    def save_to_csv(self, frame: pd.DataFrame, path: Path):
+        """Saves the data frame to the given path.
+        Args:
+            frame (pd.DataFrame): The input data frame.
+            path (Path): The path to the file.
+        Raises:
+            TypeError: Is thrown if frame is not a pd.DataFrame.
+        """
+        if type(frame) != pd.DataFrame:
+            raise TypeError("result_frame must be a dataframe!")
+        if os.path.exists(path):
+            return
+        frame.to_csv(path, index=False)
+
+    def run(self, config: Config):
+        """Runs the whole preprocessing (reads the CSV files of the config, preprocesses them and saves the result).
+        Args:
+            config (Config): The configuration containing the paths.
+        """
+        result = self.get_preprocessing_result(self.read_frame(config.tracks_path), self.read_frame(config.albums_path),
+                                               self.read_frame(config.artists_path), self.read_frame(config.lyrics_features_path),
+                                               self.MAIN_GENRES)
+        self.save_to_csv(result, config.preprocessed_data_path)
+
+    def __to_lists(self, track_positions: np.ndarray, values: pd.Series, track_count: int) -> list:
+        """Collects the values into one list per track (tracks without values get an empty list).
+        Args:
+            track_positions (np.ndarray): The ascending track positions of the values.
+            values (pd.Series): The values.
+            track_count (int): The number of tracks.
+        Returns:
+            list: The list of lists (one per track).
+        """
+        offsets = np.zeros(track_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(track_positions.astype(np.int64), minlength=track_count), out=offsets[1:])
+        values = values.tolist()
+        return [values[offsets[position]:offsets[position + 1]] for position in range(track_count)]
+
+if __name__ == "__main__":
+    Preprocessor().run(Config())
@@ -0,0 +1,213 @@
+import os
+import sys
+import math
+import time
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from config import Config
+from label_calculator import LabelCalculator
+from instrumentation import shared_instrumentation
+
+# The state of a worker process (set once per process by _initialize_worker())
+_worker_state = {}
+
+def _initialize_worker(memory_name: str, row_count: int, model_bytes: bytes):
+    """Initializes a worker process (attaches the shared memory and loads the model once per process).
+    Args:
+        memory_name (str): The name of the shared memory block.
+        row_count (int): The number of rows.
+        model_bytes (bytes): The pickled KNN classifier.
+    """
+    try:
+        # One thread per process, the parallelism comes from the processes
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+    memory = shared_memory.SharedMemory(name=memory_name)
+    _worker_state["memory"] = memory
+    _worker_state["arrays"] = BatchLabeller.get_arrays(memory, row_count)
+    _worker_state["knn_classifier"] = pickle.loads(model_bytes)
+    _worker_state["label_calculator"] = LabelCalculator()
+
+def _label_shard(start: int, end: int) -> int:
+    """Labels and scores the rows [start:end] of the shared feature matrix (the results are written into the shared output arrays).
+    Args:
+        start (int): The first row (inclusive).
+        end (int): The last row (exclusive).
+    Returns:
+        int: The number of rows that could not be labelled.
+    """
+    features, labels, predicted_labels = _worker_state["arrays"]
+    return BatchLabeller.label_rows(features[start:end], labels[start:end], predicted_labels[start:end],
+                                    _worker_state["label_calculator"], _worker_state["knn_classifier"])
+
+class BatchLabeller:
+    """Represents the multi-core batch labeller of the whole catalogue.
+       Every track gets its rule based label (see LabelCalculator.calculate_labels()) and the label predicted by the KNN classifier,
+       both packed into one byte (see LabelCalculator.pack_label()). The feature matrix and the output arrays live in one shared memory block,
+       the catalogue is split into shards processed by a ProcessPoolExecutor, so a shard is passed to a worker as a pair of row positions
+       (neither data frames nor results are pickled) and the model is unpickled only once per worker.
+    """
+    FEATURE_ATTRIBUTES = ['danceability', 'valence', 'instrumentalness', 'energy']
+    # The value of the rows that cannot be labelled (e.g. missing or out of range features)
+    INVALID_LABEL = -1
+
+    def __init__(self, knn_classifier, worker_count: int = None, shard_size: int = 65536):
+        """Represents the constructor.
+        Args:
+            knn_classifier: The KNN classifier predicting the labels (e.g. a KNeighborsClassifier).
+            worker_count (int, optional): The number of worker processes. Defaults to None (= the number of CPUs).
+            shard_size (int, optional): The maximum number of rows of a shard. Defaults to 65536.
+        Raises:
+            TypeError: Is thrown if knn_classifier does not provide predict().
+            TypeError: Is thrown if worker_count is neither an int nor None.
+            TypeError: Is thrown if shard_size is not an int.
+            ValueError: Is thrown if worker_count or shard_size is less than 1.
+        """
+        if not(callable(getattr(knn_classifier, "predict", None))):
+            raise TypeError("knn_classifier must provide predict()!")
+        if worker_count is not None and type(worker_count) != int:
+            raise TypeError("worker_count must be either an int or None!")
+        if type(shard_size) != int:
+            raise TypeError("shard_size must be an int!")
+        if (worker_count is not None and worker_count < 1) or shard_size < 1:
+            raise ValueError("worker_count and shard_size must be at least 1!")
+
+        self.__knn_classifier = knn_classifier
+        self.__worker_count = (os.cpu_count() or 1) if worker_count is None else worker_count
+        self.__shard_size = shard_size
+        self.__label_calculator = LabelCalculator()
+
+    @shared_instrumentation.timed("batch_labeller.label")
+    def label(self, input_frame: pd.DataFrame) -> tuple:
+        """Labels and scores all tracks of the frame.
+        Args:
+            input_frame (pd.DataFrame): The input data frame (must contain danceability, valence, instrumentalness and energy).
+        Raises:
+            TypeError: Is thrown if input_frame is not a pd.DataFrame.
+        Returns:
+            tuple: The packed rule based labels and the packed predicted labels (np.int16, INVALID_LABEL for rows that cannot be labelled).
+        """
+        if type(input_frame) != pd.DataFrame:
+            raise TypeError("input_frame must be a pd.DataFrame!")
+
+        row_count = len(input_frame)
+        shards = [(start, min(start + self.__get_shard_size(row_count), row_count)) for start in range(0, row_count, self.__get_shard_size(row_count))]
+
+        if self.__worker_count == 1 or len(shards) <= 1:
+            features = self.__get_features(input_frame)
+            labels = np.full(row_count, self.INVALID_LABEL, dtype=np.int16)
+            predicted_labels = np.full(row_count, self.INVALID_LABEL, dtype=np.int16)
+            self.label_rows(features, labels, predicted_labels, self.__label_calculator, self.__knn_classifier)
+            return labels, predicted_labels
+
+        memory = shared_memory.SharedMemory(create=True, size=max(self.get_memory_size(row_count), 1))
+
+        try:
+            features, labels, predicted_labels = self.get_arrays(memory, row_count)
+            features[:] = self.__get_features(input_frame)
+            labels[:] = self.INVALID_LABEL
+            predicted_labels[:] = self.INVALID_LABEL
+
+            with ProcessPoolExecutor(max_workers=min(self.__worker_count, len(shards)), initializer=_initialize_worker,
+                                     initargs=(memory.name, row_count, pickle.dumps(self.__knn_classifier))) as executor:
+                starts, ends = zip(*shards)
+                list(executor.map(_label_shard, starts, ends))
+
+            result = labels.copy(), predicted_labels.copy()
+            del features, labels, predicted_labels
+            return result
+        finally:
+            memory.close()
+            memory.unlink()
+
+    @staticmethod
+    def get_memory_size(row_count: int) -> int:
+        """Returns the size of the shared memory block (feature matrix and output arrays) in bytes.
+        Args:
+            row_count (int): The number of rows.
+        Returns:
+            int: The size in bytes.
+        """
+        return row_count * (len(BatchLabeller.FEATURE_ATTRIBUTES) * 8 + 2 * 2)
+
+    @staticmethod
+    def get_arrays(memory: shared_memory.SharedMemory, row_count: int) -> tuple:
+        """Returns the views of the shared memory block.
+        Args:
+            memory (shared_memory.SharedMemory): The shared memory block (see get_memory_size()).
+            row_count (int): The number of rows.
+        Returns:
+            tuple: The feature matrix (np.float64, one column per feature attribute), the rule based labels and the predicted labels (np.int16).
+        """
+        feature_count = len(BatchLabeller.FEATURE_ATTRIBUTES)
+        features = np.ndarray((row_count, feature_count), dtype=np.float64, buffer=memory.buf)
+        labels = np.ndarray(row_count, dtype=np.int16, buffer=memory.buf, offset=row_count * feature_count * 8)
+        predicted_labels = np.ndarray(row_count, dtype=np.int16, buffer=memory.buf, offset=row_count * (feature_count * 8 + 2))
+        return features, labels, predicted_labels
+
+    @staticmethod
+    def label_rows(features: np.ndarray, labels: np.ndarray, predicted_labels: np.ndarray, label_calculator: LabelCalculator, knn_classifier) -> int:
+        """Labels and scores rows of a feature matrix (the valid rows of the output arrays are overwritten).
+        Args:
+            features (np.ndarray): The feature matrix (one column per feature attribute).
+            labels (np.ndarray): The output array of the rule based labels.
+            predicted_labels (np.ndarray): The output array of the predicted labels.
+            label_calculator (LabelCalculator): The label calculator.
+            knn_classifier: The KNN classifier.
+        Returns:
+            int: The number of rows that could not be labelled.
+        """
+        valid = np.isfinite(features).all(axis=1) & (features >= 0).all(axis=1) & (features <= 1).all(axis=1)
+        valid_rows = np.flatnonzero(valid)
+
+        if len(valid_rows) == 0:
+            return len(features)
+
+        frame = pd.DataFrame(features[valid_rows], columns=BatchLabeller.FEATURE_ATTRIBUTES)
+        labels[valid_rows] = label_calculator.calculate_labels(frame)
+        predicted_labels[valid_rows] = label_calculator.pack_labels(np.asarray(knn_classifier.predict(frame)))
+        return len(features) - len(valid_rows)
+
+    def __get_shard_size(self, row_count: int) -> int:
+        """Returns the shard size (at least four shards per worker, so slow shards are balanced).
+        Args:
+            row_count (int): The number of rows.
+        Returns:
+            int: The shard size.
+        """
+        return max(1, min(self.__shard_size, math.ceil(row_count / (self.__worker_count * 4))))
+
+    def __get_features(self, input_frame: pd.DataFrame) -> np.ndarray:
+        """Returns the feature matrix of the frame.
+        Args:
+            input_frame (pd.DataFrame): The input data frame.
+        Returns:
+            np.ndarray: The feature matrix (np.float64, one column per feature attribute).
+        """
+        features = np.empty((len(input_frame), len(self.FEATURE_ATTRIBUTES)), dtype=np.float64)
+
+        for column, attribute in enumerate(self.FEATURE_ATTRIBUTES):
+            features[:, column] = input_frame[attribute].to_numpy(dtype=np.float64, na_value=np.nan)
+        return features
+
+if __name__ == "__main__":
+    # Usage: python batch_labeller.py <output CSV file> [<number of worker processes>]
+    config = Config()
+    data_frame = pickle.load(open(config.data_frame_path, "rb"))
+    model = pickle.load(open(config.model_path, "rb"))
+    start_time = time.perf_counter()
+    labels, predicted_labels = BatchLabeller(model, int(sys.argv[2]) if len(sys.argv) > 2 else None).label(data_frame)
+    elapsed = time.perf_counter() - start_time
+    label_calculator = LabelCalculator()
+    valid = (labels != BatchLabeller.INVALID_LABEL) & (predicted_labels != BatchLabeller.INVALID_LABEL)
+    pd.DataFrame({"id": data_frame["id"].to_numpy(),
+                  "label": np.where(labels >= 0, label_calculator.unpack_labels(np.clip(labels, 0, 255)), ""),
+                  "predicted_label": np.where(predicted_labels >= 0, label_calculator.unpack_labels(np.clip(predicted_labels, 0, 255)), "")}).to_csv(sys.argv[1], index=False)
+    print(f"{len(data_frame)} tracks labelled in {elapsed:.2f} s ({len(data_frame) / max(elapsed, 1e-9):.0f} tracks/s), "
+          f"{np.mean(labels[valid] == predicted_labels[valid]) if valid.any() else 0:.2%} of the predictions agree with the rule based labels.")
@@ -0,0 +1,171 @@
+import sys
+import pickle
+import numpy as np
+import pandas as pd
+from config import Config
+from label_calculator import LabelCalculator
+from label_index import LabelIndex
+from recommender import Recommender
+from instrumentation import shared_instrumentation
+
+class BatchRecommender:
+    """Represents the batch recommender creating the recommendations for many seed tracks at once (e.g. for offline playlist generation).
+       The seed IDs are resolved by a hash index (track ID -> row position), the labels of all seeds are predicted
+       by one predict() call and every label bucket is sliced only once (seeds with the same label share their recommendations).
+    """
+    FEATURE_ATTRIBUTES = ['danceability', 'valence', 'instrumentalness', 'energy']
+
+    def __init__(self, input_frame: pd.DataFrame, knn_classifier, id_attribute: str = "id", label_index: LabelIndex = None):
+        """Represents the constructor (builds the ID index and, if not passed, the label index).
+        Args:
+            input_frame (pd.DataFrame): The input data frame.
+            knn_classifier: The KNN classifier predicting the labels (e.g. a KNeighborsClassifier).
+            id_attribute (str, optional): The name of the track id attribute. Defaults to "id".
+            label_index (LabelIndex, optional): The label index of input_frame (see Recommender.build_label_index()). Defaults to None (= built here).
+        Raises:
+            TypeError: Is thrown if input_frame is not a pd.DataFrame.
+            TypeError: Is thrown if knn_classifier does not provide predict().
+            TypeError: Is thrown if id_attribute is not a str.
+            TypeError: Is thrown if label_index is neither a LabelIndex nor None.
+            ValueError: Is thrown if label_index was not built for input_frame.
+            e: Error message.
+        """
+        if type(input_frame) != pd.DataFrame:
+            raise TypeError("input_frame must be a pd.DataFrame!")
+        if not(callable(getattr(knn_classifier, "predict", None))):
+            raise TypeError("knn_classifier must provide predict()!")
+        if type(id_attribute) != str:
+            raise TypeError("id_attribute must be a str!")
+        if label_index is not None and type(label_index) != LabelIndex:
+            raise TypeError("label_index must be either a LabelIndex or None!")
+        if label_index is not None and len(label_index) != len(input_frame):
+            raise ValueError("label_index was not built for input_frame!")
+
+        try:
+            self.__input_frame = input_frame
+            self.__knn_classifier = knn_classifier
+            self.__label_calculator = LabelCalculator()
+            self.__label_index = Recommender().build_label_index(input_frame) if label_index is None else label_index
+            # The first row of a track ID wins (as with frame[frame[id_attribute] == track_id].iloc[0])
+            ids = input_frame[id_attribute]
+            first_rows = np.flatnonzero(~ids.duplicated(keep="first").to_numpy())
+            self.__id_index = pd.Index(ids.to_numpy()[first_rows])
+            self.__id_rows = first_rows
+        except Exception as e:
+            raise e
+
+    def get_rows(self, track_ids: list) -> np.ndarray:
+        """Resolves track IDs into row positions.
+        Args:
+            track_ids (list): The track IDs.
+        Raises:
+            TypeError: Is thrown if track_ids is not a list.
+        Returns:
+            np.ndarray: The row positions (-1 for unknown track IDs).
+        """
+        if type(track_ids) != list:
+            raise TypeError("track_ids must be a list!")
+
+        positions = self.__id_index.get_indexer(track_ids)
+        return np.where(positions >= 0, self.__id_rows[positions], -1)
+
+    @shared_instrumentation.timed("batch_recommender.predict_packed_labels")
+    def predict_packed_labels(self, rows: np.ndarray) -> np.ndarray:
+        """Predicts the packed labels (see LabelCalculator.pack_label()) of the given rows by one predict() call.
+        Args:
+            rows (np.ndarray): The row positions.
+        Raises:
+            TypeError: Is thrown if rows is not a np.ndarray.
+        Returns:
+            np.ndarray: The packed labels.
+        """
+        if type(rows) != np.ndarray:
+            raise TypeError("rows must be a np.ndarray!")
+        if len(rows) == 0:
+            return np.zeros(0, dtype=np.uint8)
+
+        features = self.__input_frame.iloc[rows][self.FEATURE_ATTRIBUTES].reset_index(drop=True)
+        return self.__label_calculator.pack_labels(np.asarray(self.__knn_classifier.predict(features)))
+
+    def get_recommended_rows(self, track_ids: list, ignore_unknown: bool = False) -> dict:
+        """Returns the row positions of the recommendations of every seed track.
+        Args:
+            track_ids (list): The seed track IDs.
+            ignore_unknown (bool, optional): If True, unknown track IDs are left out instead of raising an error. Defaults to False.
+        Raises:
+            TypeError: Is thrown if track_ids is not a list.
+            TypeError: Is thrown if ignore_unknown is not a bool.
+            KeyError: Is thrown if a track ID is unknown (and ignore_unknown is False).
+        Returns:
+            dict: The mapping track ID -> ascending (read-only) row positions (seeds with the same label share the array).
+        """
+        if type(track_ids) != list:
+            raise TypeError("track_ids must be a list!")
+        if type(ignore_unknown) != bool:
+            raise TypeError("ignore_unknown must be a bool!")
+
+        unique_ids = list(dict.fromkeys(track_ids))
+        rows = self.get_rows(unique_ids)
+        unknown = rows < 0
+
+        if unknown.any() and not(ignore_unknown):
+            raise KeyError(f"Unknown track IDs detected: {[track_id for track_id, is_unknown in zip(unique_ids, unknown) if is_unknown][:10]}")
+
+        known_ids = [track_id for track_id, is_unknown in zip(unique_ids, unknown) if not(is_unknown)]
+        packed_labels = self.predict_packed_labels(rows[~unknown])
+        buckets, inverse = np.unique(packed_labels, return_inverse=True)
+        bucket_rows = [self.__label_index.get_rows_by_packed_label(int(bucket)) for bucket in buckets]
+        return {track_id: bucket_rows[bucket] for track_id, bucket in zip(known_ids, inverse.ravel())}
+
+    @shared_instrumentation.timed("batch_recommender.recommend")
+    def recommend(self, track_ids: list, ignore_unknown: bool = False) -> dict:
+        """Recommends tracks for every seed track.
+        Args:
+            track_ids (list): The seed track IDs.
+            ignore_unknown (bool, optional): If True, unknown track IDs are left out instead of raising an error. Defaults to False.
+        Raises:
+            TypeError: Is thrown if track_ids is not a list.
+            TypeError: Is thrown if ignore_unknown is not a bool.
+            KeyError: Is thrown if a track ID is unknown (and ignore_unknown is False).
+        Returns:
+            dict: The mapping track ID -> data frame of recommended tracks (seeds with the same label share the frame).
+        """
+        recommended_rows = self.get_recommended_rows(track_ids, ignore_unknown)
+        frames = {}
+        result = {}
+
+        for track_id, rows in recommended_rows.items():
+            if id(rows) not in frames:
+                frames[id(rows)] = self.__input_frame.iloc[rows]
+            result[track_id] = frames[id(rows)]
+        return result
+
+    def write_recommendations(self, track_ids: list, path, id_attribute: str = "id", ignore_unknown: bool = True) -> int:
+        """Writes the recommendations of every seed track as a CSV file (columns seed_id and track_id).
+        Args:
+            track_ids (list): The seed track IDs.
+            path: The path to the CSV file.
+            id_attribute (str, optional): The name of the track id attribute. Defaults to "id".
+            ignore_unknown (bool, optional): If True, unknown track IDs are left out instead of raising an error. Defaults to True.
+        Raises:
+            TypeError: Is thrown if id_attribute is not a str.
+        Returns:
+            int: The number of written rows.
+        """
+        if type(id_attribute) != str:
+            raise TypeError("id_attribute must be a str!")
+
+        recommended_rows = self.get_recommended_rows(track_ids, ignore_unknown)
+        ids = self.__input_frame[id_attribute].to_numpy()
+        seed_ids = np.repeat(np.array(list(recommended_rows.keys()), dtype=object), [len(rows) for rows in recommended_rows.values()])
+        rows = np.concatenate(list(recommended_rows.values())) if len(recommended_rows) > 0 else np.zeros(0, dtype=np.int64)
+        pd.DataFrame({"seed_id": seed_ids, "track_id": ids[rows]}).to_csv(path, index=False)
+        return len(rows)
+
+if __name__ == "__main__":
+    # Usage: python batch_recommender.py <file with one seed track ID per line> <output CSV file>
+    config = Config()
+    data_frame = pickle.load(open(config.data_frame_path, "rb"))
+    model = pickle.load(open(config.model_path, "rb"))
+    seed_ids = [line.strip() for line in open(sys.argv[1]) if line.strip() != ""]
+    print(f"{BatchRecommender(data_frame, model).write_recommendations(seed_ids, sys.argv[2])} rows written.")
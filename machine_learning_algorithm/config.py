@@ -9,7 +9,11 @@ class Config:
         project_path (str): The root project path.
         preprocessed_data_path (str): The path leading to the CSV file containing information about the preprocessed data.   
         model_path (str): The path to the model.       
+        model_artefact_path (str): The path to the compact model artefact (pickle-free alternative to the model).
+        prediction_grid_path (str): The path to the precomputed prediction grid of the model.
         data_frame_path (str): The path to the data.       
+        catalogue_store_path (str): The path to the columnar catalogue store (memory-mapped alternative to the data).
+        profiles_path (str): The path to the directory of the rerun profiles of the app.
         colors_path (str): The path leading to the CSV file containing the color codes.
     """
     project_path: Path = Path(__file__).resolve().parents[1]
@@ -18,7 +22,15 @@ class Config:
     
     model_path: Path = project_path.joinpath("app", "model", "model.pkl")
     
+    model_artefact_path: Path = project_path.joinpath("app", "model", "model.knn")
+    
+    prediction_grid_path: Path = project_path.joinpath("app", "model", "prediction_grid.npy")
+    
     data_frame_path: Path = project_path.joinpath("app", "model", "data.pkl")
     
+    catalogue_store_path: Path = project_path.joinpath("app", "model", "catalogue")
+    
+    profiles_path: Path = project_path.joinpath("profiles")
+    
     colors_path: Path = project_path.joinpath("machine_learning_algorithm", "color_codes.csv")
 
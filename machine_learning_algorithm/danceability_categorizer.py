@@ -1,3 +1,5 @@
+import numpy as np
+
 class DanceabilityCategorizer:
     """Represents the danceability rule-based classifier.
     """
@@ -34,6 +36,39 @@ class DanceabilityCategorizer:
         
         raise ValueError("danceability_value must be within valid range!")
     
+    def categorize_array(self, danceability_values: np.ndarray) -> np.ndarray:
+        """Categorizes an array of danceability values (values between 0 and 1) at once.
+        Args:
+            danceability_values (np.ndarray): The danceability values (values between 0 and 1).
+        Raises:
+            TypeError: Is thrown if danceability_values is not a np.ndarray.
+            TypeError: Is thrown if danceability_values is not a float array.
+            ValueError: Is thrown if any of the danceability_values is less than 0.
+            ValueError: Is thrown if any of the danceability_values is greater than 1.
+            ValueError: Is thrown if any of the danceability_values is out of range (NaN).
+        Returns:
+            np.ndarray: The category digits as np.int8 (positions in get_categories(), 0 = very undanceable, ..., 3 = very danceable).
+        """
+        if type(danceability_values) != np.ndarray:
+            raise TypeError("danceability_values must be a np.ndarray!")
+        if danceability_values.dtype.kind != "f":
+            raise TypeError("danceability_values must be a float array!")
+        if np.any(danceability_values < 0):
+            raise ValueError("danceability_value cannot be negative!")
+        if np.any(danceability_values > 1):
+            raise ValueError("danceability_value cannot be greater than 1!")
+        if np.any(np.isnan(danceability_values)):
+            raise ValueError("danceability_value must be within valid range!")
+        
+        return np.digitize(danceability_values, [0.25, 0.5, 0.75]).astype(np.int8)
+    
+    def get_categories(self) -> list:
+        """Gets the categories ordered from the lowest to the highest value range.
+        Returns:
+            list: The list of categories (very undanceable, undanceable, danceable, very danceable).
+        """
+        return ['very undanceable', 'undanceable', 'danceable', 'very danceable']
+    
     def get_min_inclusive(self, category_name: str) -> float:
         """Gets the minimum value for a given category (inclusive).
         Args:
@@ -1,3 +1,5 @@
+import numpy as np
+
 class EnergyCategorizer:
     """Represents the energy rule-based classifier.
     """
@@ -34,6 +36,39 @@ class EnergyCategorizer:
         
         raise ValueError("energy_value must be within valid range!")
     
+    def categorize_array(self, energy_values: np.ndarray) -> np.ndarray:
+        """Categorizes an array of energy values (values between 0 and 1) at once.
+        Args:
+            energy_values (np.ndarray): The energy values (values between 0 and 1).
+        Raises:
+            TypeError: Is thrown if energy_values is not a np.ndarray.
+            TypeError: Is thrown if energy_values is not a float array.
+            ValueError: Is thrown if any of the energy_values is less than 0.
+            ValueError: Is thrown if any of the energy_values is greater than 1.
+            ValueError: Is thrown if any of the energy_values is out of range (NaN).
+        Returns:
+            np.ndarray: The category digits as np.int8 (positions in get_categories(), 0 = very low, ..., 3 = very high).
+        """
+        if type(energy_values) != np.ndarray:
+            raise TypeError("energy_values must be a np.ndarray!")
+        if energy_values.dtype.kind != "f":
+            raise TypeError("energy_values must be a float array!")
+        if np.any(energy_values < 0):
+            raise ValueError("energy_value cannot be negative!")
+        if np.any(energy_values > 1):
+            raise ValueError("energy_value cannot be greater than 1!")
+        if np.any(np.isnan(energy_values)):
+            raise ValueError("energy_value must be within valid range!")
+        
+        return np.digitize(energy_values, [0.25, 0.5, 0.75]).astype(np.int8)
+    
+    def get_categories(self) -> list:
+        """Gets the categories ordered from the lowest to the highest value range.
+        Returns:
+            list: The list of categories (very low, low, high, very high).
+        """
+        return ['very low', 'low', 'high', 'very high']
+    
     def get_min_inclusive(self, category_name: str) -> float:
         """Gets the minimum value for a given category (inclusive).
         Args:
@@ -0,0 +1,102 @@
+import bisect
+
+class Histogram:
+    """Represents a histogram with fixed bucket bounds (as the Prometheus histograms).
+       Observations are counted in the first bucket whose upper bound is greater or equal, observations above the last bound
+       are only counted in the total (the +Inf bucket).
+    """
+    # Upper bounds suitable for durations in seconds (0.1 ms to 10 s)
+    DEFAULT_BOUNDS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+    def __init__(self, bounds: list = None):
+        """Represents the constructor.
+        Args:
+            bounds (list, optional): The ascending upper bounds of the buckets. Defaults to None (= DEFAULT_BOUNDS).
+        Raises:
+            TypeError: Is thrown if bounds is neither a list nor None.
+            ValueError: Is thrown if bounds is empty or not strictly ascending.
+        """
+        if bounds is not None and type(bounds) != list:
+            raise TypeError("bounds must be either a list or None!")
+
+        bounds = list(self.DEFAULT_BOUNDS) if bounds is None else [float(bound) for bound in bounds]
+
+        if len(bounds) == 0 or any(lower >= upper for lower, upper in zip(bounds, bounds[1:])):
+            raise ValueError("bounds must be a non-empty, strictly ascending list!")
+
+        self.__bounds = bounds
+        self.__bucket_counts = [0] * len(bounds)
+        self.__count = 0
+        self.__sum = 0.0
+        self.__max = None
+
+    def observe(self, value: float):
+        """Records an observation.
+        Args:
+            value (float): The observed value.
+        """
+        index = bisect.bisect_left(self.__bounds, value)
+
+        if index < len(self.__bounds):
+            self.__bucket_counts[index] += 1
+
+        self.__count += 1
+        self.__sum += value
+        self.__max = value if self.__max is None or value > self.__max else self.__max
+
+    def get_count(self) -> int:
+        """Returns the number of observations.
+        Returns:
+            int: The number of observations.
+        """
+        return self.__count
+
+    def get_sum(self) -> float:
+        """Returns the sum of the observations.
+        Returns:
+            float: The sum.
+        """
+        return self.__sum
+
+    def get_cumulative_buckets(self) -> list:
+        """Returns the cumulative bucket counts (the number of observations less or equal to every bound).
+        Returns:
+            list: The (bound, cumulative count) tuples, without the +Inf bucket (= get_count()).
+        """
+        result = []
+        total = 0
+
+        for bound, count in zip(self.__bounds, self.__bucket_counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def get_quantile(self, quantile: float) -> float:
+        """Estimates a quantile (the upper bound of the bucket containing it).
+        Args:
+            quantile (float): The quantile (between 0 and 1).
+        Raises:
+            ValueError: Is thrown if quantile is not between 0 and 1.
+        Returns:
+            float: The estimate (None if there are no observations, the maximum if the quantile lies above the last bound).
+        """
+        if not(0 <= quantile <= 1):
+            raise ValueError("quantile must be between 0 and 1!")
+        if self.__count == 0:
+            return None
+
+        rank = quantile * self.__count
+
+        for bound, total in self.get_cumulative_buckets():
+            if total >= rank:
+                return bound
+        return self.__max
+
+    def to_dict(self) -> dict:
+        """Returns the snapshot of the histogram.
+        Returns:
+            dict: The count, sum, maximum, estimated p50/p90/p99 and the cumulative buckets.
+        """
+        return {"count": self.__count, "sum": self.__sum, "max": self.__max,
+                "p50": self.get_quantile(0.5), "p90": self.get_quantile(0.9), "p99": self.get_quantile(0.99),
+                "buckets": [[bound, total] for bound, total in self.get_cumulative_buckets()]}
@@ -1,3 +1,5 @@
+import numpy as np
+
 class InstrumentalnessCategorizer:
     """Represents the instrumentalness rule-based classifier.
     """
@@ -34,6 +36,39 @@ class InstrumentalnessCategorizer:
         
         raise ValueError("instrumentalness_value must be within valid range!")
     
+    def categorize_array(self, instrumentalness_values: np.ndarray) -> np.ndarray:
+        """Categorizes an array of instrumentalness values (values between 0 and 1) at once.
+        Args:
+            instrumentalness_values (np.ndarray): The instrumentalness values (values between 0 and 1).
+        Raises:
+            TypeError: Is thrown if instrumentalness_values is not a np.ndarray.
+            TypeError: Is thrown if instrumentalness_values is not a float array.
+            ValueError: Is thrown if any of the instrumentalness_values is less than 0.
+            ValueError: Is thrown if any of the instrumentalness_values is greater than 1.
+            ValueError: Is thrown if any of the instrumentalness_values is out of range (NaN).
+        Returns:
+            np.ndarray: The category digits as np.int8 (positions in get_categories(), 0 = very low, ..., 3 = very high).
+        """
+        if type(instrumentalness_values) != np.ndarray:
+            raise TypeError("instrumentalness_values must be a np.ndarray!")
+        if instrumentalness_values.dtype.kind != "f":
+            raise TypeError("instrumentalness_values must be a float array!")
+        if np.any(instrumentalness_values < 0):
+            raise ValueError("instrumentalness_value cannot be negative!")
+        if np.any(instrumentalness_values > 1):
+            raise ValueError("instrumentalness_value cannot be greater than 1!")
+        if np.any(np.isnan(instrumentalness_values)):
+            raise ValueError("instrumentalness_value must be within valid range!")
+        
+        return np.digitize(instrumentalness_values, [0.25, 0.5, 0.75]).astype(np.int8)
+    
+    def get_categories(self) -> list:
+        """Gets the categories ordered from the lowest to the highest value range.
+        Returns:
+            list: The list of categories (very low, low, high, very high).
+        """
+        return ['very low', 'low', 'high', 'very high']
+    
     def get_min_inclusive(self, category_name: str) -> float:
         """Gets the minimum value for a given category (inclusive).
         Args:
@@ -0,0 +1,267 @@
+import os
+import re
+import json
+import time
+import threading
+import functools
+import contextlib
+from collections import deque
+from histogram import Histogram
+
+class Instrumentation:
+    """Represents the process-wide registry of timing spans, counters and histograms.
+       Spans time the stages of the hot paths (their durations are recorded in one histogram per span name) and are collected
+       per thread into interactions, so the stage breakdown of the last Streamlit reruns can be shown (see finish_interaction()).
+       While disabled, span() returns a shared no-op context manager and timed() functions only check one flag.
+       The metrics can be exported as JSON snapshot or in the Prometheus text format.
+    """
+    # Enables the shared instrumentation if set to a value other than "" or "0"
+    ENVIRONMENT_VARIABLE = "RECOMMENDER_INSTRUMENTATION"
+    # The maximum number of stages recorded per interaction
+    MAX_STAGES = 256
+
+    def __init__(self, enabled: bool = False, interaction_count: int = 20):
+        """Represents the constructor.
+        Args:
+            enabled (bool, optional): Whether the metrics are recorded. Defaults to False.
+            interaction_count (int, optional): The number of kept interactions. Defaults to 20.
+        Raises:
+            TypeError: Is thrown if enabled is not a bool.
+            TypeError: Is thrown if interaction_count is not an int.
+            ValueError: Is thrown if interaction_count is less than 1.
+        """
+        if type(enabled) != bool:
+            raise TypeError("enabled must be a bool!")
+        if type(interaction_count) != int:
+            raise TypeError("interaction_count must be an int!")
+        if interaction_count < 1:
+            raise ValueError("interaction_count must be at least 1!")
+
+        self.__enabled = enabled
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        self.__disabled_span = contextlib.nullcontext()
+        self.__counters = {}
+        self.__span_histograms = {}
+        self.__histograms = {}
+        self.__interactions = deque(maxlen=interaction_count)
+
+    def is_enabled(self) -> bool:
+        """Returns whether the metrics are recorded.
+        Returns:
+            bool: True if enabled.
+        """
+        return self.__enabled
+
+    def set_enabled(self, enabled: bool):
+        """Enables or disables the recording.
+        Args:
+            enabled (bool): Whether the metrics are recorded.
+        Raises:
+            TypeError: Is thrown if enabled is not a bool.
+        """
+        if type(enabled) != bool:
+            raise TypeError("enabled must be a bool!")
+
+        self.__enabled = enabled
+
+    def span(self, name: str):
+        """Returns the context manager timing a stage.
+        Args:
+            name (str): The name of the stage (e.g. "refilter_data").
+        Returns:
+            The context manager.
+        """
+        if not(self.__enabled):
+            return self.__disabled_span
+        return self.__record_span(name)
+
+    def timed(self, name: str):
+        """Returns the decorator timing every call of a function as span.
+        Args:
+            name (str): The name of the span.
+        Returns:
+            The decorator.
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not(self.__enabled):
+                    return function(*args, **kwargs)
+
+                with self.__record_span(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def increment(self, name: str, value: int = 1):
+        """Increments a counter.
+        Args:
+            name (str): The name of the counter.
+            value (int, optional): The increment. Defaults to 1.
+        """
+        if not(self.__enabled):
+            return
+
+        with self.__lock:
+            self.__counters[name] = self.__counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        """Records an observation of a histogram.
+        Args:
+            name (str): The name of the histogram.
+            value (float): The observed value.
+        """
+        if not(self.__enabled):
+            return
+
+        with self.__lock:
+            self.__histograms.setdefault(name, Histogram()).observe(value)
+
+    def finish_interaction(self, session: str = None) -> dict:
+        """Collects the stages recorded by the current thread since the last call into an interaction (e.g. at the end of a Streamlit rerun).
+           The interaction is named after its first top level stage (e.g. the callback triggering the rerun).
+        Args:
+            session (str, optional): The session the interaction belongs to (e.g. to show only the interactions of one Streamlit session). Defaults to None.
+        Returns:
+            dict: The interaction (name, session, end time, total duration in ms and the stages), None if no stage was recorded.
+        """
+        stages = getattr(self.__local, "stages", None)
+
+        if not(stages):
+            return None
+
+        stages = sorted(stages, key=lambda stage: stage[1])
+        self.__local.stages = deque(maxlen=self.MAX_STAGES)
+        interaction = {"name": next((name for name, _, _, depth in stages if depth == 0), "rerun"),
+                       "session": session,
+                       "finished": time.time(),
+                       "total_ms": sum(duration for _, _, duration, depth in stages if depth == 0),
+                       "stages": [{"name": name, "ms": duration, "depth": depth} for name, _, duration, depth in stages]}
+
+        with self.__lock:
+            self.__interactions.append(interaction)
+        return interaction
+
+    def get_interactions(self) -> list:
+        """Returns the last interactions.
+        Returns:
+            list: The interactions (the most recent last).
+        """
+        with self.__lock:
+            return list(self.__interactions)
+
+    def get_snapshot(self) -> dict:
+        """Returns the snapshot of all metrics.
+        Returns:
+            dict: The counters, the span durations (seconds) and the histograms.
+        """
+        with self.__lock:
+            return {"enabled": self.__enabled,
+                    "counters": dict(self.__counters),
+                    "spans": {name: histogram.to_dict() for name, histogram in self.__span_histograms.items()},
+                    "histograms": {name: histogram.to_dict() for name, histogram in self.__histograms.items()}}
+
+    def to_json(self) -> str:
+        """Exports the snapshot of all metrics (see get_snapshot()) as JSON.
+        Returns:
+            str: The JSON document.
+        """
+        return json.dumps(self.get_snapshot())
+
+    def to_prometheus(self, prefix: str = "recommender") -> str:
+        """Exports all metrics in the Prometheus text format.
+        Args:
+            prefix (str, optional): The prefix of the metric names. Defaults to "recommender".
+        Returns:
+            str: The metrics.
+        """
+        lines = []
+
+        with self.__lock:
+            for name, value in sorted(self.__counters.items()):
+                metric = f"{prefix}_{self.__sanitize(name)}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+
+            if self.__span_histograms:
+                metric = f"{prefix}_span_duration_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+
+                for name, histogram in sorted(self.__span_histograms.items()):
+                    lines += self.__format_histogram(metric, histogram, f'span="{self.__escape(name)}",')
+
+            for name, histogram in sorted(self.__histograms.items()):
+                metric = f"{prefix}_{self.__sanitize(name)}"
+                lines.append(f"# TYPE {metric} histogram")
+                lines += self.__format_histogram(metric, histogram, "")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Removes all metrics and interactions."""
+        with self.__lock:
+            self.__counters.clear()
+            self.__span_histograms.clear()
+            self.__histograms.clear()
+            self.__interactions.clear()
+
+    @contextlib.contextmanager
+    def __record_span(self, name: str):
+        """Times a stage (records its duration and adds it to the stages of the current thread).
+        Args:
+            name (str): The name of the stage.
+        """
+        local = self.__local
+
+        if not(hasattr(local, "stages")):
+            local.stages = deque(maxlen=self.MAX_STAGES)
+            local.depth = 0
+
+        depth = local.depth
+        local.depth += 1
+        start_time = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start_time
+            local.depth = depth
+            local.stages.append((name, start_time, duration * 1000, depth))
+
+            with self.__lock:
+                self.__span_histograms.setdefault(name, Histogram()).observe(duration)
+
+    def __format_histogram(self, metric: str, histogram: Histogram, labels: str) -> list:
+        """Formats a histogram in the Prometheus text format.
+        Args:
+            metric (str): The metric name.
+            histogram (Histogram): The histogram.
+            labels (str): The labels preceding the le label (e.g. 'span="search",').
+        Returns:
+            list: The lines.
+        """
+        lines = [f'{metric}_bucket{{{labels}le="{bound}"}} {total}' for bound, total in histogram.get_cumulative_buckets()]
+        lines.append(f'{metric}_bucket{{{labels}le="+Inf"}} {histogram.get_count()}')
+        suffix = f"{{{labels.rstrip(',')}}}" if labels else ""
+        lines += [f"{metric}_sum{suffix} {histogram.get_sum()}", f"{metric}_count{suffix} {histogram.get_count()}"]
+        return lines
+
+    def __sanitize(self, name: str) -> str:
+        """Converts a name into a valid Prometheus metric name part.
+        Args:
+            name (str): The name.
+        Returns:
+            str: The sanitized name.
+        """
+        return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+    def __escape(self, value: str) -> str:
+        """Escapes a Prometheus label value.
+        Args:
+            value (str): The value.
+        Returns:
+            str: The escaped value.
+        """
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# The instrumentation shared by all modules (imported as "from instrumentation import shared_instrumentation", so there is one instance per process)
+shared_instrumentation = Instrumentation(os.environ.get(Instrumentation.ENVIRONMENT_VARIABLE, "") not in ("", "0"))
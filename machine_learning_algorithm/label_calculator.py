@@ -1,3 +1,11 @@
+import numpy as np
+import pandas as pd
+from danceability_categorizer import DanceabilityCategorizer
+from energy_categorizer import EnergyCategorizer
+from instrumentalness_categorizer import InstrumentalnessCategorizer
+from valence_categorizer import ValenceCategorizer
+from instrumentation import shared_instrumentation
+
 class LabelCalculator:
     """Represents the label calculator.
     """
@@ -8,6 +16,12 @@ class LabelCalculator:
         self.__set_mood_mapping_dictionary()
         self.__set_instrumentalness_mapping_dictionary()
         self.__set_energy_mapping_dictionary()
+        self.__danceability_categorizer = DanceabilityCategorizer()
+        self.__energy_categorizer = EnergyCategorizer()
+        self.__instrumentalness_categorizer = InstrumentalnessCategorizer()
+        self.__valence_categorizer = ValenceCategorizer()
+        self.__set_category_tables()
+        self.__set_packed_label_tables()
         
     def calculate_label(self, danceability: str, instrumentalness: str, mood: str, energy: str) -> str:
         """Calculates the label based on the given danceability category, instrumentalness category, valence category and energy category.
@@ -44,6 +58,32 @@ class LabelCalculator:
         except Exception as e:
             raise e
         
+    @shared_instrumentation.timed("label_calculator.calculate_labels")
+    def calculate_labels(self, input_frame: pd.DataFrame) -> np.ndarray:
+        """Calculates the labels of all tracks of the frame in one pass.
+           Every label is packed into one byte holding four 2-bit digits in the label order
+           (danceability-digit << 6 | instrumentalness-digit << 4 | valence-digit << 2 | energy-digit),
+           e.g. the label "0,1,2,3" is packed to 0b00011011 = 27.
+        Args:
+            input_frame (pd.DataFrame): The input data frame (must contain danceability, instrumentalness, valence and energy).
+        Raises:
+            TypeError: Is thrown if input_frame is not a pd.DataFrame.
+            e: Error message (e.g. if a value is out of range).
+        Returns:
+            np.ndarray: The packed labels (np.uint8), one per row of input_frame.
+        """
+        if type(input_frame) != pd.DataFrame:
+            raise TypeError("input_frame must be a pd.DataFrame!")
+        
+        try:
+            danceability_digits = self.__danceability_categorizer.categorize_array(input_frame["danceability"].to_numpy(dtype=np.float64))
+            instrumentalness_digits = self.__instrumentalness_categorizer.categorize_array(input_frame["instrumentalness"].to_numpy(dtype=np.float64))
+            mood_digits = self.__valence_categorizer.categorize_array(input_frame["valence"].to_numpy(dtype=np.float64))
+            energy_digits = self.__energy_categorizer.categorize_array(input_frame["energy"].to_numpy(dtype=np.float64))
+            return self.pack_digits(danceability_digits, instrumentalness_digits, mood_digits, energy_digits)
+        except Exception as e:
+            raise e
+        
     def decompose_label(self, label: str) -> dict:
         """Decomposes a label into its categories.
         Args:
@@ -58,6 +98,11 @@ class LabelCalculator:
         if type(label) != str:
             raise TypeError("label must be a str!")
         
+        packed_label = self.__packed_labels_dictionary.get(label)
+        
+        if packed_label is not None:
+            return dict(self.__decomposed_labels[packed_label])
+        
         try:
             splitted = label.split(",")
             
@@ -72,6 +117,138 @@ class LabelCalculator:
         except Exception as e:
             raise e
         
+    def pack_label(self, label: str) -> int:
+        """Packs a label (e.g. "0,1,2,3") into one byte (see calculate_labels()).
+        Args:
+            label (str): The label to pack.
+        Raises:
+            TypeError: Is thrown if label is not a str.
+            ValueError: Is thrown if label is not a valid label.
+        Returns:
+            int: The packed label (between 0 and 255).
+        """
+        if type(label) != str:
+            raise TypeError("label must be a str!")
+        if label not in self.__packed_labels_dictionary:
+            raise ValueError("Invalid label format detected!")
+        
+        return self.__packed_labels_dictionary[label]
+    
+    def unpack_label(self, packed_label: int) -> str:
+        """Unpacks a packed label into its textual representation (e.g. 27 -> "0,1,2,3").
+        Args:
+            packed_label (int): The packed label (between 0 and 255).
+        Raises:
+            TypeError: Is thrown if packed_label is not an int.
+            ValueError: Is thrown if packed_label is out of range.
+        Returns:
+            str: The label.
+        """
+        if not(isinstance(packed_label, (int, np.integer))):
+            raise TypeError("packed_label must be an int!")
+        if packed_label < 0 or packed_label > 255:
+            raise ValueError("packed_label must be between 0 and 255!")
+        
+        return str(self.__labels_table[packed_label])
+    
+    def decompose_packed_label(self, packed_label: int) -> dict:
+        """Decomposes a packed label into its categories.
+        Args:
+            packed_label (int): The packed label (between 0 and 255).
+        Raises:
+            TypeError: Is thrown if packed_label is not an int.
+            ValueError: Is thrown if packed_label is out of range.
+        Returns:
+            dict: The result dictionary containing the values for the specific categories.
+        """
+        if not(isinstance(packed_label, (int, np.integer))):
+            raise TypeError("packed_label must be an int!")
+        if packed_label < 0 or packed_label > 255:
+            raise ValueError("packed_label must be between 0 and 255!")
+        
+        return dict(self.__decomposed_labels[packed_label])
+    
+    def pack_labels(self, labels: np.ndarray) -> np.ndarray:
+        """Packs an array of labels (e.g. the output of the KNN classifier) into bytes.
+        Args:
+            labels (np.ndarray): The labels (e.g. ["0,1,2,3", ...]).
+        Raises:
+            TypeError: Is thrown if labels is not a np.ndarray.
+            ValueError: Is thrown if labels contains an invalid label.
+        Returns:
+            np.ndarray: The packed labels (np.uint8).
+        """
+        if type(labels) != np.ndarray:
+            raise TypeError("labels must be a np.ndarray!")
+        
+        unique_labels, inverse = np.unique(labels, return_inverse=True)
+        unique_packed_labels = np.array([self.pack_label(str(label)) for label in unique_labels], dtype=np.uint8)
+        return unique_packed_labels[inverse.reshape(labels.shape)]
+    
+    def unpack_labels(self, packed_labels: np.ndarray) -> np.ndarray:
+        """Unpacks an array of packed labels into their textual representation.
+        Args:
+            packed_labels (np.ndarray): The packed labels (integers between 0 and 255).
+        Raises:
+            TypeError: Is thrown if packed_labels is not a np.ndarray.
+            TypeError: Is thrown if packed_labels is not an integer array.
+            ValueError: Is thrown if packed_labels contains a value out of range.
+        Returns:
+            np.ndarray: The labels (e.g. ["0,1,2,3", ...]).
+        """
+        if type(packed_labels) != np.ndarray:
+            raise TypeError("packed_labels must be a np.ndarray!")
+        if packed_labels.dtype.kind not in "ui":
+            raise TypeError("packed_labels must be an integer array!")
+        if packed_labels.size > 0 and (packed_labels.min() < 0 or packed_labels.max() > 255):
+            raise ValueError("packed_labels must be between 0 and 255!")
+        
+        return self.__labels_table[packed_labels]
+    
+    def pack_digits(self, danceability_digits: np.ndarray, instrumentalness_digits: np.ndarray, mood_digits: np.ndarray, energy_digits: np.ndarray) -> np.ndarray:
+        """Packs arrays of category digits into bytes (see calculate_labels()).
+        Args:
+            danceability_digits (np.ndarray): The danceability digits (0-3).
+            instrumentalness_digits (np.ndarray): The instrumentalness digits (0-3).
+            mood_digits (np.ndarray): The valence digits (0-3).
+            energy_digits (np.ndarray): The energy digits (0-3).
+        Returns:
+            np.ndarray: The packed labels (np.uint8).
+        """
+        return (np.asarray(danceability_digits, dtype=np.uint8) << 6) | (np.asarray(instrumentalness_digits, dtype=np.uint8) << 4) \
+            | (np.asarray(mood_digits, dtype=np.uint8) << 2) | np.asarray(energy_digits, dtype=np.uint8)
+    
+    def unpack_digits(self, packed_labels: np.ndarray) -> tuple:
+        """Unpacks packed labels into arrays of category digits.
+        Args:
+            packed_labels (np.ndarray): The packed labels (integers between 0 and 255).
+        Returns:
+            tuple: The digit arrays (danceability, instrumentalness, valence, energy) as np.uint8.
+        """
+        packed_labels = np.asarray(packed_labels, dtype=np.uint8)
+        return (packed_labels >> 6, (packed_labels >> 4) & 3, (packed_labels >> 2) & 3, packed_labels & 3)
+    
+    def __set_category_tables(self):
+        """Sets the digit-to-category tables (reverse of the mapping dictionaries).
+        """
+        self.__danceability_categories = sorted(self.__danceability_mapping_dictionary, key=self.__danceability_mapping_dictionary.get)
+        self.__instrumentalness_categories = sorted(self.__instrumentalness_dictionary, key=self.__instrumentalness_dictionary.get)
+        self.__mood_categories = sorted(self.__mood_dictionary, key=self.__mood_dictionary.get)
+        self.__energy_categories = sorted(self.__energy_mapping_dictionary, key=self.__energy_mapping_dictionary.get)
+        
+    def __set_packed_label_tables(self):
+        """Sets the tables used to translate between labels, packed labels and categories.
+        """
+        packed_labels = np.arange(256, dtype=np.uint8)
+        danceability, instrumentalness, mood, energy = self.unpack_digits(packed_labels)
+        self.__labels_table = np.array([f"{d},{i},{m},{e}" for d, i, m, e in zip(danceability, instrumentalness, mood, energy)])
+        self.__packed_labels_dictionary = {str(label): packed_label for packed_label, label in enumerate(self.__labels_table)}
+        self.__decomposed_labels = [{"danceability": self.__danceability_categories[d],
+                                     "instrumentalness": self.__instrumentalness_categories[i],
+                                     "mood": self.__mood_categories[m],
+                                     "energy": self.__energy_categories[e]}
+                                    for d, i, m, e in zip(danceability, instrumentalness, mood, energy)]
+        
     def __set_mood_mapping_dictionary(self):
         """Sets the valence category mapping dictionary (to a digit).
         """
@@ -133,21 +310,16 @@ class LabelCalculator:
         Raises:
             TypeError: Is thrown if digit is not an int.
             ValueError: Is thrown if an invalid digit is detected.
-            e: Error message.
         Returns:
             str: The valence category.
         """
         if type(digit) != int:
             raise TypeError("digit must be an int!")
         
-        try:
-            for k, v in self.__mood_dictionary.items():
-                if v == digit:
-                    return k
-                
+        if digit < 0 or digit >= len(self.__mood_categories):
             raise ValueError("Invalid digit detected!")
-        except Exception as e:
-            raise e
+        
+        return self.__mood_categories[digit]
         
     def __get_instrumentalness_mapping_digit(self, instrumentalness: str) -> int:
         """Returns the mapping digit for the given instrumentalness category.
@@ -174,21 +346,16 @@ class LabelCalculator:
         Raises:
             TypeError: Is thrown if digit is not an int.
             ValueError: Is thrown if an invalid digit is detected.
-            e: Error message.
         Returns:
             str: The instrumentalness category.
         """
         if type(digit) != int:
             raise TypeError("digit must be an int!")
         
-        try:
-            for k, v in self.__instrumentalness_dictionary.items():
-                if v == digit:
-                    return k
-                
+        if digit < 0 or digit >= len(self.__instrumentalness_categories):
             raise ValueError("Invalid digit detected!")
-        except Exception as e:
-            raise e
+        
+        return self.__instrumentalness_categories[digit]
         
     def __get_danceability_mapping_digit(self, danceability: str) -> int:
         """Returns the mapping digit for the given danceability category.
@@ -215,21 +382,16 @@ class LabelCalculator:
         Raises:
             TypeError: Is thrown if digit is not an int.
             ValueError: Is thrown if an invalid digit is detected.
-            e: Error message.
         Returns:
             str: The danceability category.
         """
         if type(digit) != int:
             raise TypeError("digit must be an int!")
         
-        try:
-            for k, v in self.__danceability_mapping_dictionary.items():
-                if v == digit:
-                    return k
-                
+        if digit < 0 or digit >= len(self.__danceability_categories):
             raise ValueError("Invalid digit detected!")
-        except Exception as e:
-            raise e
+        
+        return self.__danceability_categories[digit]
         
     def __get_energy_mapping_digit(self, energy: str) -> int:
         """Returns the mapping digit for the given energy category.
@@ -256,18 +418,13 @@ class LabelCalculator:
         Raises:
             TypeError: Is thrown if digit is not an int.
             ValueError: Is thrown if an invalid digit is detected.
-            e: Error message.
         Returns:
             str: The energy category.
         """
         if type(digit) != int:
             raise TypeError("digit must be an int!")
         
-        try:
-            for k, v in self.__energy_mapping_dictionary.items():
-                if v == digit:
-                    return k
-                
+        if digit < 0 or digit >= len(self.__energy_categories):
             raise ValueError("Invalid digit detected!")
-        except Exception as e:
-            raise e
\ No newline at end of file
+        
+        return self.__energy_categories[digit]
\ No newline at end of file
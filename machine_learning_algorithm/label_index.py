@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+from label_calculator import LabelCalculator
+from danceability_categorizer import DanceabilityCategorizer
+from energy_categorizer import EnergyCategorizer
+from instrumentalness_categorizer import InstrumentalnessCategorizer
+from valence_categorizer import ValenceCategorizer
+
+class LabelIndex:
+    """Represents the inverted label index (packed label -> row positions of the tracks in the bucket).
+       The buckets are the packed labels of LabelCalculator (4^4 = 256 buckets).
+       Every bucket is stored as a contiguous slice of row positions (in frame order).
+    """
+    BUCKET_COUNT = 256
+
+    def __init__(self, input_frame: pd.DataFrame):
+        """Represents the constructor (builds the index).
+        Args:
+            input_frame (pd.DataFrame): The input data frame (must contain danceability, instrumentalness, valence and energy).
+        Raises:
+            TypeError: Is thrown if input_frame is not a pd.DataFrame.
+            e: Error message.
+        """
+        if type(input_frame) != pd.DataFrame:
+            raise TypeError("input_frame must be a pd.DataFrame!")
+
+        # (label part, frame attribute, categorizer) in the label order
+        self.__label_parts = [("danceability", "danceability", DanceabilityCategorizer()),
+                              ("instrumentalness", "instrumentalness", InstrumentalnessCategorizer()),
+                              ("mood", "valence", ValenceCategorizer()),
+                              ("energy", "energy", EnergyCategorizer())]
+        self.__digits = {label_part: {category: digit for digit, category in enumerate(categorizer.get_categories())}
+                         for label_part, _, categorizer in self.__label_parts}
+        self.__label_calculator = LabelCalculator()
+
+        try:
+            self.__row_count = len(input_frame)
+            valid = np.ones(self.__row_count, dtype=bool)
+            digits = []
+
+            for _, attribute, categorizer in self.__label_parts:
+                categories = categorizer.get_categories()
+                edges = np.array([categorizer.get_min_inclusive(category) for category in categories]
+                                 + [categorizer.get_max_exclusive(categories[-1])])
+                values = input_frame[attribute].to_numpy(dtype=np.float64)
+                valid &= (values >= edges[0]) & (values < edges[-1])
+                digits.append(np.clip(np.searchsorted(edges, values, side="right") - 1, 0, len(categories) - 1))
+
+            buckets = self.__label_calculator.pack_digits(*digits)
+            valid_positions = np.flatnonzero(valid)
+            valid_buckets = buckets[valid_positions]
+            self.__row_positions = valid_positions[np.argsort(valid_buckets, kind="stable")]
+            self.__row_positions.flags.writeable = False
+            self.__offsets = np.zeros(self.BUCKET_COUNT + 1, dtype=np.int64)
+            np.cumsum(np.bincount(valid_buckets, minlength=self.BUCKET_COUNT), out=self.__offsets[1:])
+        except Exception as e:
+            raise e
+
+    def __len__(self) -> int:
+        """Returns the number of rows of the indexed frame.
+        Returns:
+            int: The number of rows.
+        """
+        return self.__row_count
+
+    def get_rows(self, danceability_category: str = None, mood: str = None, energy_category: str = None, instrumentalness_category: str = None) -> np.ndarray:
+        """Returns the row positions of the tracks matching the given categories (None acts as a wildcard).
+        Args:
+            danceability_category (str, optional): The danceability category (very undanceable, undanceable, danceable, very danceable). Defaults to None.
+            mood (str, optional): The valence category (very negative, negative, positive, very positive). Defaults to None.
+            energy_category (str, optional): The energy category (very low, low, high, very high). Defaults to None.
+            instrumentalness_category (str, optional): The instrumentalness category (very low, low, high, very high). Defaults to None.
+        Raises:
+            TypeError: Is thrown if danceability_category is neither a str nor None.
+            TypeError: Is thrown if mood is neither a str nor None.
+            TypeError: Is thrown if energy_category is neither a str nor None.
+            TypeError: Is thrown if instrumentalness_category is neither a str nor None.
+            ValueError: Is thrown if an invalid category is passed.
+        Returns:
+            np.ndarray: The ascending (read-only) row positions.
+        """
+        categories = {"danceability": danceability_category, "instrumentalness": instrumentalness_category,
+                      "mood": mood, "energy": energy_category}
+
+        for label_part, category in categories.items():
+            if category is not None and type(category) != str:
+                raise TypeError(f"The {label_part} category must be either a str or None!")
+            if category is not None and category not in self.__digits[label_part]:
+                raise ValueError(f"Invalid {label_part} category detected!")
+
+        digits = [None if categories[label_part] is None else self.__digits[label_part][categories[label_part]]
+                  for label_part, _, _ in self.__label_parts]
+        return self.__get_rows_by_digits(digits)
+
+    def get_rows_by_label(self, label: str) -> np.ndarray:
+        """Returns the row positions of the tracks matching the given label.
+           Single label parts can be replaced by "*" (e.g. "0,1,*,3" matches every valence category).
+        Args:
+            label (str): The label (e.g. "0,1,2,3" or "0,*,*,3").
+        Raises:
+            TypeError: Is thrown if label is not a str.
+            ValueError: Is thrown if label cannot be decomposed into 4 categories.
+            ValueError: Is thrown if an invalid digit is detected.
+        Returns:
+            np.ndarray: The ascending (read-only) row positions.
+        """
+        if type(label) != str:
+            raise TypeError("label must be a str!")
+
+        splitted = label.split(",")
+
+        if len(splitted) != 4:
+            raise ValueError("Invalid label format detected!")
+
+        digits = []
+
+        for part in splitted:
+            part = part.strip()
+
+            if part == "*":
+                digits.append(None)
+                continue
+            if part not in ["0", "1", "2", "3"]:
+                raise ValueError("Invalid digit detected!")
+            digits.append(int(part))
+
+        return self.__get_rows_by_digits(digits)
+
+    def get_rows_by_packed_label(self, packed_label: int) -> np.ndarray:
+        """Returns the row positions of the tracks with the given packed label (see LabelCalculator.pack_label()).
+        Args:
+            packed_label (int): The packed label (between 0 and 255).
+        Raises:
+            TypeError: Is thrown if packed_label is not an int.
+            ValueError: Is thrown if packed_label is out of range.
+        Returns:
+            np.ndarray: The ascending (read-only) row positions.
+        """
+        if not(isinstance(packed_label, (int, np.integer))):
+            raise TypeError("packed_label must be an int!")
+        if packed_label < 0 or packed_label >= self.BUCKET_COUNT:
+            raise ValueError("packed_label must be between 0 and 255!")
+
+        # np.uint8 labels (e.g. of LabelCalculator.pack_label()) would wrap around at packed_label + 1
+        packed_label = int(packed_label)
+        return self.__row_positions[self.__offsets[packed_label]:self.__offsets[packed_label + 1]]
+
+    def get_bucket_sizes(self) -> np.ndarray:
+        """Returns the number of indexed tracks per packed label.
+        Returns:
+            np.ndarray: The bucket sizes (position = packed label).
+        """
+        return np.diff(self.__offsets)
+
+    def __get_rows_by_digits(self, digits: list) -> np.ndarray:
+        """Returns the row positions of the buckets matching the given digits (None acts as a wildcard).
+        Args:
+            digits (list): The digits in the label order (danceability, instrumentalness, valence, energy).
+        Returns:
+            np.ndarray: The ascending (read-only) row positions.
+        """
+        part_digits = [np.arange(4) if digit is None else np.array([digit]) for digit in digits]
+        # The packed digits are np.uint8, so bucket + 1 would wrap around for the last bucket
+        buckets = self.__label_calculator.pack_digits(*[grid.ravel() for grid in np.meshgrid(*part_digits, indexing="ij")]).astype(np.int64)
+
+        if len(buckets) == 1:
+            return self.get_rows_by_packed_label(int(buckets[0]))
+
+        result = np.sort(np.concatenate([self.__row_positions[self.__offsets[bucket]:self.__offsets[bucket + 1]] for bucket in buckets]))
+        result.flags.writeable = False
+        return result
@@ -0,0 +1,67 @@
+import threading
+
+class LazyModel:
+    """Represents a model that is loaded on its first use (e.g. the pickled KNeighborsClassifier, whose unpickling imports scikit-learn).
+       The model is loaded once by the loader (concurrent first calls wait for it), afterwards predict() and all other attributes
+       are passed to the loaded model, so the lazy model can be used instead of the model itself.
+    """
+    def __init__(self, loader):
+        """Represents the constructor.
+        Args:
+            loader: The function loading the model () -> model (the model must provide predict()).
+        Raises:
+            TypeError: Is thrown if loader is not callable.
+        """
+        if not(callable(loader)):
+            raise TypeError("loader must be callable!")
+
+        self.__loader = loader
+        self.__model = None
+        self.__lock = threading.Lock()
+
+    def is_loaded(self) -> bool:
+        """Checks whether the model is already loaded.
+        Returns:
+            bool: True if loaded.
+        """
+        return self.__model is not None
+
+    def get_model(self):
+        """Returns the model (loaded on the first call).
+        Raises:
+            TypeError: Is thrown if the loaded model does not provide predict().
+        Returns:
+            The model.
+        """
+        if self.__model is None:
+            with self.__lock:
+                if self.__model is None:
+                    model = self.__loader()
+
+                    if not(callable(getattr(model, "predict", None))):
+                        raise TypeError("The loaded model must provide predict()!")
+                    self.__model = model
+        return self.__model
+
+    def predict(self, input_data):
+        """Predicts the labels by the model (see KNeighborsClassifier.predict()).
+        Args:
+            input_data: The query features.
+        Returns:
+            The labels.
+        """
+        return self.get_model().predict(input_data)
+
+    def __getattr__(self, name: str):
+        """Returns the attributes of the model (e.g. feature_names_in_ or predict_packed()).
+        Args:
+            name (str): The name of the attribute.
+        Raises:
+            AttributeError: Is thrown if the model does not have the attribute.
+        Returns:
+            The attribute.
+        """
+        # Special attributes (e.g. looked up by pickle or copy) must not load the model
+        if name.startswith("__") or name.startswith("_LazyModel__"):
+            raise AttributeError(name)
+        return getattr(self.get_model(), name)
@@ -0,0 +1,311 @@
+import os
+import sys
+import json
+import time
+import pickle
+import struct
+import threading
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from config import Config
+from label_calculator import LabelCalculator
+from instrumentation import shared_instrumentation
+
+class ModelArtefact:
+    """Represents the fitted KNN classifier stored in the compact, pickle-free model artefact format (and the predictor rebuilt from it).
+       File layout (little endian):
+       * magic bytes (8 bytes), format version (uint32), header length (uint32)
+       * JSON header (hyperparameters, feature names, array offsets), padded to ALIGNMENT bytes
+       * training feature matrix (float32, row-major, one column per feature)
+       * packed training labels (uint8, see LabelCalculator.pack_label())
+       Loading parses only the header and memory-maps the arrays, so no pickle is executed and the pages are shared between processes.
+       The prediction equals KNeighborsClassifier.predict() (euclidean distance, uniform or distance weights,
+       vote ties resolved in favour of the smallest label); only neighbours tied with the k-th distance may be chosen differently.
+    """
+    MAGIC = b"SPOTKNN\x00"
+    FORMAT_VERSION = 1
+    ALIGNMENT = 64
+    PACKED_LABEL_COUNT = 256
+    # Upper bound of the number of distances computed at once (query rows x training rows)
+    BLOCK_ELEMENTS = 1 << 22
+    # From this number of queries on, a KD tree is built once (if scikit-learn is available) instead of scanning all training rows per query
+    TREE_QUERY_COUNT = 64
+
+    def __init__(self, features: np.ndarray, packed_labels: np.ndarray, n_neighbors: int, weights: str, feature_names: list):
+        """Represents the constructor.
+        Args:
+            features (np.ndarray): The training feature matrix (float32).
+            packed_labels (np.ndarray): The packed training labels (uint8).
+            n_neighbors (int): The number of neighbours.
+            weights (str): The weight function ("uniform" or "distance").
+            feature_names (list): The names of the features (in the column order of features).
+        Raises:
+            TypeError: Is thrown if features or packed_labels is not a np.ndarray.
+            ValueError: Is thrown if the shapes of features, packed_labels and feature_names do not match.
+            ValueError: Is thrown if n_neighbors is not between 1 and the number of training rows.
+            ValueError: Is thrown if weights is neither "uniform" nor "distance".
+        """
+        if not(isinstance(features, np.ndarray)) or not(isinstance(packed_labels, np.ndarray)):
+            raise TypeError("features and packed_labels must be np.ndarrays!")
+        if features.ndim != 2 or packed_labels.shape != (features.shape[0],) or features.shape[1] != len(feature_names):
+            raise ValueError("The shapes of features, packed_labels and feature_names do not match!")
+        if n_neighbors < 1 or n_neighbors > features.shape[0]:
+            raise ValueError("n_neighbors must be between 1 and the number of training rows!")
+        if weights not in ["uniform", "distance"]:
+            raise ValueError("weights must be either uniform or distance!")
+
+        self.__features = features
+        self.__packed_labels = packed_labels
+        self.__n_neighbors = int(n_neighbors)
+        self.__weights = weights
+        self.__feature_names = [str(name) for name in feature_names]
+        self.__squared_norms = np.einsum("ij,ij->i", features, features, dtype=np.float32)
+        self.__label_calculator = LabelCalculator()
+        self.__tree = None
+        self.__tree_lock = threading.Lock()
+
+    def __reduce__(self) -> tuple:
+        """Returns the pickle representation (the arrays are copied, the KD tree is rebuilt on demand).
+        Returns:
+            tuple: The constructor and its arguments.
+        """
+        return (ModelArtefact, (np.asarray(self.__features), np.asarray(self.__packed_labels), self.__n_neighbors, self.__weights, self.__feature_names))
+
+    @property
+    def n_neighbors(self) -> int:
+        """Returns the number of neighbours.
+        Returns:
+            int: The number of neighbours.
+        """
+        return self.__n_neighbors
+
+    @property
+    def feature_names_in_(self) -> np.ndarray:
+        """Returns the feature names (as KNeighborsClassifier.feature_names_in_).
+        Returns:
+            np.ndarray: The feature names.
+        """
+        return np.array(self.__feature_names, dtype=object)
+
+    def __len__(self) -> int:
+        """Returns the number of training rows.
+        Returns:
+            int: The number of training rows.
+        """
+        return len(self.__packed_labels)
+
+    @staticmethod
+    def from_classifier(knn_classifier) -> "ModelArtefact":
+        """Creates the artefact of a fitted KNeighborsClassifier.
+        Args:
+            knn_classifier (KNeighborsClassifier): The fitted classifier (euclidean metric, labels in the format of LabelCalculator).
+        Raises:
+            ValueError: Is thrown if the classifier uses another metric than the euclidean distance.
+        Returns:
+            ModelArtefact: The artefact.
+        """
+        if getattr(knn_classifier, "effective_metric_", None) != "euclidean":
+            raise ValueError("Only classifiers using the euclidean distance are supported!")
+
+        feature_names = getattr(knn_classifier, "feature_names_in_", None)
+        features = np.ascontiguousarray(knn_classifier._fit_X, dtype=np.float32)
+        feature_names = [f"x{column}" for column in range(features.shape[1])] if feature_names is None else list(feature_names)
+        packed_classes = LabelCalculator().pack_labels(np.asarray(knn_classifier.classes_).astype(str))
+        return ModelArtefact(features, packed_classes[np.asarray(knn_classifier._y)], int(knn_classifier.n_neighbors),
+                             knn_classifier.weights, feature_names)
+
+    def save(self, path: Path):
+        """Writes the artefact (the file is replaced atomically).
+        Args:
+            path (Path): The path of the artefact file.
+        """
+        path = Path(path)
+        feature_bytes = self.__features.shape[0] * self.__features.shape[1] * 4
+        header = {"n_neighbors": self.__n_neighbors, "weights": self.__weights, "metric": "euclidean", "feature_names": self.__feature_names,
+                  "row_count": int(self.__features.shape[0]), "feature_count": int(self.__features.shape[1]),
+                  "features_offset": 10 ** 18, "labels_offset": 10 ** 18}
+        # The offsets are part of the header, so the space of the header is reserved for the longest possible offsets
+        header["features_offset"] = self.__align(len(self.MAGIC) + 8 + len(json.dumps(header).encode("utf-8")))
+        header["labels_offset"] = self.__align(header["features_offset"] + feature_bytes)
+        header_bytes = json.dumps(header).encode("utf-8")
+        part_path = path.with_name(path.name + ".part")
+
+        with open(part_path, "wb") as artefact_file:
+            artefact_file.write(self.MAGIC + struct.pack("<II", self.FORMAT_VERSION, len(header_bytes)) + header_bytes)
+            artefact_file.write(b"\x00" * (header["features_offset"] - artefact_file.tell()))
+            artefact_file.write(np.ascontiguousarray(self.__features, dtype="<f4").tobytes())
+            artefact_file.write(b"\x00" * (header["labels_offset"] - artefact_file.tell()))
+            artefact_file.write(np.ascontiguousarray(self.__packed_labels, dtype=np.uint8).tobytes())
+        os.replace(part_path, path)
+
+    @staticmethod
+    def load(path: Path) -> "ModelArtefact":
+        """Loads (memory-maps) an artefact file.
+        Args:
+            path (Path): The path of the artefact file.
+        Raises:
+            FileNotFoundError: Is thrown if the file does not exist.
+            ValueError: Is thrown if the file is not a model artefact or was written in an unsupported format version.
+        Returns:
+            ModelArtefact: The artefact.
+        """
+        path = Path(path)
+
+        with open(path, "rb") as artefact_file:
+            prefix = artefact_file.read(len(ModelArtefact.MAGIC) + 8)
+
+            if len(prefix) < len(ModelArtefact.MAGIC) + 8 or prefix[:len(ModelArtefact.MAGIC)] != ModelArtefact.MAGIC:
+                raise ValueError(f"{path} is not a model artefact!")
+
+            version, header_length = struct.unpack("<II", prefix[len(ModelArtefact.MAGIC):])
+
+            if version != ModelArtefact.FORMAT_VERSION:
+                raise ValueError(f"Unsupported model artefact version {version}!")
+            header = json.loads(artefact_file.read(header_length).decode("utf-8"))
+
+        row_count = header["row_count"]
+        feature_count = header["feature_count"]
+
+        if path.stat().st_size < header["labels_offset"] + row_count:
+            raise ValueError(f"{path} is truncated!")
+
+        features = np.memmap(path, dtype="<f4", mode="r", offset=header["features_offset"], shape=(row_count, feature_count))
+        packed_labels = np.memmap(path, dtype=np.uint8, mode="r", offset=header["labels_offset"], shape=(row_count,))
+        return ModelArtefact(features, packed_labels, header["n_neighbors"], header["weights"], header["feature_names"])
+
+    @staticmethod
+    def exists(path: Path) -> bool:
+        """Checks whether the artefact file exists.
+        Args:
+            path (Path): The path of the artefact file.
+        Returns:
+            bool: True if the artefact exists.
+        """
+        return Path(path).is_file()
+
+    def predict(self, input_data) -> np.ndarray:
+        """Predicts the labels (as KNeighborsClassifier.predict()).
+        Args:
+            input_data: The query features (pd.DataFrame with the feature names as columns or a 2D array-like in the feature order).
+        Returns:
+            np.ndarray: The labels (object array of str as returned by the KNN classifier, e.g. ["0,1,2,3", ...]).
+        """
+        return self.__label_calculator.unpack_labels(self.predict_packed(input_data)).astype(object)
+
+    @shared_instrumentation.timed("model_artefact.predict")
+    def predict_packed(self, input_data) -> np.ndarray:
+        """Predicts the packed labels (see LabelCalculator.pack_label()).
+        Args:
+            input_data: The query features (pd.DataFrame with the feature names as columns or a 2D array-like in the feature order).
+        Raises:
+            ValueError: Is thrown if the query features are not a 2D array with one column per feature.
+            ValueError: Is thrown if the query features contain missing or infinite values.
+        Returns:
+            np.ndarray: The packed labels (np.uint8).
+        """
+        if type(input_data) == pd.DataFrame and all(name in input_data.columns for name in self.__feature_names):
+            input_data = input_data[self.__feature_names]
+
+        queries = np.asarray(input_data, dtype=np.float64)
+
+        if queries.ndim != 2 or queries.shape[1] != len(self.__feature_names):
+            raise ValueError(f"The query features must be a 2D array with {len(self.__feature_names)} columns!")
+        if not(np.isfinite(queries).all()):
+            raise ValueError("The query features must not contain missing or infinite values!")
+
+        tree = self.__get_tree() if len(queries) >= self.TREE_QUERY_COUNT else None
+
+        if tree is not None:
+            distances, neighbours = tree.query(queries, k=self.__n_neighbors)
+            return self.__vote(neighbours, distances)
+
+        result = np.empty(len(queries), dtype=np.uint8)
+        block_size = max(1, self.BLOCK_ELEMENTS // max(len(self), 1))
+
+        for start in range(0, len(queries), block_size):
+            result[start:start + block_size] = self.__predict_block(queries[start:start + block_size])
+        return result
+
+    def __predict_block(self, queries: np.ndarray) -> np.ndarray:
+        """Predicts the packed labels of a block of queries.
+        Args:
+            queries (np.ndarray): The query features.
+        Returns:
+            np.ndarray: The packed labels.
+        """
+        k = self.__n_neighbors
+        query_block = queries.astype(np.float32)
+        # ||q - x||^2 = ||q||^2 - 2 q.x + ||x||^2 (the norm of q does not change the ranking of a row)
+        distances = self.__squared_norms[np.newaxis, :] - 2 * (query_block @ self.__features.T)
+        neighbours = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        neighbour_distances = None
+
+        if self.__weights == "distance":
+            neighbour_distances = np.sqrt(np.maximum(np.take_along_axis(distances, neighbours, axis=1).astype(np.float64)
+                                                     + np.square(queries).sum(axis=1, keepdims=True), 0))
+        return self.__vote(neighbours, neighbour_distances)
+
+    def __vote(self, neighbours: np.ndarray, distances: np.ndarray) -> np.ndarray:
+        """Predicts the packed labels by the votes of the neighbours.
+        Args:
+            neighbours (np.ndarray): The training rows of the neighbours (one row per query).
+            distances (np.ndarray): The distances of the neighbours (only used for distance weights).
+        Returns:
+            np.ndarray: The packed labels.
+        """
+        labels = np.asarray(self.__packed_labels)[neighbours]
+        votes = np.zeros((len(neighbours), self.PACKED_LABEL_COUNT), dtype=np.float64)
+
+        if self.__weights == "uniform":
+            weights = np.ones(labels.shape, dtype=np.float64)
+        else:
+            exact = distances == 0
+            # As in scikit-learn, exact matches outvote every other neighbour
+            weights = np.where(exact.any(axis=1, keepdims=True), exact.astype(np.float64), 1 / np.where(exact, 1, distances))
+
+        np.add.at(votes, (np.repeat(np.arange(len(neighbours)), labels.shape[1]), labels.ravel()), weights.ravel())
+        # argmax returns the first maximum, i.e. the smallest packed label (= the smallest label string, as in scikit-learn)
+        return np.argmax(votes, axis=1).astype(np.uint8)
+
+    def __get_tree(self):
+        """Returns the KD tree of the training rows (built on the first call).
+        Returns:
+            KDTree: The KD tree (None if scikit-learn is not available).
+        """
+        if self.__tree is None:
+            with self.__tree_lock:
+                if self.__tree is None:
+                    try:
+                        from sklearn.neighbors import KDTree
+                    except ImportError:
+                        return None
+                    self.__tree = KDTree(np.asarray(self.__features, dtype=np.float64))
+        return self.__tree
+
+    def __align(self, offset: int) -> int:
+        """Rounds an offset up to the next multiple of ALIGNMENT.
+        Args:
+            offset (int): The offset.
+        Returns:
+            int: The aligned offset.
+        """
+        return (offset + self.ALIGNMENT - 1) // self.ALIGNMENT * self.ALIGNMENT
+
+if __name__ == "__main__":
+    # Converts the pickled model into the model artefact (python model_artefact.py [model.pkl] [artefact file])
+    config = Config()
+    source_path = Path(sys.argv[1]) if len(sys.argv) > 1 else config.model_path
+    target_path = Path(sys.argv[2]) if len(sys.argv) > 2 else config.model_artefact_path
+    start_time = time.perf_counter()
+    model = pickle.load(open(source_path, "rb"))
+    pickle_load_time = time.perf_counter() - start_time
+    ModelArtefact.from_classifier(model).save(target_path)
+    start_time = time.perf_counter()
+    artefact = ModelArtefact.load(target_path)
+    artefact_load_time = time.perf_counter() - start_time
+    queries = np.asarray(model._fit_X[:: max(1, len(model._fit_X) // 5000)], dtype=np.float64)
+    agreement = np.mean(artefact.predict(queries) == np.asarray(model.predict(pd.DataFrame(queries, columns=model.feature_names_in_))).astype(str))
+    print(f"{source_path}: {os.path.getsize(source_path)} bytes, loaded in {pickle_load_time * 1000:.1f} ms")
+    print(f"{target_path}: {os.path.getsize(target_path)} bytes, loaded in {artefact_load_time * 1000:.1f} ms")
+    print(f"{agreement:.2%} of {len(queries)} predictions agree with the pickled model.")
@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+from instrumentation import shared_instrumentation
+
+class NearestNeighbourRecommender:
+    """Represents the nearest neighbour recommender returning the k tracks closest to a query (ranked by the euclidean distance).
+       The feature matrix is built once; a query is answered by a blocked brute-force scan keeping only the k best
+       candidates per block (np.partition), so the result and the memory of a query are bounded by k.
+       The search can be restricted to candidate rows (e.g. the bucket of a label, see LabelIndex, or a genre, see get_genre_rows()).
+    """
+    FEATURE_ATTRIBUTES = ['danceability', 'valence', 'instrumentalness', 'energy']
+    BLOCK_SIZE = 16384
+
+    def __init__(self, input_frame: pd.DataFrame, genre_attribute: str = "track_genre"):
+        """Represents the constructor (builds the feature matrix and the genre index).
+        Args:
+            input_frame (pd.DataFrame): The input data frame (must contain danceability, valence, instrumentalness and energy).
+            genre_attribute (str, optional): The name of the genre attribute (the genre index is skipped if the frame does not contain it). Defaults to "track_genre".
+        Raises:
+            TypeError: Is thrown if input_frame is not a pd.DataFrame.
+            TypeError: Is thrown if genre_attribute is not a str.
+            e: Error message.
+        """
+        if type(input_frame) != pd.DataFrame:
+            raise TypeError("input_frame must be a pd.DataFrame!")
+        if type(genre_attribute) != str:
+            raise TypeError("genre_attribute must be a str!")
+
+        try:
+            self.__row_count = len(input_frame)
+            features = np.empty((self.__row_count, len(self.FEATURE_ATTRIBUTES)), dtype=np.float64)
+
+            for column, attribute in enumerate(self.FEATURE_ATTRIBUTES):
+                features[:, column] = input_frame[attribute].to_numpy(dtype=np.float64)
+
+            # Rows with missing features can never be recommended (their distance is infinite)
+            features[~np.isfinite(features).all(axis=1)] = np.inf
+            self.__features = features
+            self.__features.flags.writeable = False
+            self.__genre_rows = {}
+
+            if genre_attribute in input_frame.columns:
+                codes, genres = pd.factorize(input_frame[genre_attribute])
+                order = np.argsort(codes, kind="stable")
+                offsets = np.searchsorted(codes[order], np.arange(len(genres) + 1))
+
+                for code, genre in enumerate(genres):
+                    self.__genre_rows[genre] = order[offsets[code]:offsets[code + 1]]
+        except Exception as e:
+            raise e
+
+    def __len__(self) -> int:
+        """Returns the number of rows of the indexed frame.
+        Returns:
+            int: The number of rows.
+        """
+        return self.__row_count
+
+    def get_features(self, row: int) -> np.ndarray:
+        """Returns the features of a row (in the order of FEATURE_ATTRIBUTES).
+        Args:
+            row (int): The row position.
+        Raises:
+            TypeError: Is thrown if row is not an int.
+            IndexError: Is thrown if row is out of range.
+        Returns:
+            np.ndarray: The features.
+        """
+        if not(isinstance(row, (int, np.integer))):
+            raise TypeError("row must be an int!")
+        if row < 0 or row >= self.__row_count:
+            raise IndexError("row is out of range!")
+
+        return self.__features[row]
+
+    def get_genre_rows(self, genre: str) -> np.ndarray:
+        """Returns the row positions of the tracks of a genre.
+        Args:
+            genre (str): The genre.
+        Raises:
+            TypeError: Is thrown if genre is not a str.
+        Returns:
+            np.ndarray: The ascending row positions (empty if the genre is unknown).
+        """
+        if type(genre) != str:
+            raise TypeError("genre must be a str!")
+
+        return self.__genre_rows.get(genre, np.zeros(0, dtype=np.int64))
+
+    @shared_instrumentation.timed("nearest_neighbour_recommender.get_nearest_rows")
+    def get_nearest_rows(self, features: np.ndarray, k: int, candidate_rows: np.ndarray = None, excluded_rows: np.ndarray = None) -> tuple:
+        """Returns the k rows nearest to the query features.
+           Equal distances are ranked by the row position, so the result is deterministic.
+        Args:
+            features (np.ndarray): The query features (in the order of FEATURE_ATTRIBUTES).
+            k (int): The maximum number of rows.
+            candidate_rows (np.ndarray, optional): The row positions the search is restricted to. Defaults to None (all rows).
+            excluded_rows (np.ndarray, optional): The row positions that must not be returned (e.g. the query track). Defaults to None.
+        Raises:
+            TypeError: Is thrown if features is not a np.ndarray.
+            TypeError: Is thrown if k is not an int.
+            TypeError: Is thrown if candidate_rows is neither a np.ndarray nor None.
+            TypeError: Is thrown if excluded_rows is neither a np.ndarray nor None.
+            ValueError: Is thrown if features does not contain one value per feature attribute.
+            ValueError: Is thrown if k is negative.
+        Returns:
+            tuple: The row positions (ranked by the distance) and their distances.
+        """
+        if type(features) != np.ndarray:
+            raise TypeError("features must be a np.ndarray!")
+        if not(isinstance(k, (int, np.integer))):
+            raise TypeError("k must be an int!")
+        if candidate_rows is not None and type(candidate_rows) != np.ndarray:
+            raise TypeError("candidate_rows must be either a np.ndarray or None!")
+        if excluded_rows is not None and type(excluded_rows) != np.ndarray:
+            raise TypeError("excluded_rows must be either a np.ndarray or None!")
+        if features.shape != (len(self.FEATURE_ATTRIBUTES),):
+            raise ValueError(f"features must contain {len(self.FEATURE_ATTRIBUTES)} values!")
+        if k < 0:
+            raise ValueError("k must not be negative!")
+
+        query = features.astype(np.float64)
+        excluded_rows = np.zeros(0, dtype=np.int64) if excluded_rows is None else np.unique(excluded_rows.astype(np.int64))
+        row_count = self.__row_count if candidate_rows is None else len(candidate_rows)
+        best_rows = []
+        best_distances = []
+
+        for start in range(0, row_count, self.BLOCK_SIZE):
+            end = min(start + self.BLOCK_SIZE, row_count)
+
+            if candidate_rows is None:
+                rows = np.arange(start, end)
+                block = self.__features[start:end]
+                excluded = excluded_rows[np.searchsorted(excluded_rows, start):np.searchsorted(excluded_rows, end)] - start
+            else:
+                rows = candidate_rows[start:end].astype(np.int64)
+                block = self.__features[rows]
+                excluded = np.flatnonzero(np.isin(rows, excluded_rows)) if len(excluded_rows) > 0 else excluded_rows
+
+            # Squared distances have the same ranking (the square root is only taken of the result)
+            distances = np.square(block - query).sum(axis=1)
+            distances[excluded] = np.inf
+            selected = self.__select_best(distances, k)
+            best_rows.append(rows[selected])
+            best_distances.append(distances[selected])
+
+        if len(best_rows) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+
+        rows = np.concatenate(best_rows)
+        distances = np.concatenate(best_distances)
+        selected = self.__select_best(distances, k)
+        order = np.lexsort((rows[selected], distances[selected]))
+        result_rows = rows[selected][order]
+        result_distances = distances[selected][order]
+        finite = np.isfinite(result_distances)
+        return result_rows[finite][:k], np.sqrt(result_distances[finite][:k])
+
+    def recommend(self, features: np.ndarray, k: int, input_frame: pd.DataFrame, candidate_rows: np.ndarray = None, excluded_rows: np.ndarray = None) -> pd.DataFrame:
+        """Recommends the k tracks nearest to the query features.
+        Args:
+            features (np.ndarray): The query features (in the order of FEATURE_ATTRIBUTES).
+            k (int): The maximum number of tracks.
+            input_frame (pd.DataFrame): The input data frame (the frame the recommender was built for).
+            candidate_rows (np.ndarray, optional): The row positions the search is restricted to. Defaults to None (all rows).
+            excluded_rows (np.ndarray, optional): The row positions that must not be recommended (e.g. the query track). Defaults to None.
+        Raises:
+            TypeError: Is thrown if input_frame is not a pd.DataFrame.
+            ValueError: Is thrown if the recommender was not built for input_frame.
+        Returns:
+            pd.DataFrame: A data frame consisting of the recommended tracks (ranked by the distance).
+        """
+        if type(input_frame) != pd.DataFrame:
+            raise TypeError("input_frame must be a pd.DataFrame!")
+        if len(input_frame) != self.__row_count:
+            raise ValueError("The recommender was not built for input_frame!")
+
+        rows, _ = self.get_nearest_rows(features, k, candidate_rows, excluded_rows)
+        return input_frame.iloc[rows]
+
+    def __select_best(self, distances: np.ndarray, k: int) -> np.ndarray:
+        """Selects the positions of the k smallest distances (including every position tied with the k-th smallest distance).
+        Args:
+            distances (np.ndarray): The distances.
+            k (int): The number of distances.
+        Returns:
+            np.ndarray: The ascending positions.
+        """
+        if k == 0:
+            return np.zeros(0, dtype=np.int64)
+        if len(distances) <= k:
+            return np.arange(len(distances))
+
+        kth_distance = np.partition(distances, k - 1)[k - 1]
+        return np.flatnonzero(distances <= kth_distance)
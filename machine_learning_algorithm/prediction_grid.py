@@ -0,0 +1,304 @@
+import os
+import sys
+import time
+import pickle
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from config import Config
+from label_calculator import LabelCalculator
+from instrumentation import shared_instrumentation
+
+class PredictionGrid:
+    """Represents the precomputed prediction grid of a KNN classifier over the unit cube [0, 1]^4 of the features.
+       The cube is split into resolution^4 cells (axes in the order of FEATURE_ATTRIBUTES). Every cell stores the packed label
+       the classifier predicts for its center and a boundary flag, set if the prediction of any of its 16 corners differs from it.
+       A prediction is an array lookup; queries in boundary cells (and outside of the cube) are passed to the exact classifier.
+       The grid is approximate: the boundary flags only detect label changes at the corners, so small decision regions of the KNN classifier
+       lying inside a cell are answered with the label of the center (about 0.02 % of uniformly distributed queries at resolution 32,
+       see the report of the command line). Therefore the app and the service only use it if requested (see is_requested()).
+       The grid is stored as one .npy file (labels and boundary flags), which is memory-mapped when loading.
+    """
+    # Enables the prediction grid of the app and the service if set to a value other than "" or "0"
+    ENVIRONMENT_VARIABLE = "RECOMMENDER_PREDICTION_GRID"
+    FEATURE_ATTRIBUTES = ['danceability', 'valence', 'instrumentalness', 'energy']
+    # The value returned by lookup() for queries that have to be predicted by the exact classifier
+    UNRESOLVED = -1
+    PREDICTION_BATCH_SIZE = 1 << 16
+
+    def __init__(self, cells: np.ndarray, fallback_classifier=None):
+        """Represents the constructor.
+        Args:
+            cells (np.ndarray): The uint8 array of shape (2, resolution, resolution, resolution, resolution) (packed labels and boundary flags).
+            fallback_classifier (optional): The exact classifier used for the boundary cells and the queries outside of the cube
+                                            (e.g. a KNeighborsClassifier or a ModelArtefact). Defaults to None (the boundary cells return
+                                            the label of their center, queries outside of the cube cannot be predicted).
+        Raises:
+            TypeError: Is thrown if cells is not a np.ndarray.
+            ValueError: Is thrown if cells does not have the grid shape.
+            TypeError: Is thrown if fallback_classifier does not provide predict().
+        """
+        if not(isinstance(cells, np.ndarray)):
+            raise TypeError("cells must be a np.ndarray!")
+        if cells.dtype != np.uint8 or cells.ndim != 5 or cells.shape[0] != 2 or len(set(cells.shape[1:])) != 1:
+            raise ValueError("cells must be a uint8 array of shape (2, resolution, resolution, resolution, resolution)!")
+        if fallback_classifier is not None and not(callable(getattr(fallback_classifier, "predict", None))):
+            raise TypeError("fallback_classifier must provide predict()!")
+
+        self.__cells = cells
+        self.__resolution = cells.shape[1]
+        self.__labels = cells[0].reshape(-1)
+        self.__boundary = cells[1].reshape(-1)
+        # The labels with the boundary cells set to UNRESOLVED as Python sequence (fast single lookups without numpy overhead)
+        self.__lookup_table = np.where(self.__boundary != 0, self.UNRESOLVED, self.__labels.astype(np.int16)).tolist()
+        self.__fallback_classifier = fallback_classifier
+        self.__label_calculator = LabelCalculator()
+
+    @property
+    def feature_names_in_(self) -> np.ndarray:
+        """Returns the feature names (as KNeighborsClassifier.feature_names_in_).
+        Returns:
+            np.ndarray: The feature names.
+        """
+        return np.array(self.FEATURE_ATTRIBUTES, dtype=object)
+
+    def get_resolution(self) -> int:
+        """Returns the number of cells per axis.
+        Returns:
+            int: The resolution.
+        """
+        return self.__resolution
+
+    def get_boundary_share(self) -> float:
+        """Returns the share of the boundary cells.
+        Returns:
+            float: The share (between 0 and 1).
+        """
+        return float(np.count_nonzero(self.__boundary)) / len(self.__boundary)
+
+    @staticmethod
+    def is_requested() -> bool:
+        """Checks whether the app and the service should use the grid (RECOMMENDER_PREDICTION_GRID, as the grid is approximate).
+        Returns:
+            bool: True if requested.
+        """
+        return os.environ.get(PredictionGrid.ENVIRONMENT_VARIABLE, "") not in ("", "0")
+
+    @staticmethod
+    def build(knn_classifier, resolution: int = 32, fallback_classifier=None) -> "PredictionGrid":
+        """Builds the grid by predicting the centers and the corners of all cells with the classifier.
+        Args:
+            knn_classifier: The classifier (e.g. a KNeighborsClassifier or a ModelArtefact).
+            resolution (int, optional): The number of cells per axis. Defaults to 32 (32^4 cells, (32 + 1)^4 + 32^4 predictions).
+            fallback_classifier (optional): The exact classifier of the grid. Defaults to None.
+        Raises:
+            TypeError: Is thrown if knn_classifier does not provide predict().
+            TypeError: Is thrown if resolution is not an int.
+            ValueError: Is thrown if resolution is less than 1.
+        Returns:
+            PredictionGrid: The grid.
+        """
+        if not(callable(getattr(knn_classifier, "predict", None))):
+            raise TypeError("knn_classifier must provide predict()!")
+        if type(resolution) != int:
+            raise TypeError("resolution must be an int!")
+        if resolution < 1:
+            raise ValueError("resolution must be at least 1!")
+
+        centers = PredictionGrid.__predict_lattice(knn_classifier, (np.arange(resolution) + 0.5) / resolution)
+        corners = PredictionGrid.__predict_lattice(knn_classifier, np.arange(resolution + 1) / resolution)
+        boundary = np.zeros(centers.shape, dtype=bool)
+
+        for offset in np.ndindex(2, 2, 2, 2):
+            boundary |= corners[tuple(slice(o, o + resolution) for o in offset)] != centers
+
+        return PredictionGrid(np.stack([centers, boundary.astype(np.uint8)]), fallback_classifier)
+
+    def save(self, path: Path):
+        """Writes the grid (.npy file).
+        Args:
+            path (Path): The path of the grid file.
+        """
+        path = Path(path)
+        part_path = path.with_name(path.name + ".part.npy")
+        np.save(part_path, np.ascontiguousarray(self.__cells), allow_pickle=False)
+        part_path.replace(path)
+
+    @staticmethod
+    def load(path: Path, fallback_classifier=None) -> "PredictionGrid":
+        """Loads (memory-maps) a grid file.
+        Args:
+            path (Path): The path of the grid file.
+            fallback_classifier (optional): The exact classifier used for the boundary cells. Defaults to None.
+        Raises:
+            FileNotFoundError: Is thrown if the file does not exist.
+        Returns:
+            PredictionGrid: The grid.
+        """
+        return PredictionGrid(np.load(Path(path), mmap_mode="r", allow_pickle=False), fallback_classifier)
+
+    @staticmethod
+    def exists(path: Path) -> bool:
+        """Checks whether the grid file exists.
+        Args:
+            path (Path): The path of the grid file.
+        Returns:
+            bool: True if the grid exists.
+        """
+        return Path(path).is_file()
+
+    def lookup(self, danceability: float, valence: float, instrumentalness: float, energy: float) -> int:
+        """Looks up the packed label of one track (without numpy, for single queries).
+        Args:
+            danceability (float): The danceability.
+            valence (float): The valence.
+            instrumentalness (float): The instrumentalness.
+            energy (float): The energy.
+        Returns:
+            int: The packed label (UNRESOLVED if the exact classifier has to be used).
+        """
+        # Also rejects NaN (all comparisons are False)
+        if not(0 <= danceability <= 1 and 0 <= valence <= 1 and 0 <= instrumentalness <= 1 and 0 <= energy <= 1):
+            return self.UNRESOLVED
+
+        resolution = self.__resolution
+        last = resolution - 1
+        index = min(int(danceability * resolution), last)
+        index = index * resolution + min(int(valence * resolution), last)
+        index = index * resolution + min(int(instrumentalness * resolution), last)
+        return self.__lookup_table[index * resolution + min(int(energy * resolution), last)]
+
+    def predict(self, input_data) -> np.ndarray:
+        """Predicts the labels (as KNeighborsClassifier.predict()).
+        Args:
+            input_data: The query features (pd.DataFrame with the feature names as columns or a 2D array-like in the order of FEATURE_ATTRIBUTES).
+        Returns:
+            np.ndarray: The labels (object array of str as returned by the KNN classifier, e.g. ["0,1,2,3", ...]).
+        """
+        return self.__label_calculator.unpack_labels(self.predict_packed(input_data)).astype(object)
+
+    @shared_instrumentation.timed("prediction_grid.predict")
+    def predict_packed(self, input_data) -> np.ndarray:
+        """Predicts the packed labels (see LabelCalculator.pack_label()).
+        Args:
+            input_data: The query features (pd.DataFrame with the feature names as columns or a 2D array-like in the order of FEATURE_ATTRIBUTES).
+        Raises:
+            ValueError: Is thrown if the query features are not a 2D array with one column per feature.
+            ValueError: Is thrown if a query lies outside of the unit cube (or contains NaN) and there is no fallback classifier.
+        Returns:
+            np.ndarray: The packed labels (np.uint8).
+        """
+        if type(input_data) == pd.DataFrame and all(name in input_data.columns for name in self.FEATURE_ATTRIBUTES):
+            input_data = input_data[self.FEATURE_ATTRIBUTES]
+
+        queries = np.asarray(input_data, dtype=np.float64)
+
+        if queries.ndim != 2 or queries.shape[1] != len(self.FEATURE_ATTRIBUTES):
+            raise ValueError(f"The query features must be a 2D array with {len(self.FEATURE_ATTRIBUTES)} columns!")
+
+        inside = ((queries >= 0) & (queries <= 1)).all(axis=1)
+
+        if self.__fallback_classifier is None and not(inside.all()):
+            raise ValueError("Queries outside of the unit cube (or containing NaN) cannot be predicted without a fallback classifier!")
+
+        cells = self.get_cells(np.where(inside[:, np.newaxis], queries, 0))
+        result = np.asarray(self.__labels[cells])
+        unresolved = np.flatnonzero(~inside | (self.__boundary[cells] != 0))
+
+        if len(unresolved) > 0 and self.__fallback_classifier is not None:
+            result[unresolved] = self.__predict_exact(self.__fallback_classifier, queries[unresolved])
+        return result
+
+    def get_cells(self, queries: np.ndarray) -> np.ndarray:
+        """Returns the flat cell indexes of queries inside the unit cube.
+        Args:
+            queries (np.ndarray): The query features (values between 0 and 1).
+        Returns:
+            np.ndarray: The flat cell indexes.
+        """
+        resolution = self.__resolution
+        coordinates = np.minimum((queries * resolution).astype(np.int64), resolution - 1)
+        return ((coordinates[:, 0] * resolution + coordinates[:, 1]) * resolution + coordinates[:, 2]) * resolution + coordinates[:, 3]
+
+    def get_unresolved_mask(self, input_data) -> np.ndarray:
+        """Returns which queries are predicted by the exact classifier (boundary cells or outside of the unit cube).
+        Args:
+            input_data: The query features.
+        Returns:
+            np.ndarray: The boolean mask.
+        """
+        if type(input_data) == pd.DataFrame and all(name in input_data.columns for name in self.FEATURE_ATTRIBUTES):
+            input_data = input_data[self.FEATURE_ATTRIBUTES]
+
+        queries = np.asarray(input_data, dtype=np.float64)
+        inside = ((queries >= 0) & (queries <= 1)).all(axis=1)
+        return ~inside | (self.__boundary[self.get_cells(np.where(inside[:, np.newaxis], queries, 0))] != 0)
+
+    @staticmethod
+    def __predict_exact(knn_classifier, queries: np.ndarray) -> np.ndarray:
+        """Predicts the packed labels with a classifier (in batches).
+        Args:
+            knn_classifier: The classifier.
+            queries (np.ndarray): The query features.
+        Returns:
+            np.ndarray: The packed labels.
+        """
+        label_calculator = LabelCalculator()
+        result = np.empty(len(queries), dtype=np.uint8)
+
+        for start in range(0, len(queries), PredictionGrid.PREDICTION_BATCH_SIZE):
+            batch = pd.DataFrame(queries[start:start + PredictionGrid.PREDICTION_BATCH_SIZE], columns=PredictionGrid.FEATURE_ATTRIBUTES)
+            result[start:start + len(batch)] = label_calculator.pack_labels(np.asarray(knn_classifier.predict(batch)))
+        return result
+
+    @staticmethod
+    def __predict_lattice(knn_classifier, axis_values: np.ndarray) -> np.ndarray:
+        """Predicts the packed labels of all points of a lattice.
+        Args:
+            knn_classifier: The classifier.
+            axis_values (np.ndarray): The coordinates of the lattice on every axis.
+        Returns:
+            np.ndarray: The packed labels (one axis per feature).
+        """
+        count = len(axis_values)
+        points = np.stack(np.meshgrid(axis_values, axis_values, axis_values, axis_values, indexing="ij"), axis=-1).reshape(-1, 4)
+        return PredictionGrid.__predict_exact(knn_classifier, points).reshape((count,) * 4)
+
+if __name__ == "__main__":
+    # Builds the grid (python prediction_grid.py build [resolution]) or reports its agreement with the exact model
+    # on the catalogue and on uniformly distributed queries (python prediction_grid.py report [number of random queries])
+    config = Config()
+    model = pickle.load(open(config.model_path, "rb"))
+
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        start_time = time.perf_counter()
+        grid = PredictionGrid.build(model, int(sys.argv[2]) if len(sys.argv) > 2 else 32)
+        grid.save(config.prediction_grid_path)
+        print(f"Grid with {grid.get_resolution()}^4 cells ({grid.get_boundary_share():.2%} boundary cells) built in {time.perf_counter() - start_time:.1f} s.")
+    else:
+        data_frame = pickle.load(open(config.data_frame_path, "rb"))
+        features = data_frame[PredictionGrid.FEATURE_ATTRIBUTES].dropna()
+        grid = PredictionGrid.load(config.prediction_grid_path, model)
+        exact = LabelCalculator().pack_labels(np.asarray(model.predict(features)))
+        start_time = time.perf_counter()
+        predicted = grid.predict_packed(features)
+        elapsed = time.perf_counter() - start_time
+        unresolved = grid.get_unresolved_mask(features)
+        values = features.to_numpy(dtype=np.float64)
+        inside = ((values >= 0) & (values <= 1)).all(axis=1)
+        lookup_only = np.asarray(PredictionGrid.load(config.prediction_grid_path).predict_packed(values[inside]))
+        random_queries = pd.DataFrame(np.random.default_rng(0).random((int(sys.argv[2]) if len(sys.argv) > 2 else 200000, 4)),
+                                      columns=PredictionGrid.FEATURE_ATTRIBUTES)
+        random_exact = LabelCalculator().pack_labels(np.asarray(model.predict(random_queries)))
+        random_mismatches = np.count_nonzero(grid.predict_packed(random_queries) != random_exact)
+        start_time = time.perf_counter()
+
+        for danceability, valence, instrumentalness, energy in values[:10000].tolist():
+            grid.lookup(danceability, valence, instrumentalness, energy)
+
+        lookup_time = (time.perf_counter() - start_time) / max(min(len(values), 10000), 1)
+        print(f"Grid resolution: {grid.get_resolution()}, boundary cells: {grid.get_boundary_share():.2%}")
+        print(f"Tracks: {len(features)}, resolved by the lookup: {1 - unresolved.mean():.2%}")
+        print(f"Agreement with the exact model: {np.mean(predicted == exact):.4%} (lookup only, without fallback: {np.mean(lookup_only == exact[inside]):.4%})")
+        print(f"Agreement on {len(random_queries)} uniformly distributed queries: {1 - random_mismatches / len(random_queries):.4%} ({random_mismatches} mismatches)")
+        print(f"Batch prediction: {elapsed / max(len(features), 1) * 1e6:.2f} us per track, single lookup(): {lookup_time * 1e6:.2f} us")
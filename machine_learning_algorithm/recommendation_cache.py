@@ -0,0 +1,128 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+class RecommendationCache:
+    """Represents the process-wide, size-bounded LRU cache of recommendations (row positions).
+       The keys are built by the caller, e.g. (packed label, genre, criteria ranges); as there are only 256 labels,
+       seeds of different sessions usually share their entries. The cached row positions refer to one catalogue,
+       so the cache is cleared as soon as it is used with another catalogue (see set_source()).
+    """
+    def __init__(self, max_size: int = 1024):
+        """Represents the constructor.
+        Args:
+            max_size (int, optional): The maximum number of cached entries. Defaults to 1024.
+        Raises:
+            TypeError: Is thrown if max_size is not an int.
+            ValueError: Is thrown if max_size is less than 1.
+        """
+        if type(max_size) != int:
+            raise TypeError("max_size must be an int!")
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1!")
+
+        self.__max_size = max_size
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__source_key = None
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def __len__(self) -> int:
+        """Returns the number of cached entries.
+        Returns:
+            int: The number of entries.
+        """
+        with self.__lock:
+            return len(self.__entries)
+
+    def set_source(self, source_key):
+        """Sets the key of the catalogue the cached row positions refer to (the cache is cleared if the key changes).
+        Args:
+            source_key: The key of the catalogue (e.g. Catalogue.get_fingerprint()).
+        """
+        with self.__lock:
+            if source_key != self.__source_key:
+                self.__entries.clear()
+                self.__source_key = source_key
+
+    def get(self, key) -> np.ndarray:
+        """Returns the cached row positions of a key.
+        Args:
+            key: The (hashable) key.
+        Returns:
+            np.ndarray: The read-only row positions (None if the key is not cached).
+        """
+        with self.__lock:
+            rows = self.__entries.get(key)
+
+            if rows is None:
+                self.__misses += 1
+                return None
+
+            self.__hits += 1
+            self.__entries.move_to_end(key)
+            return rows
+
+    def put(self, key, rows: np.ndarray) -> np.ndarray:
+        """Caches the row positions of a key (the least recently used entry is evicted if the cache is full).
+        Args:
+            key: The (hashable) key.
+            rows (np.ndarray): The row positions.
+        Raises:
+            TypeError: Is thrown if rows is not a np.ndarray.
+        Returns:
+            np.ndarray: The cached (read-only) row positions.
+        """
+        if type(rows) != np.ndarray:
+            raise TypeError("rows must be a np.ndarray!")
+
+        rows.flags.writeable = False
+
+        with self.__lock:
+            self.__entries[key] = rows
+            self.__entries.move_to_end(key)
+
+            while len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
+                self.__evictions += 1
+        return rows
+
+    def get_or_compute(self, key, compute_function) -> np.ndarray:
+        """Returns the cached row positions of a key or computes and caches them.
+        Args:
+            key: The (hashable) key.
+            compute_function: The function computing the row positions () -> np.ndarray (called without holding the lock).
+        Raises:
+            TypeError: Is thrown if compute_function is not callable.
+        Returns:
+            np.ndarray: The read-only row positions.
+        """
+        if not(callable(compute_function)):
+            raise TypeError("compute_function must be callable!")
+
+        rows = self.get(key)
+
+        if rows is None:
+            rows = self.put(key, compute_function())
+        return rows
+
+    def clear(self):
+        """Removes all entries (the counters are kept).
+        """
+        with self.__lock:
+            self.__entries.clear()
+
+    def get_statistics(self) -> dict:
+        """Returns the counters of the cache.
+        Returns:
+            dict: The number of entries, hits, misses and evictions and the hit rate.
+        """
+        with self.__lock:
+            requests = self.__hits + self.__misses
+            return {"entries": len(self.__entries), "max_size": self.__max_size, "hits": self.__hits, "misses": self.__misses,
+                    "evictions": self.__evictions, "hit_rate": self.__hits / requests if requests > 0 else 0.0}
+
+# The cache shared by all sessions of the process
+shared_recommendation_cache = RecommendationCache()
@@ -1,8 +1,11 @@
 import pandas as pd
+from label_index import LabelIndex
+from nearest_neighbour_recommender import NearestNeighbourRecommender
 from danceability_categorizer import DanceabilityCategorizer
 from energy_categorizer import EnergyCategorizer
 from instrumentalness_categorizer import InstrumentalnessCategorizer
 from valence_categorizer import ValenceCategorizer
+from instrumentation import shared_instrumentation
 
 class Recommender:
     """Represents the recommender.
@@ -15,7 +18,39 @@ class Recommender:
         self.__instrumentalness_categorizer = InstrumentalnessCategorizer()
         self.__valence_categorizer = ValenceCategorizer()
         
-    def recommend(self, danceability_category: str, mood: str, energy_category: str, instrumentalness_category: str, input_frame: pd.DataFrame) -> pd.DataFrame:
+    @shared_instrumentation.timed("recommender.build_label_index")
+    def build_label_index(self, input_frame: pd.DataFrame) -> LabelIndex:
+        """Builds the label index for the given frame (should be done once at load time).
+        Args:
+            input_frame (pd.DataFrame): The input data frame.
+        Raises:
+            TypeError: Is thrown if input_frame is not a pd.DataFrame.
+        Returns:
+            LabelIndex: The label index that can be passed to recommend().
+        """
+        if type(input_frame) != pd.DataFrame:
+            raise TypeError("input_frame must be a pd.DataFrame!")
+        
+        return LabelIndex(input_frame)
+    
+    @shared_instrumentation.timed("recommender.build_nearest_neighbour_recommender")
+    def build_nearest_neighbour_recommender(self, input_frame: pd.DataFrame) -> NearestNeighbourRecommender:
+        """Builds the nearest neighbour recommender for the given frame (should be done once at load time).
+        Args:
+            input_frame (pd.DataFrame): The input data frame.
+        Raises:
+            TypeError: Is thrown if input_frame is not a pd.DataFrame.
+        Returns:
+            NearestNeighbourRecommender: The recommender returning the k nearest tracks (ranked by the distance).
+        """
+        if type(input_frame) != pd.DataFrame:
+            raise TypeError("input_frame must be a pd.DataFrame!")
+        
+        return NearestNeighbourRecommender(input_frame)
+        
+    @shared_instrumentation.timed("recommender.recommend")
+    def recommend(self, danceability_category: str, mood: str, energy_category: str, instrumentalness_category: str, input_frame: pd.DataFrame,
+                  label_index: LabelIndex = None) -> pd.DataFrame:
         """ Recommends tracks from the given frame based on the passed categories.
         Args:
             danceability_category (str): The danceability category (very undanceable, undanceable, danceable, very danceable).
@@ -23,12 +58,16 @@ class Recommender:
             energy_category (str): The energy category (very low, low, high, very high).
             instrumentalness_category (str): The instrumentalness category (very low, low, high, very high).
             input_frame (pd.DataFrame): The input data frame.
+            label_index (LabelIndex, optional): The label index built for input_frame (see build_label_index()).
+                                                If passed, the bucket is sliced from the index instead of scanning the frame. Defaults to None.
         Raises:
             TypeError: Is thrown if danceability_category is not a str.
             TypeError: Is thrown if mood is not a str.
             TypeError: Is thrown if energy_category is not a str.
             TypeError: Is thrown if instrumentalness_category is not a str.
             TypeError: Is thrown if input_frame is not a pd.DataFrame.
+            TypeError: Is thrown if label_index is neither a LabelIndex nor None.
+            ValueError: Is thrown if label_index was not built for input_frame.
             e: Error message.
         Returns:
             pd.DataFrame: A data frame consisting of recommended tracks.
@@ -43,6 +82,14 @@ class Recommender:
             raise TypeError("instrumentalness_category is not a str!")
         if type(input_frame) != pd.DataFrame:
             raise TypeError("input_frame must is not a pd.DataFrame!")
+        if label_index is not None and type(label_index) != LabelIndex:
+            raise TypeError("label_index must be either a LabelIndex or None!")
+        if label_index is not None and len(label_index) != len(input_frame):
+            raise ValueError("label_index was not built for input_frame!")
+        
+        if label_index is not None:
+            rows = label_index.get_rows(danceability_category, mood, energy_category, instrumentalness_category)
+            return input_frame.iloc[rows]
         
         try:
             danceability_min_incl = self.__danceability_categorizer.get_min_inclusive(danceability_category)
@@ -1,3 +1,5 @@
+import numpy as np
+
 class ValenceCategorizer:
     """Represents the valence categorizer.
     """
@@ -34,6 +36,39 @@ class ValenceCategorizer:
         
         raise ValueError("valence_value must be within valid range!")
     
+    def categorize_array(self, valence_values: np.ndarray) -> np.ndarray:
+        """Categorizes an array of valence values (values between 0 and 1) at once.
+        Args:
+            valence_values (np.ndarray): The valence values (values between 0 and 1).
+        Raises:
+            TypeError: Is thrown if valence_values is not a np.ndarray.
+            TypeError: Is thrown if valence_values is not a float array.
+            ValueError: Is thrown if any of the valence_values is less than 0.
+            ValueError: Is thrown if any of the valence_values is greater than 1.
+            ValueError: Is thrown if any of the valence_values is out of range (NaN).
+        Returns:
+            np.ndarray: The category digits as np.int8 (positions in get_categories(), 0 = very negative, ..., 3 = very positive).
+        """
+        if type(valence_values) != np.ndarray:
+            raise TypeError("valence_values must be a np.ndarray!")
+        if valence_values.dtype.kind != "f":
+            raise TypeError("valence_values must be a float array!")
+        if np.any(valence_values < 0):
+            raise ValueError("valence_value cannot be negative!")
+        if np.any(valence_values > 1):
+            raise ValueError("valence_value cannot be greater than 1!")
+        if np.any(np.isnan(valence_values)):
+            raise ValueError("valence_value must be within valid range!")
+        
+        return np.digitize(valence_values, [0.25, 0.5, 0.75]).astype(np.int8)
+    
+    def get_categories(self) -> list:
+        """Gets the categories ordered from the lowest to the highest value range.
+        Returns:
+            list: The list of categories (very negative, negative, positive, very positive).
+        """
+        return ['very negative', 'negative', 'positive', 'very positive']
+    
     def get_min_inclusive(self, category_name: str) -> float:
         """Gets the minimum value for a given category (inclusive).
         Args:
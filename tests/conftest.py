@@ -0,0 +1,6 @@
+import sys
+import os
+# The modules are imported as in the app (see app/view/main.py): the machine learning modules flat, the app modules by package
+for path in [os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', *parts) for parts in [(), ('machine_learning_algorithm',), ('app',), ('benchmarks',)]]:
+    if path not in sys.path:
+        sys.path.append(path)
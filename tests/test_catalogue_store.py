@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+from model.catalogue_store import CatalogueStore
+from synthetic_catalogue import SyntheticCatalogue
+
+@pytest.fixture(scope="module")
+def frame():
+    frame = SyntheticCatalogue(0).generate(2000).reset_index(drop=True)
+    frame["name"] = frame["name"].astype(object)
+    frame.loc[3, "name"] = np.nan
+    return frame
+
+@pytest.fixture(scope="module")
+def view(frame, tmp_path_factory):
+    directory = tmp_path_factory.mktemp("catalogue")
+    CatalogueStore.write(frame, directory)
+    return CatalogueStore.load(directory)
+
+def test_string_columns_are_arrow_backed(view):
+    pytest.importorskip("pyarrow")
+    loaded = view.to_frame(["name", "artists_name"])
+
+    assert isinstance(loaded["name"].array, pd.arrays.ArrowStringArray)
+    assert isinstance(loaded["artists_name"].dtype, pd.ArrowDtype)
+
+def test_to_frame_matches_frame(frame, view):
+    loaded = view.to_frame()
+
+    assert list(loaded.columns) == list(frame.columns)
+    assert loaded["name"].isna().tolist() == frame["name"].isna().tolist()
+    assert loaded["name"].fillna("").tolist() == frame["name"].fillna("").tolist()
+    assert [list(artists) for artists in loaded["artists_name"]] == [list(artists) for artists in frame["artists_name"]]
+    assert np.array_equal(loaded["danceability"].to_numpy(), frame["danceability"].to_numpy())
+
+def test_take_matches_frame(frame, view):
+    positions = np.array([5, 3, 0], dtype=np.int64)
+    taken = view.take(positions, ["name", "artists_name"])
+
+    assert pd.isna(taken["name"].iloc[1])
+    assert taken["artists_name"].tolist() == frame["artists_name"].iloc[positions].tolist()
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from model.catalogue import Catalogue
+from model.filter_pipeline import FilterPipeline
+from model.frame_filter import FrameFilter
+from model.search_index import SearchIndex
+from model.track_page_view import TrackPageView
+from synthetic_catalogue import SyntheticCatalogue
+
+@pytest.fixture(scope="module")
+def catalogue():
+    return Catalogue(SyntheticCatalogue(0).generate(5000).reset_index(drop=True), "id")
+
+@pytest.fixture
+def pipeline(catalogue):
+    search_index = SearchIndex(catalogue.get_frame(), "artists_name", "name")
+    return FilterPipeline(catalogue, lambda rows, search_value: search_index.search(search_value, rows), "track_genre")
+
+def test_unfiltered_stages_are_memorized_lazily(pipeline, catalogue):
+    rows = pipeline.run([("danceability", (0.0, 1.0)), ("energy", (0.0, 1.0))], "all", "")
+
+    assert rows is None
+    assert catalogue.take(rows) is catalogue.get_frame()
+    assert catalogue.get_row_count(rows) == len(catalogue)
+
+def test_filtered_stages_match_full_scan(pipeline, catalogue):
+    frame = catalogue.get_frame()
+    pipeline.run([("danceability", (0.0, 1.0))], "all", "")
+    rows = pipeline.run([("danceability", (0.2, 0.6))], "all", "")
+    expected = FrameFilter.apply_range_filter(frame, [("danceability", (0.2, 0.6))])
+
+    assert catalogue.take(rows).equals(expected)
+
+    recommendations = np.array([4000, 17, 2500], dtype=np.int64)
+    assert np.array_equal(pipeline.run([("danceability", (0.0, 1.0))], "all", "", recommendations), recommendations)
+
+def test_page_view_of_all_rows(catalogue):
+    page_view = TrackPageView(catalogue, None, lambda frame: list(frame["id"]))
+
+    assert len(page_view) == len(catalogue)
+    assert page_view.is_view_of(None)
+    assert page_view.get_tracks(10, 20) == list(catalogue.get_frame()["id"].iloc[10:20])
+    assert page_view.get_tracks(len(catalogue) - 2, len(catalogue) + 8) == list(catalogue.get_frame()["id"].iloc[-2:])
@@ -0,0 +1,9 @@
+from import_time_report import measure_startup_imports, get_summary
+
+FORBIDDEN_MODULES = ["sklearn", "plotly.express"]
+
+def test_startup_does_not_import_forbidden_modules():
+    # The timing budget is checked by import_time_report.py (median of several runs), wall-clock times are too noisy for the tests
+    summary = get_summary(measure_startup_imports(), FORBIDDEN_MODULES)
+
+    assert summary["forbidden"] == []
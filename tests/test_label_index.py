@@ -0,0 +1,42 @@
+import itertools
+import numpy as np
+import pytest
+from label_calculator import LabelCalculator
+from label_index import LabelIndex
+from synthetic_catalogue import SyntheticCatalogue
+
+@pytest.fixture(scope="module")
+def catalogue():
+    return SyntheticCatalogue(0).generate(20000)
+
+@pytest.fixture(scope="module")
+def packed_labels(catalogue):
+    return LabelCalculator().calculate_labels(catalogue).astype(np.int64)
+
+@pytest.fixture(scope="module")
+def label_index(catalogue):
+    return LabelIndex(catalogue)
+
+def test_last_bucket_matches_full_scan(label_index, packed_labels):
+    expected = np.flatnonzero(packed_labels == 255)
+
+    assert len(expected) > 0
+    assert np.array_equal(label_index.get_rows_by_label("3,3,3,3"), expected)
+    assert np.array_equal(label_index.get_rows_by_packed_label(255), expected)
+    assert np.array_equal(label_index.get_rows_by_packed_label(np.uint8(255)), expected)
+    assert np.array_equal(label_index.get_rows("very danceable", "very positive", "very high", "very high"), expected)
+
+@pytest.mark.parametrize("label", ["*,*,*,*", "3,*,*,*", "*,3,*,*", "*,*,3,*", "*,*,*,3", "3,3,*,3", "0,*,2,*"])
+def test_wildcard_labels_match_full_scan(label_index, packed_labels, label):
+    digits = label.split(",")
+    matches = np.ones(len(packed_labels), dtype=bool)
+
+    for digit, shift in zip(digits, [6, 4, 2, 0]):
+        if digit != "*":
+            matches &= ((packed_labels >> shift) & 3) == int(digit)
+
+    assert np.array_equal(label_index.get_rows_by_label(label), np.flatnonzero(matches))
+
+def test_all_packed_labels_match_full_scan(label_index, packed_labels):
+    for packed_label in itertools.chain(range(LabelIndex.BUCKET_COUNT), np.arange(LabelIndex.BUCKET_COUNT, dtype=np.uint8)):
+        assert np.array_equal(label_index.get_rows_by_packed_label(packed_label), np.flatnonzero(packed_labels == int(packed_label)))
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from label_calculator import LabelCalculator
+from model_artefact import ModelArtefact
+from prediction_grid import PredictionGrid
+from synthetic_catalogue import SyntheticCatalogue
+
+FEATURE_ATTRIBUTES = ["danceability", "valence", "instrumentalness", "energy"]
+
+@pytest.fixture(scope="module")
+def catalogue():
+    return SyntheticCatalogue(0).generate(2000).reset_index(drop=True)
+
+@pytest.fixture(scope="module")
+def knn_classifier(catalogue):
+    neighbors = pytest.importorskip("sklearn.neighbors")
+    knn_classifier = neighbors.KNeighborsClassifier(n_neighbors=5)
+    knn_classifier.fit(catalogue[FEATURE_ATTRIBUTES], LabelCalculator().unpack_labels(LabelCalculator().calculate_labels(catalogue)).astype(object))
+    return knn_classifier
+
+def test_artefact_predicts_as_the_classifier(knn_classifier, catalogue, tmp_path):
+    ModelArtefact.from_classifier(knn_classifier).save(tmp_path.joinpath("model.knn"))
+    artefact = ModelArtefact.load(tmp_path.joinpath("model.knn"))
+    queries = catalogue[FEATURE_ATTRIBUTES].iloc[:50]
+    expected = knn_classifier.predict(queries)
+    labels = artefact.predict(queries)
+
+    assert labels.dtype == expected.dtype
+    assert [type(label) for label in labels] == [type(label) for label in expected]
+    assert labels.tolist() == expected.tolist()
+    # The labels are accepted by the view (see get_recommendations())
+    assert LabelCalculator().decompose_label(labels[0]) is not None
+
+def test_grid_predicts_the_types_of_the_classifier(knn_classifier, catalogue):
+    grid = PredictionGrid.build(knn_classifier, 4, knn_classifier)
+    queries = catalogue[FEATURE_ATTRIBUTES].iloc[:50]
+    expected = knn_classifier.predict(queries)
+    labels = grid.predict(queries)
+
+    assert labels.dtype == expected.dtype
+    assert [type(label) for label in labels] == [type(label) for label in expected]
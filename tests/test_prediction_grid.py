@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from prediction_grid import PredictionGrid
+
+class ConstantClassifier:
+    def predict(self, input_data):
+        return np.array(["3,3,3,3"] * len(input_data))
+
+@pytest.fixture
+def cells():
+    # Resolution 2, every cell predicts the packed label of its flat index, the last cell is a boundary cell
+    cells = np.zeros((2, 2, 2, 2, 2), dtype=np.uint8)
+    cells[0] = np.arange(16, dtype=np.uint8).reshape(2, 2, 2, 2)
+    cells[1, 1, 1, 1, 1] = 1
+    return cells
+
+def test_lookup_of_inner_cells(cells):
+    grid = PredictionGrid(cells)
+
+    assert grid.lookup(0.1, 0.1, 0.1, 0.9) == 1
+    assert grid.lookup(0.9, 0.9, 0.9, 0.9) == PredictionGrid.UNRESOLVED
+    assert grid.lookup(float("nan"), 0.1, 0.1, 0.1) == PredictionGrid.UNRESOLVED
+    assert grid.predict_packed(np.array([[0.1, 0.1, 0.1, 0.9], [0.9, 0.1, 0.1, 0.1]])).tolist() == [1, 8]
+
+@pytest.mark.parametrize("query", [[1.5, 0.5, 0.5, 0.5], [-0.1, 0.5, 0.5, 0.5], [float("nan"), 0.5, 0.5, 0.5]])
+def test_queries_outside_of_the_cube_without_fallback(cells, query):
+    with pytest.raises(ValueError):
+        PredictionGrid(cells).predict_packed(np.array([query]))
+
+def test_queries_outside_of_the_cube_and_boundary_cells_use_the_fallback(cells):
+    grid = PredictionGrid(cells, ConstantClassifier())
+
+    assert grid.predict_packed(np.array([[1.5, 0.5, 0.5, 0.5], [float("nan"), 0.5, 0.5, 0.5], [0.9, 0.9, 0.9, 0.9], [0.1, 0.1, 0.1, 0.1]])).tolist() == [255, 255, 255, 0]
+
+def test_grid_is_opt_in(monkeypatch):
+    monkeypatch.delenv(PredictionGrid.ENVIRONMENT_VARIABLE, raising=False)
+    assert not(PredictionGrid.is_requested())
+    monkeypatch.setenv(PredictionGrid.ENVIRONMENT_VARIABLE, "1")
+    assert PredictionGrid.is_requested()
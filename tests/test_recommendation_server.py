@@ -0,0 +1,129 @@
+import json
+import asyncio
+import threading
+from http import HTTPStatus
+import numpy as np
+import pytest
+from label_calculator import LabelCalculator
+from recommender import Recommender
+from recommendation_cache import RecommendationCache
+from synthetic_catalogue import SyntheticCatalogue
+from model.catalogue import Catalogue
+from model.search_index import SearchIndex
+from model.shared_resources import SharedResources
+from model.recommendation_service import RecommendationService
+from service.recommendation_server import RecommendationServer
+
+class RecordingClassifier:
+    """Predicts the rule based labels and records the size of every predict() call."""
+    def __init__(self):
+        self.batch_sizes = []
+        self.__lock = threading.Lock()
+
+    def predict(self, input_data):
+        with self.__lock:
+            self.batch_sizes.append(len(input_data))
+
+        label_calculator = LabelCalculator()
+        return label_calculator.unpack_labels(label_calculator.calculate_labels(input_data)).astype(object)
+
+@pytest.fixture(scope="module")
+def catalogue_frame():
+    return SyntheticCatalogue(0).generate(3000).reset_index(drop=True)
+
+@pytest.fixture
+def classifier():
+    return RecordingClassifier()
+
+@pytest.fixture
+def server(catalogue_frame, classifier):
+    recommender = Recommender()
+    resources = SharedResources(Catalogue(catalogue_frame, "id"), classifier, recommender.build_label_index(catalogue_frame),
+                                recommender.build_nearest_neighbour_recommender(catalogue_frame),
+                                SearchIndex(catalogue_frame, "artists_name", "name"))
+    service = RecommendationService(resources, LabelCalculator(), RecommendationCache())
+    # The long delay collects all concurrent requests of a test into one batch
+    return RecommendationServer(service, RecommendationCache(), port=0, max_workers=4, max_batch_delay=0.2)
+
+def request(server, method: str, path: str, body=None) -> tuple:
+    return asyncio.run(server.handle_request(method, path, b"" if body is None else json.dumps(body).encode("utf-8")))
+
+def test_unknown_path_and_method(server):
+    assert request(server, "GET", "/nothing")[0] == HTTPStatus.NOT_FOUND
+    assert request(server, "GET", "/tracks")[0] == HTTPStatus.METHOD_NOT_ALLOWED
+    assert request(server, "POST", "/health")[0] == HTTPStatus.METHOD_NOT_ALLOWED
+
+def test_malformed_requests(server):
+    assert asyncio.run(server.handle_request("POST", "/tracks", b"{not json"))[0] == HTTPStatus.BAD_REQUEST
+    assert request(server, "POST", "/tracks", [1, 2])[0] == HTTPStatus.BAD_REQUEST
+    assert request(server, "POST", "/tracks", {"criteria": {"danceability": [0.2]}})[0] == HTTPStatus.BAD_REQUEST
+    assert request(server, "POST", "/recommendations", {"track_id": "unknown"})[0] == HTTPStatus.NOT_FOUND
+
+def test_limit(server):
+    status, response = request(server, "POST", "/tracks", {"limit": RecommendationServer.MAX_LIMIT})
+
+    assert status == HTTPStatus.OK and len(response["tracks"]) == RecommendationServer.MAX_LIMIT
+    assert request(server, "POST", "/tracks", {"limit": RecommendationServer.MAX_LIMIT + 1})[0] == HTTPStatus.BAD_REQUEST
+
+def test_concurrent_single_track_requests_share_one_prediction(server, classifier, catalogue_frame):
+    track_ids = catalogue_frame["id"].iloc[:20].tolist()
+
+    async def request_all():
+        return await asyncio.gather(*[server.handle_request("POST", "/recommendations", json.dumps({"track_id": track_id, "limit": 5}).encode("utf-8"))
+                                      for track_id in track_ids])
+
+    responses = asyncio.run(request_all())
+
+    assert all(status == HTTPStatus.OK for status, _ in responses)
+    assert classifier.batch_sizes == [len(track_ids)]
+    label_calculator = LabelCalculator()
+    expected_labels = label_calculator.calculate_labels(catalogue_frame.iloc[:20])
+
+    for (_, response), packed_label in zip(responses, expected_labels):
+        assert response["total"] == int(np.count_nonzero(label_calculator.calculate_labels(catalogue_frame) == packed_label))
+
+def test_socket_round_trip(server):
+    async def round_trip() -> list:
+        listening_server = await server.start()
+        port = listening_server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        responses = []
+
+        async def read_response() -> tuple:
+            status = int((await reader.readline()).split()[1])
+            headers = {}
+
+            while (line := await reader.readline()) != b"\r\n":
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            return status, headers, json.loads(await reader.readexactly(int(headers["content-length"])))
+
+        try:
+            # Two requests on one keep-alive connection, the second one closes it
+            body = json.dumps({"genre": "rock", "limit": 3}).encode("utf-8")
+            writer.write(b"GET /health HTTP/1.1\r\nHost: test\r\n\r\n")
+            writer.write(b"POST /tracks HTTP/1.1\r\nHost: test\r\nConnection: close\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+            await writer.drain()
+            responses.append(await read_response())
+            responses.append(await read_response())
+            responses.append(await reader.read())
+            writer.close()
+
+            # The body size is checked before the body is read
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"POST /tracks HTTP/1.1\r\nContent-Length: " + str(RecommendationServer.MAX_BODY_SIZE + 1).encode() + b"\r\n\r\n")
+            await writer.drain()
+            responses.append(await read_response())
+            writer.close()
+        finally:
+            listening_server.close()
+            await listening_server.wait_closed()
+        return responses
+
+    health, tracks, rest, too_large = asyncio.run(round_trip())
+
+    assert health[0] == 200 and health[1]["connection"] == "keep-alive" and health[2] == {"status": "ok", "tracks": 3000}
+    assert tracks[0] == 200 and tracks[1]["connection"] == "close" and len(tracks[2]["tracks"]) == 3
+    assert all(track["track_genre"] == "rock" for track in tracks[2]["tracks"])
+    assert rest == b""
+    assert too_large[0] == 413
@@ -0,0 +1,72 @@
+import random
+import threading
+import tracemalloc
+import pytest
+from model.rerun_profiler import RerunProfiler
+
+@pytest.fixture
+def profiler(tmp_path):
+    return RerunProfiler(tmp_path, max_duration=0.2)
+
+def test_profiled_rerun_is_reported(profiler, tmp_path):
+    assert profiler.start("rerun")
+    assert profiler.is_active()
+    assert not(profiler.start("rerun"))
+    sum(range(1000))
+    report_path = profiler.finish()
+
+    assert report_path.is_file() and report_path.with_suffix(".pstats").is_file()
+    assert not(profiler.is_active())
+    assert not(tracemalloc.is_tracing())
+
+def test_rerun_of_an_ended_thread_does_not_block_the_profiler(profiler):
+    # The rerun raises before reaching finish()
+    thread = threading.Thread(target=lambda: profiler.start("interrupted"))
+    thread.start()
+    thread.join()
+
+    assert profiler.start("rerun")
+    assert profiler.finish() is not None
+    assert not(tracemalloc.is_tracing())
+
+def test_expired_rerun_of_a_running_thread_is_discarded(profiler):
+    started, resume = threading.Event(), threading.Event()
+    results = []
+
+    def interrupted_rerun():
+        results.append(profiler.start("interrupted"))
+        started.set()
+        resume.wait()
+        results.append(profiler.finish())
+
+    thread = threading.Thread(target=interrupted_rerun)
+    thread.start()
+    started.wait()
+
+    assert not(profiler.start("rerun"))
+    threading.Event().wait(0.3)
+    assert profiler.start("rerun")
+    resume.set()
+    thread.join()
+
+    # The discarded rerun does not release the profile of this thread
+    assert results == [True, None]
+    assert profiler.is_active()
+    assert profiler.finish() is not None
+    assert not(tracemalloc.is_tracing())
+
+def test_rerun_is_sampled_once(tmp_path):
+    random.seed(0)
+    profiler = RerunProfiler(tmp_path, sample_rate=0.5, max_reports=1000)
+    report_paths = []
+
+    for _ in range(400):
+        # The callback and the start of the script both start the profiling of a rerun
+        profiler.start("on_paginator_right")
+        profiler.start("rerun")
+        report_paths.append(profiler.finish())
+
+    report_paths = [report_path for report_path in report_paths if report_path is not None]
+
+    assert 0.42 <= len(report_paths) / 400 <= 0.58
+    assert all(report_path.read_text().startswith("Rerun: on_paginator_right\n") for report_path in report_paths)